@@ -17,7 +17,9 @@ from contextlib import asynccontextmanager
 import logging
 
 from geocoding.api import router
-from geocoding.dependencies import cleanup_services
+from geocoding.dependencies import (
+    cleanup_services, start_gazetteer_refresher, get_settlement_gazetteer, get_place_autocompleter
+)
 from geocoding.config import get_settings
 
 # Configure logging
@@ -36,6 +38,9 @@ async def lifespan(app: FastAPI):
     Startup:
     - Log configuration
     - Verify settings loaded
+    - Load the settlement gazetteer
+    - Start the gazetteer refresher
+    - Build the autocomplete index
     
     Shutdown:
     - Cleanup services
@@ -47,6 +52,11 @@ async def lifespan(app: FastAPI):
     logger.info(f"Supabase URL: {settings.supabase_url}")
     logger.info(f"LocationIQ API configured: {'Yes' if settings.locationiq_api_key else 'No'}")
     logger.info(f"Fuzzy match threshold: {settings.fuzzy_match_threshold}")
+    settlements = get_settlement_gazetteer()
+    logger.info(f"Settlement gazetteer: {f'{len(settlements)} settlements' if settlements else 'not configured'}")
+    start_gazetteer_refresher()
+    index = await get_place_autocompleter().index()
+    logger.info(f"Autocomplete index: {f'{len(index)} places' if index else 'not loaded, retrying on first request'}")
     logger.info("Service ready to accept requests")
     
     yield
@@ -11,7 +11,9 @@ from .models import (
     GeocodeRequest,
     MatchedPlace,
     GeocodeResult,
-    GeocodeResponse
+    GeocodeResponse,
+    AutocompleteSuggestion,
+    AutocompleteResponse
 )
 
 # Configuration
@@ -20,14 +22,21 @@ from .config import get_settings, Settings
 # Services
 from .services import (
     GeocodingService,
+    BatchContext,
     NameMatcher,
     ExternalGeocoder,
     DirectionalParser,
-    Direction
+    Direction,
+    ResultCache,
+    AutocompleteIndex,
+    PlaceAutocompleter
 )
 
 # Repositories
-from .repositories import PlacesRepository
+from .repositories import PlacesRepository, AsyncpgPlacesRepository
+
+# Gazetteer snapshots
+from .gazetteer import GazetteerSnapshot, LiveGazetteer, GazetteerRefresher, SettlementGazetteer
 
 # API
 from .api import router
@@ -35,11 +44,20 @@ from .api import router
 # Dependencies
 from .dependencies import (
     get_supabase_client,
+    get_gazetteer_snapshot,
+    get_gazetteer,
+    get_gazetteer_refresher,
+    start_gazetteer_refresher,
+    get_settlement_gazetteer,
+    get_result_cache,
+    get_asyncpg_places_repository,
     get_places_repository,
     get_name_matcher,
     get_external_geocoder,
     get_directional_parser,
     get_geocoding_service,
+    get_shared_geocoding_service,
+    get_place_autocompleter,
     cleanup_services
 )
 
@@ -52,6 +70,8 @@ __all__ = [
     'MatchedPlace',
     'GeocodeResult',
     'GeocodeResponse',
+    'AutocompleteSuggestion',
+    'AutocompleteResponse',
     
     # Config
     'get_settings',
@@ -59,23 +79,43 @@ __all__ = [
     
     # Services
     'GeocodingService',
+    'BatchContext',
     'NameMatcher',
     'ExternalGeocoder',
     'DirectionalParser',
     'Direction',
+    'ResultCache',
+    'AutocompleteIndex',
+    'PlaceAutocompleter',
     
     # Repositories
     'PlacesRepository',
+    'AsyncpgPlacesRepository',
+    
+    # Gazetteer snapshots
+    'GazetteerSnapshot',
+    'LiveGazetteer',
+    'GazetteerRefresher',
+    'SettlementGazetteer',
     
     # API
     'router',
     
     # Dependencies
     'get_supabase_client',
+    'get_gazetteer_snapshot',
+    'get_gazetteer',
+    'get_gazetteer_refresher',
+    'start_gazetteer_refresher',
+    'get_settlement_gazetteer',
+    'get_result_cache',
+    'get_asyncpg_places_repository',
     'get_places_repository',
     'get_name_matcher',
     'get_external_geocoder',
     'get_directional_parser',
     'get_geocoding_service',
+    'get_shared_geocoding_service',
+    'get_place_autocompleter',
     'cleanup_services',
 ]
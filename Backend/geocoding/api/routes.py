@@ -1,10 +1,12 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List, Optional
+from uuid import UUID
 import logging
 
-from ..models import GeocodeRequest, GeocodeResponse, GeocodeResult
+from ..models import GeocodeRequest, GeocodeResponse, GeocodeResult, AutocompleteResponse
 from ..services.geocoding_service import GeocodingService
-from ..dependencies import get_geocoding_service
+from ..services.autocomplete import PlaceAutocompleter
+from ..dependencies import get_geocoding_service, get_gazetteer, get_place_autocompleter
 
 logger = logging.getLogger(__name__)
 
@@ -98,6 +100,7 @@ async def geocode_single_location(
     location: str,
     prefer_lower_admin_levels: bool = True,
     include_confidence_scores: bool = False,
+    timeout_ms: Optional[int] = Query(None, ge=1),
     service: GeocodingService = Depends(get_geocoding_service)
 ) -> GeocodeResponse:
     """
@@ -107,6 +110,7 @@ async def geocode_single_location(
         location: Location string to geocode
         prefer_lower_admin_levels: Prefer more specific places when scores are similar
         include_confidence_scores: Include confidence scores in response
+        timeout_ms: Optional time budget for the request
         service: Injected GeocodingService instance
         
     Returns:
@@ -117,7 +121,8 @@ async def geocode_single_location(
         
         options = GeocodeOptions(
             prefer_lower_admin_levels=prefer_lower_admin_levels,
-            include_confidence_scores=include_confidence_scores
+            include_confidence_scores=include_confidence_scores,
+            timeout_ms=timeout_ms
         )
         
         logger.info(f"GET geocoding request for: {location}")
@@ -144,7 +149,8 @@ async def geocode_single_location(
 @router.get(
     "/suggest/{location}",
     summary="Get alternative suggestions for a location",
-    description="Useful when a location fails to match - returns similar place names."
+    description="Useful when a location fails to match - returns similar place names. "
+                "For type-ahead, use /autocomplete."
 )
 async def suggest_locations(
     location: str,
@@ -185,6 +191,53 @@ async def suggest_locations(
         )
 
 
+@router.get(
+    "/autocomplete",
+    response_model=AutocompleteResponse,
+    summary="Type-ahead completions for a partial place name",
+    description="""
+    Ranked completions served from an in-memory index of place names and aliases
+    (no database query per call).
+    
+    **Ranking:** exact name or alias, then name prefix, alias prefix, and prefix of a
+    later word in the name (e.g. "ghazi" → Dera Ghazi Khan); ties go to broader places
+    (lower hierarchy level), then shorter names.
+    """
+)
+async def autocomplete_places(
+    q: str = Query(..., min_length=1, max_length=100, description="Text typed so far"),
+    limit: int = Query(10, ge=1, le=50),
+    level: Optional[int] = Query(None, ge=0, description="Only places at this hierarchy level"),
+    province_id: Optional[UUID] = Query(None, description="Only places within this province"),
+    autocompleter: PlaceAutocompleter = Depends(get_place_autocompleter)
+) -> AutocompleteResponse:
+    """
+    Complete a partial place name.
+    
+    Args:
+        q: Partial place name
+        limit: Maximum number of completions
+        level: Optional hierarchy level filter
+        province_id: Optional province filter
+        autocompleter: Injected PlaceAutocompleter singleton
+        
+    Returns:
+        AutocompleteResponse with ranked suggestions
+    """
+    try:
+        suggestions = await autocompleter.complete(
+            q, limit, level, str(province_id) if province_id else None
+        )
+        return AutocompleteResponse(query=q, suggestions=suggestions)
+        
+    except Exception as e:
+        logger.error(f"Autocomplete request failed: {e}", exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Internal server error fetching completions"
+        )
+
+
 @router.get(
     "/health",
     summary="Health check endpoint",
@@ -200,5 +253,6 @@ async def health_check():
     return {
         "status": "healthy",
         "service": "geocoding-microservice",
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "gazetteer_version": get_gazetteer().version
     }
@@ -2,6 +2,7 @@ from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from functools import lru_cache
 from pathlib import Path
+from typing import Literal, Optional
 import os
 
 class Settings(BaseSettings):
@@ -18,13 +19,38 @@ class Settings(BaseSettings):
     locationiq_api_key: str = Field(default="", validation_alias="location_iq_key")
     locationiq_base_url: str = "https://us1.locationiq.com/v1"
     
+    # Places data access: PostgREST via the Supabase client (sync; each request runs in a thread),
+    # or Postgres directly via asyncpg
+    places_backend: Literal["postgrest", "asyncpg"] = "postgrest"
+    # Direct or session-mode Postgres URL (asyncpg backend; prepared statements need a session)
+    database_url: Optional[str] = None
+    db_pool_min_size: int = 1
+    db_pool_max_size: int = 10
+    
     # Matching thresholds
     fuzzy_match_threshold: float = 0.85
+    # Candidates are fetched once per name at this floor; matches need fuzzy_match_threshold
+    suggestion_threshold: float = 0.5
+    max_fuzzy_candidates: int = 10
     prefer_lower_admin_levels: bool = True
     
+    # Offline settlement gazetteer (GeoNames country dump, e.g. PK.zip); unset = LocationIQ only
+    settlement_gazetteer_path: Optional[str] = None
+    settlement_match_threshold: float = 0.9
+    
     # Caching
     cache_ttl_days: int = 30
     
+    # Shared result cache across replicas (Redis-compatible URL); unset = in-process caches only
+    redis_url: Optional[str] = None
+    result_cache_ttl_seconds: int = 3600
+    redis_timeout_seconds: float = 0.25
+    
+    # Binary gazetteer snapshot (python -m geocoding.gazetteer.builder); unset = database only
+    gazetteer_snapshot_path: Optional[str] = None
+    # Seconds between polls for changed places; 0 disables the refresher
+    gazetteer_refresh_seconds: float = 60
+    
     model_config = SettingsConfigDict(
         # Only use .env file if it exists (local dev), otherwise use env vars (Modal)
         env_file=str(Path(__file__).parent.parent / ".env") if (Path(__file__).parent.parent / ".env").exists() else None,
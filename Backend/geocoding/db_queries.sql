@@ -19,9 +19,13 @@ CREATE INDEX IF NOT EXISTS idx_places_hierarchy
 ON places(hierarchy_level);
 
 -- Function 1: Fuzzy name search with trigram similarity
+-- One call at a low threshold serves both match selection and suggestions
+DROP FUNCTION IF EXISTS search_places_fuzzy(TEXT, REAL);
+
 CREATE OR REPLACE FUNCTION search_places_fuzzy(
     search_name TEXT,
-    similarity_threshold REAL DEFAULT 0.85
+    similarity_threshold REAL DEFAULT 0.85,
+    max_results INT DEFAULT 10
 )
 RETURNS TABLE (
     id UUID,
@@ -39,11 +43,14 @@ BEGIN
     FROM places p
     WHERE similarity(p.name, search_name) > similarity_threshold
     ORDER BY similarity_score DESC, hierarchy_level DESC
-    LIMIT 10;
+    LIMIT max_results;
 END;
 $$ LANGUAGE plpgsql;
 
 -- Function 2: Find place containing a point
+-- province_id lets batch disambiguation compare candidates by province
+DROP FUNCTION IF EXISTS find_place_by_point(FLOAT, FLOAT);
+
 CREATE OR REPLACE FUNCTION find_place_by_point(
     lon FLOAT,
     lat FLOAT
@@ -51,11 +58,12 @@ CREATE OR REPLACE FUNCTION find_place_by_point(
 RETURNS TABLE (
     id UUID,
     name TEXT,
-    hierarchy_level INT
+    hierarchy_level INT,
+    province_id UUID
 ) AS $$
 BEGIN
     RETURN QUERY
-    SELECT p.id, p.name, p.hierarchy_level
+    SELECT p.id, p.name, p.hierarchy_level, p.province_id
     FROM places p
     WHERE ST_Contains(p.polygon, ST_SetSRID(ST_MakePoint(lon, lat), 4326))
     ORDER BY hierarchy_level DESC
@@ -193,4 +201,207 @@ BEGIN
         AND NOT (p.id = ANY(base_place_ids))                -- Exclude base region itself
     ORDER BY p.hierarchy_level DESC;
 END;
-$$ LANGUAGE plpgsql;
\ No newline at end of file
+$$ LANGUAGE plpgsql;
+
+-- Gazetteer snapshot export (python -m geocoding.gazetteer.builder)
+-- Keyset-paginated by id; polygons travel as hex WKB with a precomputed bbox
+CREATE OR REPLACE FUNCTION export_places_snapshot(
+    after_id UUID DEFAULT NULL,
+    page_size INT DEFAULT 1000
+)
+RETURNS TABLE (
+    id UUID,
+    name TEXT,
+    parent_id UUID,
+    hierarchy_level INT,
+    min_lon FLOAT,
+    min_lat FLOAT,
+    max_lon FLOAT,
+    max_lat FLOAT,
+    polygon_wkb TEXT
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        p.id,
+        p.name,
+        p.parent_id,
+        p.hierarchy_level,
+        ST_XMin(p.polygon)::FLOAT,
+        ST_YMin(p.polygon)::FLOAT,
+        ST_XMax(p.polygon)::FLOAT,
+        ST_YMax(p.polygon)::FLOAT,
+        encode(ST_AsBinary(p.polygon), 'hex')
+    FROM places p
+    WHERE after_id IS NULL OR p.id > after_id
+    ORDER BY p.id
+    LIMIT page_size;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Incremental gazetteer refresh: change watermark and deletion tombstones
+ALTER TABLE places ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now();
+CREATE INDEX IF NOT EXISTS idx_places_updated_at ON places (updated_at, id);
+
+CREATE TABLE IF NOT EXISTS place_tombstones (
+    id UUID PRIMARY KEY,
+    deleted_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS idx_place_tombstones_deleted_at ON place_tombstones (deleted_at, id);
+
+CREATE OR REPLACE FUNCTION touch_places_updated_at()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.updated_at := now();
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS places_touch_updated_at ON places;
+CREATE TRIGGER places_touch_updated_at
+    BEFORE INSERT OR UPDATE ON places
+    FOR EACH ROW EXECUTE FUNCTION touch_places_updated_at();
+
+CREATE OR REPLACE FUNCTION record_place_tombstone()
+RETURNS TRIGGER AS $$
+BEGIN
+    INSERT INTO place_tombstones (id) VALUES (OLD.id)
+    ON CONFLICT (id) DO UPDATE SET deleted_at = now();
+    RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS places_record_tombstone ON places;
+CREATE TRIGGER places_record_tombstone
+    AFTER DELETE ON places
+    FOR EACH ROW EXECUTE FUNCTION record_place_tombstone();
+
+-- Places changed at or after a watermark, keyset-paginated by (updated_at, id)
+CREATE OR REPLACE FUNCTION places_changed_since(
+    since TIMESTAMPTZ,
+    after_id UUID DEFAULT NULL,
+    page_size INT DEFAULT 1000
+)
+RETURNS TABLE (
+    id UUID,
+    name TEXT,
+    parent_id UUID,
+    parent_name TEXT,
+    hierarchy_level INT,
+    updated_at TIMESTAMPTZ,
+    deleted BOOLEAN
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT c.* FROM (
+        SELECT p.id, p.name, p.parent_id, p.parent_name, p.hierarchy_level, p.updated_at, FALSE
+        FROM places p
+        UNION ALL
+        SELECT t.id, NULL::TEXT, NULL::UUID, NULL::TEXT, NULL::INT, t.deleted_at, TRUE
+        FROM place_tombstones t
+        WHERE NOT EXISTS (SELECT 1 FROM places p WHERE p.id = t.id)
+    ) AS c (id, name, parent_id, parent_name, hierarchy_level, updated_at, deleted)
+    WHERE (after_id IS NULL AND c.updated_at >= since)
+        OR (after_id IS NOT NULL AND (c.updated_at, c.id) > (since, after_id))
+    ORDER BY c.updated_at, c.id
+    LIMIT page_size;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Current gazetteer watermark (latest change or deletion)
+CREATE OR REPLACE FUNCTION gazetteer_version()
+RETURNS TIMESTAMPTZ AS $$
+    SELECT GREATEST(
+        (SELECT max(updated_at) FROM places),
+        (SELECT max(deleted_at) FROM place_tombstones)
+    );
+$$ LANGUAGE sql STABLE;
+
+-- Batch disambiguation context: a representative point inside each polygon
+-- (ST_PointOnSurface, unlike ST_Centroid, never falls outside concave shapes)
+-- and the level-1 ancestor. Maintained on write (a change cascades to
+-- descendants); parents must be inserted before their children for
+-- province_id to resolve.
+ALTER TABLE places ADD COLUMN IF NOT EXISTS centroid_lon DOUBLE PRECISION;
+ALTER TABLE places ADD COLUMN IF NOT EXISTS centroid_lat DOUBLE PRECISION;
+ALTER TABLE places ADD COLUMN IF NOT EXISTS province_id UUID;
+CREATE INDEX IF NOT EXISTS idx_places_province ON places (province_id);
+
+CREATE OR REPLACE FUNCTION set_place_context()
+RETURNS TRIGGER AS $$
+DECLARE
+    surface_point GEOMETRY;
+BEGIN
+    IF NEW.polygon IS NULL THEN
+        NEW.centroid_lon := NULL;
+        NEW.centroid_lat := NULL;
+    ELSE
+        surface_point := ST_PointOnSurface(NEW.polygon);
+        NEW.centroid_lon := ST_X(surface_point);
+        NEW.centroid_lat := ST_Y(surface_point);
+    END IF;
+
+    IF NEW.hierarchy_level = 1 THEN
+        NEW.province_id := NEW.id;
+    ELSIF NEW.hierarchy_level > 1 THEN
+        SELECT p.province_id INTO NEW.province_id FROM places p WHERE p.id = NEW.parent_id;
+    ELSE
+        NEW.province_id := NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS places_set_context ON places;
+CREATE TRIGGER places_set_context
+    BEFORE INSERT OR UPDATE OF polygon, parent_id, hierarchy_level ON places
+    FOR EACH ROW EXECUTE FUNCTION set_place_context();
+
+-- A reparented or re-levelled place takes its whole subtree to the new province:
+-- every child updated here fires the trigger again for its own children
+CREATE OR REPLACE FUNCTION cascade_place_province()
+RETURNS TRIGGER AS $$
+BEGIN
+    UPDATE places c
+    SET province_id = NEW.province_id
+    WHERE c.parent_id = NEW.id
+        AND c.hierarchy_level > 1
+        AND c.province_id IS DISTINCT FROM NEW.province_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Not UPDATE OF province_id: that only sees SET lists, not values set_place_context assigns
+DROP TRIGGER IF EXISTS places_cascade_province ON places;
+CREATE TRIGGER places_cascade_province
+    AFTER UPDATE ON places
+    FOR EACH ROW
+    WHEN (OLD.province_id IS DISTINCT FROM NEW.province_id)
+    EXECUTE FUNCTION cascade_place_province();
+
+-- One-off backfill for existing rows
+UPDATE places
+SET centroid_lon = ST_X(ST_PointOnSurface(polygon)),
+    centroid_lat = ST_Y(ST_PointOnSurface(polygon))
+WHERE polygon IS NOT NULL AND centroid_lon IS NULL;
+
+WITH RECURSIVE lineage AS (
+    SELECT p.id, CASE WHEN p.hierarchy_level = 1 THEN p.id END AS province_id
+    FROM places p
+    WHERE p.parent_id IS NULL
+    UNION ALL
+    SELECT c.id, COALESCE(l.province_id, CASE WHEN c.hierarchy_level = 1 THEN c.id END)
+    FROM places c
+    JOIN lineage l ON c.parent_id = l.id
+)
+UPDATE places p
+SET province_id = l.province_id
+FROM lineage l
+WHERE p.id = l.id AND p.province_id IS DISTINCT FROM l.province_id;
+
+-- Alternate names (abbreviations, former names, local spellings) for autocomplete
+CREATE TABLE IF NOT EXISTS place_aliases (
+    place_id UUID NOT NULL REFERENCES places(id) ON DELETE CASCADE,
+    alias TEXT NOT NULL,
+    PRIMARY KEY (place_id, alias)
+);
@@ -1,13 +1,19 @@
 from functools import lru_cache
+from typing import Optional
 from supabase import create_client, Client
+import redis.asyncio as redis
 import logging
 
 from .config import get_settings, Settings
 from .repositories.places_repository import PlacesRepository
+from .repositories.asyncpg_repository import AsyncpgPlacesRepository
+from .gazetteer import GazetteerSnapshot, LiveGazetteer, GazetteerRefresher, SettlementGazetteer
 from .services.name_matcher import NameMatcher
 from .services.external_geocoder import ExternalGeocoder
 from .services.directional_parser import DirectionalParser
 from .services.geocoding_service import GeocodingService
+from .services.result_cache import ResultCache
+from .services.autocomplete import PlaceAutocompleter
 
 logger = logging.getLogger(__name__)
 
@@ -33,22 +39,147 @@ def get_supabase_client() -> Client:
     return client
 
 
+@lru_cache()
+def get_gazetteer_snapshot() -> Optional[GazetteerSnapshot]:
+    """
+    Get the memory-mapped gazetteer snapshot, if one is configured.
+    
+    Mapped once per process; the OS page cache shares it between processes.
+    A missing or unreadable file is logged and the database is used instead.
+    
+    Returns:
+        GazetteerSnapshot or None
+    """
+    path = get_settings().gazetteer_snapshot_path
+    if not path:
+        return None
+    try:
+        return GazetteerSnapshot.open(path)
+    except Exception as e:
+        logger.warning(f"Gazetteer snapshot {path} not loaded, using database lookups: {e}")
+        return None
+
+
+@lru_cache()
+def get_gazetteer() -> LiveGazetteer:
+    """
+    Get the live gazetteer singleton (snapshot + overlay of changed places).
+    
+    Its version advances whenever the refresher applies changes and
+    can be used to invalidate cached geocoding results.
+    
+    Returns:
+        LiveGazetteer instance
+    """
+    return LiveGazetteer(get_gazetteer_snapshot())
+
+
+@lru_cache()
+def get_gazetteer_refresher() -> Optional[GazetteerRefresher]:
+    """
+    Get the gazetteer refresher singleton, None when refreshing is disabled.
+    
+    Returns:
+        GazetteerRefresher or None
+    """
+    interval = get_settings().gazetteer_refresh_seconds
+    if interval <= 0:
+        return None
+    return GazetteerRefresher(get_supabase_client(), get_gazetteer(), interval_seconds=interval)
+
+
+def start_gazetteer_refresher():
+    """Start polling for changed places on the running event loop (if enabled)"""
+    refresher = get_gazetteer_refresher()
+    if refresher:
+        refresher.start()
+
+
+@lru_cache()
+def get_settlement_gazetteer() -> Optional[SettlementGazetteer]:
+    """
+    Get the offline settlement gazetteer, if one is configured.
+    
+    Loaded once per process. A missing or unreadable file is logged and
+    external geocoding goes to LocationIQ only.
+    
+    Returns:
+        SettlementGazetteer or None
+    """
+    path = get_settings().settlement_gazetteer_path
+    if not path:
+        return None
+    try:
+        return SettlementGazetteer.load(path)
+    except Exception as e:
+        logger.warning(f"Settlement gazetteer {path} not loaded, using LocationIQ only: {e}")
+        return None
+
+
+@lru_cache()
+def get_result_cache() -> Optional[ResultCache]:
+    """
+    Get the shared result cache singleton, None when no Redis URL is configured.
+    
+    Geocoding results are keyed by the live gazetteer version, so a refresh
+    invalidates them for every replica at once.
+    
+    Returns:
+        ResultCache or None
+    """
+    settings = get_settings()
+    if not settings.redis_url:
+        return None
+    client = redis.from_url(
+        settings.redis_url,
+        socket_timeout=settings.redis_timeout_seconds,
+        socket_connect_timeout=settings.redis_timeout_seconds
+    )
+    logger.info("Shared result cache configured")
+    return ResultCache(client, version=lambda: get_gazetteer().version)
+
+
 # ============================================================================
 # Repository Layer Dependencies
 # ============================================================================
 
+@lru_cache()
+def get_asyncpg_places_repository() -> AsyncpgPlacesRepository:
+    """
+    Get the asyncpg-backed repository singleton.
+    
+    Cached because it owns the connection pool (opened on first query).
+    
+    Returns:
+        AsyncpgPlacesRepository instance
+    """
+    settings = get_settings()
+    if not settings.database_url:
+        raise ValueError("DATABASE_URL is required when PLACES_BACKEND=asyncpg")
+    return AsyncpgPlacesRepository(
+        settings.database_url,
+        gazetteer=get_gazetteer(),
+        min_size=settings.db_pool_min_size,
+        max_size=settings.db_pool_max_size
+    )
+
+
 def get_places_repository() -> PlacesRepository:
     """
-    Get PlacesRepository instance.
+    Get PlacesRepository instance for the configured backend.
     
-    Creates new instance per request but reuses cached Supabase client.
-    Lightweight since repository is just a wrapper.
+    PostgREST: creates new instance per request but reuses cached Supabase
+    client and live gazetteer. Lightweight since repository is just a wrapper.
+    asyncpg: returns the pooled singleton.
     
     Returns:
         PlacesRepository instance
     """
+    if get_settings().places_backend == "asyncpg":
+        return get_asyncpg_places_repository()
+    
     client = get_supabase_client()
-    return PlacesRepository(client)
+    return PlacesRepository(client, gazetteer=get_gazetteer())
 
 
 # ============================================================================
@@ -68,7 +199,9 @@ def get_name_matcher() -> NameMatcher:
     return NameMatcher(
         places_repo=repo,
         threshold=settings.fuzzy_match_threshold,
-        prefer_lower_levels=settings.prefer_lower_admin_levels
+        prefer_lower_levels=settings.prefer_lower_admin_levels,
+        candidate_threshold=settings.suggestion_threshold,
+        max_candidates=settings.max_fuzzy_candidates
     )
 
 
@@ -84,7 +217,10 @@ def get_external_geocoder() -> ExternalGeocoder:
     return ExternalGeocoder(
         api_key=settings.locationiq_api_key,
         base_url=settings.locationiq_base_url,
-        cache_ttl_days=settings.cache_ttl_days
+        cache_ttl_days=settings.cache_ttl_days,
+        shared_cache=get_result_cache(),
+        settlements=get_settlement_gazetteer(),
+        settlement_threshold=settings.settlement_match_threshold
     )
 
 
@@ -119,7 +255,10 @@ def get_geocoding_service() -> GeocodingService:
     ├── NameMatcher
     │   └── PlacesRepository
     ├── ExternalGeocoder
-    └── DirectionalParser
+    │   ├── SettlementGazetteer (optional)
+    │   └── ResultCache (optional)
+    ├── DirectionalParser
+    └── ResultCache (optional)
     
     Returns:
         Fully initialized GeocodingService
@@ -133,10 +272,42 @@ def get_geocoding_service() -> GeocodingService:
         places_repo=repo,
         name_matcher=matcher,
         external_geocoder=geocoder,
-        directional_parser=parser
+        directional_parser=parser,
+        result_cache=get_result_cache(),
+        result_cache_ttl=get_settings().result_cache_ttl_seconds
     )
 
 
+@lru_cache()
+def get_shared_geocoding_service() -> GeocodingService:
+    """
+    Get a process-wide GeocodingService singleton.
+    
+    For embedding the geocoder in another long-lived process (the processing
+    worker): every caller shares one service, so the external geocoder cache
+    and any loaded indexes stay warm across jobs.
+    
+    Returns:
+        Cached GeocodingService
+    """
+    logger.info("Initializing shared geocoding service")
+    return get_geocoding_service()
+
+
+@lru_cache()
+def get_place_autocompleter() -> PlaceAutocompleter:
+    """
+    Get the autocomplete singleton.
+    
+    Cached because it holds the in-memory index; it rebuilds itself when
+    the live gazetteer refreshes.
+    
+    Returns:
+        PlaceAutocompleter instance
+    """
+    return PlaceAutocompleter(get_places_repository(), gazetteer=get_gazetteer())
+
+
 # ============================================================================
 # Lifespan Management (Optional - for cleanup)
 # ============================================================================
@@ -149,10 +320,30 @@ async def cleanup_services():
     """
     logger.info("Cleaning up services...")
     
+    refresher = get_gazetteer_refresher()
+    if refresher:
+        await refresher.stop()
+    result_cache = get_result_cache()
+    if result_cache:
+        await result_cache.close()
+    if get_asyncpg_places_repository.cache_info().currsize:
+        await get_asyncpg_places_repository().close()
+    
     # Clear caches
+    get_asyncpg_places_repository.cache_clear()
+    get_result_cache.cache_clear()
+    get_place_autocompleter.cache_clear()
+    get_settlement_gazetteer.cache_clear()
+    get_gazetteer_refresher.cache_clear()
+    get_gazetteer.cache_clear()
     get_settings.cache_clear()
     get_supabase_client.cache_clear()
+    snapshot = get_gazetteer_snapshot()
+    get_gazetteer_snapshot.cache_clear()
+    if snapshot:
+        snapshot.close()
     get_directional_parser.cache_clear()
+    get_shared_geocoding_service.cache_clear()
     
     # Note: Supabase client doesn't need explicit cleanup
     # httpx clients in ExternalGeocoder are context-managed
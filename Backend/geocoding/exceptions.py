@@ -48,3 +48,11 @@ class DatabaseError(GeocodingError):
 class ConfigurationError(GeocodingError):
     """Raised when configuration is invalid."""
     pass
+
+
+class DeadlineExceededError(GeocodingError):
+    """Raised when a request's time budget (GeocodeOptions.timeout_ms) runs out."""
+    
+    def __init__(self, stage: str):
+        self.stage = stage
+        super().__init__(f"Time budget exhausted during {stage}")
@@ -0,0 +1,21 @@
+"""
+Binary gazetteer snapshots: a compact, memory-mapped copy of the places table,
+kept current at runtime by an overlay of changed places. Plus an offline
+settlement gazetteer (GeoNames points) for names outside the places table.
+"""
+
+from .snapshot import GazetteerSnapshot, SnapshotFormatError
+from .builder import encode_snapshot, write_snapshot
+from .live import LiveGazetteer
+from .refresher import GazetteerRefresher
+from .settlements import SettlementGazetteer
+
+__all__ = [
+    'GazetteerSnapshot',
+    'SnapshotFormatError',
+    'encode_snapshot',
+    'write_snapshot',
+    'LiveGazetteer',
+    'GazetteerRefresher',
+    'SettlementGazetteer',
+]
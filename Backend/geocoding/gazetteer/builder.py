@@ -0,0 +1,145 @@
+"""
+Gazetteer Snapshot Builder
+
+Exports the places table into the binary snapshot format (see format.py):
+
+    python -m geocoding.gazetteer.builder --out gazetteer.bin
+"""
+
+import argparse
+import logging
+import math
+import os
+import tempfile
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+from uuid import UUID
+
+from .format import (
+    MAGIC, FORMAT_VERSION, HEADER, SECTIONS, SECTION_ENTRY, DATA_START, aligned
+)
+
+logger = logging.getLogger(__name__)
+
+EXPORT_PAGE_SIZE = 1000
+
+
+def encode_snapshot(places: Iterable[Dict[str, Any]], source_version: int = 0) -> bytes:
+    """
+    Serialize place rows into snapshot bytes.
+
+    Each row needs id, name, parent_id and hierarchy_level; min_lon/min_lat/
+    max_lon/max_lat and polygon_wkb (hex string or bytes) are optional.
+    Parents missing from the input are stored as -1.
+    """
+    rows = sorted(places, key=lambda p: UUID(str(p["id"])).bytes)
+    index = {UUID(str(p["id"])): i for i, p in enumerate(rows)}
+
+    ids = bytearray()
+    names = bytearray()
+    name_offsets = array("I", [0])
+    parents = array("i")
+    levels = array("i")
+    bboxes = array("f")
+    wkb = bytearray()
+    wkb_offsets = array("Q", [0])
+
+    for row in rows:
+        ids += UUID(str(row["id"])).bytes
+        names += (row.get("name") or "").encode("utf-8")
+        name_offsets.append(len(names))
+        parent = row.get("parent_id")
+        parents.append(index.get(UUID(str(parent)), -1) if parent else -1)
+        levels.append(row.get("hierarchy_level") or 0)
+
+        box = [row.get(k) for k in ("min_lon", "min_lat", "max_lon", "max_lat")]
+        bboxes.extend(box if None not in box else [math.nan] * 4)
+
+        blob = row.get("polygon_wkb") or b""
+        wkb += bytes.fromhex(blob) if isinstance(blob, str) else blob
+        wkb_offsets.append(len(wkb))
+
+    sections = {
+        "ids": bytes(ids),
+        "name_offsets": name_offsets.tobytes(),
+        "names": bytes(names),
+        "parents": parents.tobytes(),
+        "levels": levels.tobytes(),
+        "bboxes": bboxes.tobytes(),
+        "wkb_offsets": wkb_offsets.tobytes(),
+        "wkb": bytes(wkb),
+    }
+
+    out = bytearray(DATA_START)
+    table = []
+    for name in SECTIONS:
+        data = sections[name]
+        out += bytes(aligned(len(out)) - len(out))
+        table.append((len(out), len(data)))
+        out += data
+
+    HEADER.pack_into(out, 0, MAGIC, FORMAT_VERSION, len(rows), time.time(), source_version)
+    for i, (offset, length) in enumerate(table):
+        SECTION_ENTRY.pack_into(out, HEADER.size + i * SECTION_ENTRY.size, offset, length)
+    return bytes(out)
+
+
+def write_snapshot(places: Iterable[Dict[str, Any]], path: str, source_version: int = 0) -> int:
+    """
+    Write a snapshot atomically (temp file + rename), so processes mapping the
+    old file keep a consistent view. Returns the number of places written.
+    """
+    data = encode_snapshot(places, source_version)
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".gazetteer-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+    return HEADER.unpack_from(data, 0)[2]
+
+
+def export_places(client, page_size: int = EXPORT_PAGE_SIZE) -> List[Dict[str, Any]]:
+    """Page through export_places_snapshot (db_queries.sql) ordered by id"""
+    places: List[Dict[str, Any]] = []
+    after_id: Optional[str] = None
+    while True:
+        result = client.rpc(
+            'export_places_snapshot',
+            {'after_id': after_id, 'page_size': page_size}
+        ).execute()
+        page = result.data if isinstance(result.data, list) else []
+        places.extend(page)
+        if len(page) < page_size:
+            return places
+        after_id = page[-1]["id"]
+
+
+def main(argv: Optional[List[str]] = None):
+    from ..dependencies import get_supabase_client
+
+    parser = argparse.ArgumentParser(description="Export the places table into a binary gazetteer snapshot")
+    parser.add_argument("--out", required=True, help="Snapshot file to write")
+    parser.add_argument("--page-size", type=int, default=EXPORT_PAGE_SIZE, help="Rows fetched per request")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    start = time.perf_counter()
+    # Taken before the export, so rows updated while it runs count as newer than the snapshot
+    source_version = int(time.time() * 1000)
+    places = export_places(get_supabase_client(), args.page_size)
+    count = write_snapshot(places, args.out, source_version)
+    logger.info(
+        f"Wrote {count} places to {args.out} ({os.path.getsize(args.out) / 1e6:.1f} MB) "
+        f"in {time.perf_counter() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""
+Binary gazetteer snapshot format (version 1).
+
+All integers are little-endian. The file is a fixed header, a section table and
+the sections themselves, each starting on an 8-byte boundary:
+
+    header      MAGIC (8s) | format version (u32) | place count (u32) |
+                built_at epoch seconds (f64) | source version (i64, places.updated_at
+                watermark in epoch milliseconds)
+    table       SECTION_COUNT x (offset u64, length u64), in SECTIONS order
+
+    ids          count x 16 bytes   UUIDs, sorted ascending (binary search by id)
+    name_offsets (count + 1) x u32  offsets into names
+    names        UTF-8 string table
+    parents      count x i32        index of the parent place, -1 for none
+    levels       count x i32        hierarchy_level
+    bboxes       count x 4 f32      min_lon, min_lat, max_lon, max_lat (NaN without polygon)
+    wkb_offsets  (count + 1) x u64  offsets into wkb
+    wkb          polygon WKB blobs (empty for places without polygon)
+"""
+
+import struct
+
+MAGIC = b"REACHGAZ"
+FORMAT_VERSION = 1
+
+HEADER = struct.Struct("<8sIIdq")
+SECTIONS = ("ids", "name_offsets", "names", "parents", "levels", "bboxes", "wkb_offsets", "wkb")
+SECTION_ENTRY = struct.Struct("<QQ")
+SECTION_TABLE_SIZE = SECTION_ENTRY.size * len(SECTIONS)
+DATA_START = HEADER.size + SECTION_TABLE_SIZE
+
+UUID_SIZE = 16
+ALIGNMENT = 8
+
+
+def aligned(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
@@ -0,0 +1,177 @@
+import logging
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from uuid import UUID
+
+from .snapshot import GazetteerSnapshot
+
+logger = logging.getLogger(__name__)
+
+ROW_FIELDS = ("id", "name", "hierarchy_level", "parent_id", "parent_name")
+
+
+def _key(place_id: Any) -> Optional[str]:
+    try:
+        return str(place_id if isinstance(place_id, UUID) else UUID(str(place_id)))
+    except ValueError:
+        return None
+
+
+class _GazetteerState:
+    """
+    One immutable generation of the gazetteer: the mapped snapshot plus an
+    overlay of places changed since it was built (None marks a deletion).
+    Readers take a reference once and never see a half-applied refresh.
+    """
+
+    def __init__(self, base: Optional[GazetteerSnapshot], overlay: Dict[str, Optional[Dict[str, Any]]], version: int):
+        self.base = base
+        self.overlay = overlay
+        self.version = version
+
+        # Hierarchy adjustments: overlay children per parent, and the number of
+        # snapshot children per parent that the overlay moved away or deleted
+        self.added_to: Dict[str, List[Dict[str, Any]]] = {}
+        self.removed_from: Dict[str, int] = {}
+        for place_id, row in overlay.items():
+            if row is not None and row.get("parent_id"):
+                self.added_to.setdefault(row["parent_id"], []).append(row)
+            old = base.get(place_id) if base else None
+            if old and old["parent_id"]:
+                self.removed_from[old["parent_id"]] = self.removed_from.get(old["parent_id"], 0) + 1
+
+    def fresh(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        """Snapshot row with its parent name taken from the overlay when the parent changed"""
+        parent = self.overlay.get(row["parent_id"]) if row["parent_id"] else None
+        return {**row, "parent_name": parent["name"]} if parent else row
+
+
+class LiveGazetteer:
+    """
+    Gazetteer that stays current without a restart.
+
+    Serves lookups from a memory-mapped snapshot (if any) with an overlay of
+    changed places on top. GazetteerRefresher feeds changes through apply(),
+    which builds a new state and swaps it in with one reference assignment
+    (copy-on-write), so lookups never lock.
+
+    version is the places.updated_at watermark (epoch ms) the data reflects;
+    include it in cache keys to invalidate cached results after a refresh.
+    Without a snapshot only the version is maintained (from 0, so every
+    replica derives the same value) and lookups return None.
+    """
+
+    def __init__(self, snapshot: Optional[GazetteerSnapshot] = None, version: Optional[int] = None):
+        if version is None:
+            version = snapshot.source_version if snapshot else 0
+        self._state = _GazetteerState(snapshot, {}, version)
+        self._write_lock = threading.Lock()
+        self._listeners: List[Callable[[int], None]] = []
+
+    @property
+    def version(self) -> int:
+        return self._state.version
+
+    @property
+    def has_snapshot(self) -> bool:
+        return self._state.base is not None
+
+    @property
+    def overlay_size(self) -> int:
+        return len(self._state.overlay)
+
+    def subscribe(self, listener: Callable[[int], None]):
+        """Call listener(version) after every refresh that changed data or advanced the version"""
+        self._listeners.append(listener)
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def apply(self, changes: Iterable[Dict[str, Any]], version: int) -> int:
+        """
+        Apply changed places (rows from places_changed_since; deleted=True for
+        removals) and advance the version. Returns the number of places whose
+        data actually changed.
+        """
+        with self._write_lock:
+            current = self._state
+            overlay = dict(current.overlay)
+            changed = 0
+            for change in changes:
+                place_id = _key(change.get("id"))
+                if place_id is None:
+                    continue
+                row = None if change.get("deleted") else {
+                    field: (str(change[field]) if field == "parent_id" and change.get(field) else change.get(field))
+                    for field in ROW_FIELDS
+                }
+                if row is not None:
+                    row["id"] = place_id
+                if place_id in overlay:
+                    if overlay[place_id] == row:
+                        continue
+                elif row == (current.base.get(place_id) if current.base else None):
+                    continue
+                overlay[place_id] = row
+                changed += 1
+
+            if not changed and version <= current.version:
+                return 0
+            self._state = _GazetteerState(current.base, overlay, max(version, current.version))
+
+        # Without a snapshot nothing is overlaid, but a new version still means places changed
+        logger.info(f"Gazetteer refreshed: {changed} places changed, version {self._state.version}")
+        for listener in self._listeners:
+            try:
+                listener(self._state.version)
+            except Exception as e:
+                logger.warning(f"Gazetteer listener failed: {e}")
+        return changed
+
+    # ------------------------------------------------------------------
+    # Lookups (same interface as GazetteerSnapshot)
+    # ------------------------------------------------------------------
+
+    def get(self, place_id: Any) -> Optional[Dict[str, Any]]:
+        state = self._state
+        key = _key(place_id)
+        if state.base is None or key is None:
+            return None
+        if key in state.overlay:
+            return state.overlay[key]
+        row = state.base.get(key)
+        return state.fresh(row) if row else None
+
+    def get_many(self, place_ids: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+        rows = {}
+        for place_id in place_ids:
+            row = self.get(place_id)
+            if row:
+                rows[row["id"]] = row
+        return rows
+
+    def child_count(self, place_id: Any) -> Optional[int]:
+        state = self._state
+        key = _key(place_id)
+        if state.base is None or key is None:
+            return None
+        count = state.base.child_count(key)
+        if count is None and key not in state.overlay:
+            return None
+        return (count or 0) - state.removed_from.get(key, 0) + len(state.added_to.get(key, ()))
+
+    def children(self, place_id: Any, level: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        state = self._state
+        key = _key(place_id)
+        if state.base is None or key is None:
+            return None
+        base_children = state.base.children(key, level)
+        if base_children is None and key not in state.overlay:
+            return None
+        children = [state.fresh(row) for row in base_children or [] if row["id"] not in state.overlay]
+        children += [
+            row for row in state.added_to.get(key, ())
+            if level is None or row["hierarchy_level"] == level
+        ]
+        return children
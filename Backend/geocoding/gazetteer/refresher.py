@@ -0,0 +1,97 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from .live import LiveGazetteer
+
+logger = logging.getLogger(__name__)
+
+CHANGES_PAGE_SIZE = 1000
+
+
+def _epoch_ms(value: str) -> int:
+    return int(datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() * 1000)
+
+
+class GazetteerRefresher:
+    """
+    Background task that polls places.updated_at (and deletion tombstones) past
+    the gazetteer's version watermark and applies the changed places to the
+    live gazetteer. Polls run in a worker thread (the Supabase client is sync)
+    so they never block the event loop they are scheduled on.
+    """
+
+    def __init__(self, supabase_client, gazetteer: LiveGazetteer, interval_seconds: float = 60,
+                 page_size: int = CHANGES_PAGE_SIZE):
+        self.client = supabase_client
+        self.gazetteer = gazetteer
+        self.interval_seconds = interval_seconds
+        self.page_size = page_size
+        self._task: Optional[asyncio.Task] = None
+
+    async def fetch_changes(self) -> List[Dict[str, Any]]:
+        """All places changed at or after the current version, in (updated_at, id) order"""
+        since = datetime.fromtimestamp(self.gazetteer.version / 1000, tz=timezone.utc).isoformat()
+        after_id: Optional[str] = None
+        changes: List[Dict[str, Any]] = []
+        while True:
+            result = await asyncio.to_thread(self.client.rpc(
+                'places_changed_since',
+                {'since': since, 'after_id': after_id, 'page_size': self.page_size}
+            ).execute)
+            page = result.data if isinstance(result.data, list) else []
+            changes.extend(page)
+            if len(page) < self.page_size:
+                return changes
+            since, after_id = page[-1]["updated_at"], page[-1]["id"]
+
+    async def fetch_version(self) -> Optional[int]:
+        """Latest places watermark in epoch ms (None for an empty table)"""
+        result = await asyncio.to_thread(self.client.rpc('gazetteer_version', {}).execute)
+        return _epoch_ms(result.data) if isinstance(result.data, str) else None
+
+    async def refresh_once(self) -> int:
+        """Poll once; returns the number of places that changed"""
+        if not self.gazetteer.has_snapshot:
+            # Nothing to overlay: only track the version for cache keys
+            version = await self.fetch_version()
+            if version is not None:
+                self.gazetteer.apply([], version)
+            return 0
+        changes = await self.fetch_changes()
+        if not changes:
+            return 0
+        version = max(_epoch_ms(change["updated_at"]) for change in changes)
+        return self.gazetteer.apply(changes, version)
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh_once()
+            except Exception as e:
+                # Keep serving the current generation; the next poll retries from the same watermark
+                logger.warning(f"Gazetteer refresh failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> bool:
+        """Start polling on the running event loop (no-op if already started or no loop is running)"""
+        if self._task and not self._task.done():
+            return True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            logger.warning("Gazetteer refresher not started: no running event loop")
+            return False
+        self._task = loop.create_task(self.run())
+        logger.info(f"Gazetteer refresher polling every {self.interval_seconds}s from version {self.gazetteer.version}")
+        return True
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
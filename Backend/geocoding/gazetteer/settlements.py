@@ -0,0 +1,221 @@
+"""
+Offline settlement gazetteer: villages, towns and landmarks from a GeoNames
+country dump, searchable by fuzzy name and by location without a network call.
+
+Download a country file (e.g. PK.zip) from https://download.geonames.org/export/dump/
+and point SETTLEMENT_GAZETTEER_PATH at it; the zip or the extracted PK.txt both load.
+Rows are tab-separated: geonameid, name, asciiname, alternatenames, latitude,
+longitude, feature class, feature code, country code, ..., population, ...
+"""
+
+import io
+import logging
+import math
+import unicodedata
+import zipfile
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from rapidfuzz import fuzz, process
+
+logger = logging.getLogger(__name__)
+
+# GeoNames dump columns used
+NAME, ASCII_NAME, ALTERNATE_NAMES, LATITUDE, LONGITUDE = 1, 2, 3, 4, 5
+FEATURE_CLASS, FEATURE_CODE, COUNTRY_CODE, POPULATION = 6, 7, 8, 14
+
+# Populated places, spots/buildings, areas and terrain (passes, peaks)
+DEFAULT_FEATURE_CLASSES = ("P", "S", "L", "T")
+
+# Spatial grid cell size in degrees (~11 km)
+GRID_CELL_DEGREES = 0.1
+
+# Results closer than this are the same settlement listed twice (e.g. a town and its bazaar)
+DUPLICATE_DISTANCE_KM = 2.0
+
+EARTH_RADIUS_KM = 6371.0
+
+
+def normalize_name(name: str) -> str:
+    """Casefold, strip diacritics and collapse whitespace and punctuation"""
+    decomposed = unicodedata.normalize("NFKD", name.casefold())
+    cleaned = "".join(
+        " " if unicodedata.category(ch)[0] in "PZ" else ch
+        for ch in decomposed if not unicodedata.combining(ch)
+    )
+    return " ".join(cleaned.split())
+
+
+def distance_km(lon1: float, lat1: float, lon2: float, lat2: float) -> float:
+    """Great-circle (haversine) distance"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    a = (math.sin((phi2 - phi1) / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(math.radians(lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+def _cell(lon: float, lat: float) -> Tuple[int, int]:
+    return math.floor(lon / GRID_CELL_DEGREES), math.floor(lat / GRID_CELL_DEGREES)
+
+
+def read_geonames(path: str) -> Iterator[List[str]]:
+    """Rows of a GeoNames dump (.txt, or the .zip it is distributed as)"""
+    if path.endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            member = next(
+                name for name in archive.namelist()
+                if name.endswith(".txt") and not name.startswith("readme")
+            )
+            with archive.open(member) as raw:
+                yield from (line.rstrip("\n").split("\t") for line in io.TextIOWrapper(raw, encoding="utf-8"))
+    else:
+        with open(path, encoding="utf-8") as f:
+            yield from (line.rstrip("\n").split("\t") for line in f)
+
+
+class SettlementGazetteer:
+    """
+    In-memory point gazetteer for names the places table does not cover.
+
+    Indexes:
+    - every normalized name and alternate name -> settlements (exact lookups)
+    - the distinct names sorted by length, so a fuzzy search only scores names
+      whose length can reach the threshold (rapidfuzz ratio is bounded by
+      2 * min(len) / (len1 + len2))
+    - a grid of GRID_CELL_DEGREES cells for radius searches
+
+    search() ranks exact matches first, then by similarity and population.
+    """
+
+    def __init__(self, rows: Iterable[List[str]], feature_classes: Iterable[str] = DEFAULT_FEATURE_CLASSES):
+        classes = set(feature_classes)
+        self.names: List[str] = []
+        self.lons: List[float] = []
+        self.lats: List[float] = []
+        self.populations: List[int] = []
+        self.feature_codes: List[str] = []
+        self.countries = set()
+        self._by_name: Dict[str, List[int]] = {}
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+
+        for row in rows:
+            if len(row) <= POPULATION or row[FEATURE_CLASS] not in classes:
+                continue
+            try:
+                lat, lon = float(row[LATITUDE]), float(row[LONGITUDE])
+            except ValueError:
+                continue
+            index = len(self.names)
+            self.names.append(row[NAME])
+            self.lons.append(lon)
+            self.lats.append(lat)
+            self.populations.append(int(row[POPULATION] or 0))
+            self.feature_codes.append(row[FEATURE_CODE])
+            self.countries.add(row[COUNTRY_CODE].lower())
+            self._grid.setdefault(_cell(lon, lat), []).append(index)
+
+            aliases = {row[NAME], row[ASCII_NAME], *row[ALTERNATE_NAMES].split(",")}
+            for key in {normalize_name(alias) for alias in aliases}:
+                if key:
+                    self._by_name.setdefault(key, []).append(index)
+
+        self._choices = sorted(self._by_name, key=len)
+        self._choice_lengths = [len(choice) for choice in self._choices]
+
+    @classmethod
+    def load(cls, path: str, feature_classes: Iterable[str] = DEFAULT_FEATURE_CLASSES) -> "SettlementGazetteer":
+        gazetteer = cls(read_geonames(path), feature_classes)
+        logger.info(
+            f"Settlement gazetteer loaded from {path}: {len(gazetteer)} settlements, "
+            f"{len(gazetteer._choices)} names"
+        )
+        return gazetteer
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def covers(self, country_code: str) -> bool:
+        return country_code.lower() in self.countries
+
+    def _settlement(self, index: int, **extra) -> Dict:
+        return {
+            "name": self.names[index],
+            "lon": self.lons[index],
+            "lat": self.lats[index],
+            "population": self.populations[index],
+            "feature_code": self.feature_codes[index],
+            **extra,
+        }
+
+    def search(self, name: str, threshold: float = 0.9, limit: int = 5) -> List[Dict]:
+        """
+        Settlements whose name or alternate name matches.
+
+        Args:
+            name: Name to look up
+            threshold: Minimum similarity (0-1) for fuzzy matches
+            limit: Maximum number of settlements returned
+
+        Returns:
+            Settlement dicts (name, lon, lat, population, feature_code, score),
+            best first, with near-duplicate points collapsed
+        """
+        key = normalize_name(name)
+        if not key:
+            return []
+
+        if key in self._by_name:
+            scored = [(1.0, index) for index in self._by_name[key]]
+        else:
+            # Only names of compatible length can reach the threshold
+            cutoff = threshold * 100
+            low = bisect_left(self._choice_lengths, math.ceil(len(key) * threshold / (2 - threshold) - 1e-9))
+            high = bisect_right(self._choice_lengths, math.floor(len(key) * (2 - threshold) / threshold + 1e-9))
+            matches = process.extract(
+                key, self._choices[low:high], scorer=fuzz.ratio, score_cutoff=cutoff, limit=limit * 2
+            )
+            scored = [
+                (score / 100, index)
+                for choice, score, _ in matches
+                for index in self._by_name[choice]
+            ]
+
+        scored.sort(key=lambda item: (-item[0], -self.populations[item[1]]))
+        results: List[Dict] = []
+        for score, index in scored:
+            if any(
+                distance_km(self.lons[index], self.lats[index], kept["lon"], kept["lat"]) < DUPLICATE_DISTANCE_KM
+                for kept in results
+            ):
+                continue
+            results.append(self._settlement(index, score=score))
+            if len(results) == limit:
+                break
+        return results
+
+    def geocode(self, name: str, threshold: float = 0.9, limit: int = 5) -> List[Tuple[float, float]]:
+        """(lon, lat) of matching settlements, best first (ExternalGeocoder.geocode format)"""
+        return [(s["lon"], s["lat"]) for s in self.search(name, threshold, limit)]
+
+    def nearby(self, lon: float, lat: float, radius_km: float = 10.0, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Settlements within radius_km of a point, nearest first.
+
+        Returns:
+            Settlement dicts with a distance_km field instead of score
+        """
+        # Degrees of longitude shrink with latitude; widen the cell range to match
+        lat_cells = math.ceil(radius_km / (111.0 * GRID_CELL_DEGREES))
+        lon_cells = math.ceil(lat_cells / max(math.cos(math.radians(lat)), 0.01))
+        cx, cy = _cell(lon, lat)
+
+        found = []
+        for x in range(cx - lon_cells, cx + lon_cells + 1):
+            for y in range(cy - lat_cells, cy + lat_cells + 1):
+                for index in self._grid.get((x, y), ()):
+                    dist = distance_km(lon, lat, self.lons[index], self.lats[index])
+                    if dist <= radius_km:
+                        found.append((dist, index))
+
+        found.sort()
+        return [self._settlement(index, distance_km=dist) for dist, index in found[:limit]]
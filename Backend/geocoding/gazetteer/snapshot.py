@@ -0,0 +1,197 @@
+import mmap
+import sys
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from uuid import UUID
+import logging
+
+from .format import (
+    MAGIC, FORMAT_VERSION, HEADER, SECTIONS, SECTION_ENTRY, UUID_SIZE
+)
+
+logger = logging.getLogger(__name__)
+
+
+class SnapshotFormatError(Exception):
+    """Raised when a file is not a readable gazetteer snapshot"""
+    pass
+
+
+class GazetteerSnapshot:
+    """
+    Read-only, memory-mapped gazetteer snapshot.
+
+    Sections are exposed as typed memoryviews over the mapping, so lookups read
+    straight from the page cache: nothing is copied into Python dicts at load time,
+    and several processes mapping the same file share one copy in memory.
+
+    Places are addressed by index (their position in the id-sorted table);
+    id lookups are a binary search over the 16-byte UUIDs.
+    """
+
+    def __init__(self, buffer, path: Optional[str] = None, _file=None):
+        if sys.byteorder != "little":
+            raise SnapshotFormatError("Gazetteer snapshots can only be mapped on little-endian hosts")
+
+        self.path = path
+        self._file = _file
+        self._buffer = buffer
+        view = memoryview(buffer)
+        if len(view) < HEADER.size:
+            raise SnapshotFormatError("File too small for a gazetteer snapshot")
+
+        magic, version, count, built_at, source_version = HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise SnapshotFormatError("Not a gazetteer snapshot (bad magic)")
+        if version != FORMAT_VERSION:
+            raise SnapshotFormatError(f"Unsupported snapshot format version {version}")
+
+        self.count = count
+        self.built_at = built_at
+        self.source_version = source_version
+
+        sections = {}
+        for i, name in enumerate(SECTIONS):
+            offset, length = SECTION_ENTRY.unpack_from(view, HEADER.size + i * SECTION_ENTRY.size)
+            if offset + length > len(view):
+                raise SnapshotFormatError(f"Section '{name}' extends past the end of the file")
+            sections[name] = view[offset:offset + length]
+
+        self._ids = sections["ids"]
+        self._name_offsets = sections["name_offsets"].cast("I")
+        self._names = sections["names"]
+        self._parents = sections["parents"].cast("i")
+        self._levels = sections["levels"].cast("i")
+        self._bboxes = sections["bboxes"].cast("f")
+        self._wkb_offsets = sections["wkb_offsets"].cast("Q")
+        self._wkb = sections["wkb"]
+        self._child_counts: Optional[array] = None
+
+        if len(self._ids) != count * UUID_SIZE or len(self._levels) != count:
+            raise SnapshotFormatError("Section sizes do not match the place count")
+
+    @classmethod
+    def open(cls, path: str) -> "GazetteerSnapshot":
+        """Memory-map a snapshot file read-only"""
+        f = open(path, "rb")
+        try:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            snapshot = cls(mapping, path=path, _file=f)
+        except Exception:
+            f.close()
+            raise
+        logger.info(f"Mapped gazetteer snapshot {path}: {snapshot.count} places, version {snapshot.source_version}")
+        return snapshot
+
+    def close(self):
+        """Release the mapping (views handed out earlier must not be used afterwards)"""
+        for view in (self._ids, self._name_offsets, self._names, self._parents,
+                     self._levels, self._bboxes, self._wkb_offsets, self._wkb):
+            view.release()
+        if isinstance(self._buffer, mmap.mmap):
+            self._buffer.close()
+        if self._file:
+            self._file.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    # ------------------------------------------------------------------
+    # Field access by index
+    # ------------------------------------------------------------------
+
+    def id_bytes(self, index: int) -> bytes:
+        return bytes(self._ids[index * UUID_SIZE:(index + 1) * UUID_SIZE])
+
+    def id(self, index: int) -> UUID:
+        return UUID(bytes=self.id_bytes(index))
+
+    def name(self, index: int) -> str:
+        return bytes(self._names[self._name_offsets[index]:self._name_offsets[index + 1]]).decode("utf-8")
+
+    def parent(self, index: int) -> Optional[int]:
+        parent = self._parents[index]
+        return None if parent < 0 else parent
+
+    def level(self, index: int) -> int:
+        return self._levels[index]
+
+    def bbox(self, index: int) -> Optional[Tuple[float, float, float, float]]:
+        box = tuple(self._bboxes[index * 4:index * 4 + 4])
+        return None if box[0] != box[0] else box  # NaN marks a place without polygon
+
+    def wkb(self, index: int) -> memoryview:
+        """Polygon WKB as a zero-copy view (empty when the place has no polygon)"""
+        return self._wkb[self._wkb_offsets[index]:self._wkb_offsets[index + 1]]
+
+    # ------------------------------------------------------------------
+    # Lookups
+    # ------------------------------------------------------------------
+
+    def index_of(self, place_id: Any) -> Optional[int]:
+        """Index of a place by UUID (or UUID string), None if absent"""
+        try:
+            key = (place_id if isinstance(place_id, UUID) else UUID(str(place_id))).bytes
+        except ValueError:
+            return None
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            current = self._ids[mid * UUID_SIZE:(mid + 1) * UUID_SIZE]
+            if current == key:
+                return mid
+            if bytes(current) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return None
+
+    def row(self, index: int) -> Dict[str, Any]:
+        """Place as a dict shaped like a places table row (without polygon)"""
+        parent = self.parent(index)
+        return {
+            "id": str(self.id(index)),
+            "name": self.name(index),
+            "hierarchy_level": self.level(index),
+            "parent_id": str(self.id(parent)) if parent is not None else None,
+            "parent_name": self.name(parent) if parent is not None else None,
+        }
+
+    def get(self, place_id: Any) -> Optional[Dict[str, Any]]:
+        index = self.index_of(place_id)
+        return self.row(index) if index is not None else None
+
+    def get_many(self, place_ids: Iterable[Any]) -> Dict[str, Dict[str, Any]]:
+        """Rows for every id present in the snapshot, keyed by id string"""
+        rows = {}
+        for place_id in place_ids:
+            index = self.index_of(place_id)
+            if index is not None:
+                row = self.row(index)
+                rows[row["id"]] = row
+        return rows
+
+    def child_counts(self) -> array:
+        """Direct child count per place index (computed once, 4 bytes per place)"""
+        if self._child_counts is None:
+            counts = array("i", bytes(4 * self.count))
+            for parent in self._parents:
+                if parent >= 0:
+                    counts[parent] += 1
+            self._child_counts = counts
+        return self._child_counts
+
+    def child_count(self, place_id: Any) -> Optional[int]:
+        """Direct child count of a place, None if the place is not in the snapshot"""
+        index = self.index_of(place_id)
+        return self.child_counts()[index] if index is not None else None
+
+    def children(self, place_id: Any, level: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+        """Direct children of a place, None if the place is not in the snapshot"""
+        parent = self.index_of(place_id)
+        if parent is None:
+            return None
+        return [
+            self.row(i) for i in range(self.count)
+            if self._parents[i] == parent and (level is None or self._levels[i] == level)
+        ]
@@ -6,6 +6,10 @@ class GeocodeOptions(BaseModel):
     """Options for customizing geocoding behavior"""
     prefer_lower_admin_levels: bool = True
     include_confidence_scores: bool = False
+    timeout_ms: Optional[int] = Field(
+        default=None, ge=1,
+        description="Time budget for the whole request; locations not resolved in time come back with timed_out=true"
+    )
 
 class GeocodeRequest(BaseModel):
     """Request model for geocoding locations"""
@@ -26,7 +30,21 @@ class GeocodeResult(BaseModel):
     regions_processed: Optional[List[str]] = None
     direction: Optional[str] = None
     error: Optional[str] = None
+    timed_out: bool = False
 
 class GeocodeResponse(BaseModel):
     results: List[GeocodeResult]
-    errors: List[str] = []
\ No newline at end of file
+    errors: List[str] = []
+
+class AutocompleteSuggestion(BaseModel):
+    id: UUID
+    name: str
+    hierarchy_level: int
+    parent_name: Optional[str] = None
+    province_id: Optional[UUID] = None
+    match_type: Literal["exact", "prefix", "alias", "token"]
+    matched: str = Field(..., description="Normalized name, alias or trailing words that matched the query")
+
+class AutocompleteResponse(BaseModel):
+    query: str
+    suggestions: List[AutocompleteSuggestion]
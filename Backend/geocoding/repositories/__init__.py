@@ -3,5 +3,6 @@ Repository layer for database access.
 """
 
 from .places_repository import PlacesRepository
+from .asyncpg_repository import AsyncpgPlacesRepository
 
-__all__ = ['PlacesRepository']
+__all__ = ['PlacesRepository', 'AsyncpgPlacesRepository']
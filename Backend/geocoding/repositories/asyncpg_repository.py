@@ -0,0 +1,243 @@
+from typing import List, Optional, Dict, Any
+from uuid import UUID
+import asyncio
+import logging
+
+import asyncpg
+
+from .places_repository import PlacesRepository
+from ..gazetteer import LiveGazetteer
+
+logger = logging.getLogger(__name__)
+
+PLACE_COLUMNS = "id, name, parent_id, parent_name, hierarchy_level"
+
+# Prepared on every new pool connection; asyncpg's statement cache then reuses
+# the server-side statement for each call with the same SQL text
+STATEMENTS = {
+    "fuzzy": (
+        "SELECT id, name, hierarchy_level, similarity_score "
+        "FROM search_places_fuzzy($1::text, $2::real, $3::int)"
+    ),
+    "point": "SELECT id, name, hierarchy_level, province_id FROM find_place_by_point($1::float8, $2::float8)",
+    "direction": "SELECT id, name, hierarchy_level, parent_id FROM find_places_in_direction($1::uuid[], $2::text)",
+    "by_id": f"SELECT {PLACE_COLUMNS} FROM places WHERE id = $1::uuid",
+    "by_ids": f"SELECT {PLACE_COLUMNS} FROM places WHERE id = ANY($1::uuid[])",
+    "children": (
+        f"SELECT {PLACE_COLUMNS} FROM places "
+        "WHERE parent_id = $1::uuid AND ($2::int IS NULL OR hierarchy_level = $2::int)"
+    ),
+    "centroids": (
+        "SELECT id, centroid_lon, centroid_lat, province_id FROM places "
+        "WHERE id = ANY($1::uuid[]) AND centroid_lon IS NOT NULL"
+    ),
+    "all_places": f"SELECT {PLACE_COLUMNS} FROM places",
+    "aliases": "SELECT place_id, alias FROM place_aliases",
+    "children_counts": (
+        "SELECT parent_id, count(*)::int AS children FROM places "
+        "WHERE parent_id = ANY($1::uuid[]) GROUP BY parent_id"
+    ),
+}
+
+
+def _row(record) -> Dict[str, Any]:
+    """Record as a dict shaped like a PostgREST row (UUIDs as strings)"""
+    return {key: (str(value) if isinstance(value, UUID) else value) for key, value in record.items()}
+
+
+def _uuids(ids: List[Any]) -> List[UUID]:
+    return [pid if isinstance(pid, UUID) else UUID(str(pid)) for pid in ids]
+
+
+class AsyncpgPlacesRepository(PlacesRepository):
+    """
+    PlacesRepository backend that talks to Postgres directly over an asyncpg
+    pool instead of PostgREST: binary protocol (UUIDs decoded natively, no JSON
+    round trip) and statements prepared once per connection.
+
+    Needs a direct or session-mode connection string; transaction-mode poolers
+    (pgbouncer, Supabase port 6543) do not keep prepared statements.
+    """
+
+    def __init__(
+        self,
+        dsn: Optional[str] = None,
+        gazetteer: Optional[LiveGazetteer] = None,
+        min_size: int = 1,
+        max_size: int = 10,
+        pool=None
+    ):
+        super().__init__(None, gazetteer=gazetteer)
+        self.dsn = dsn
+        self.min_size = min_size
+        self.max_size = max_size
+        self._pool = pool
+        self._pool_lock = asyncio.Lock()
+
+    @staticmethod
+    async def _prepare_statements(connection):
+        for sql in STATEMENTS.values():
+            await connection.prepare(sql)
+
+    async def _get_pool(self):
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    self._pool = await asyncpg.create_pool(
+                        self.dsn,
+                        min_size=self.min_size,
+                        max_size=self.max_size,
+                        init=self._prepare_statements
+                    )
+                    logger.info(f"asyncpg pool ready ({self.min_size}-{self.max_size} connections)")
+        return self._pool
+
+    async def _fetch(self, statement: str, *args) -> List[Dict[str, Any]]:
+        pool = await self._get_pool()
+        async with pool.acquire() as connection:
+            return [_row(record) for record in await connection.fetch(STATEMENTS[statement], *args)]
+
+    async def close(self):
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+    async def search_by_fuzzy_name(
+        self,
+        name: str,
+        threshold: float = 0.85,
+        max_results: int = 10
+    ) -> List[Dict[str, Any]]:
+        try:
+            return await self._fetch("fuzzy", name, threshold, max_results)
+        except Exception as e:
+            logger.error(f"Fuzzy search failed for '{name}': {e}")
+            return []
+
+    async def find_by_coordinates(
+        self,
+        longitude: float,
+        latitude: float
+    ) -> Optional[Dict[str, Any]]:
+        try:
+            rows = await self._fetch("point", longitude, latitude)
+            return rows[0] if rows else None
+        except Exception as e:
+            logger.error(f"Point lookup failed for ({longitude}, {latitude}): {e}")
+            return None
+
+    async def get_by_id(self, place_id: UUID) -> Optional[Dict[str, Any]]:
+        if self.gazetteer:
+            place = self.gazetteer.get(place_id)
+            if place:
+                return place
+
+        try:
+            rows = await self._fetch("by_id", _uuids([place_id])[0])
+            return rows[0] if rows else None
+        except Exception as e:
+            logger.error(f"Get by ID failed for {place_id}: {e}")
+            return None
+
+    async def get_children(
+        self,
+        parent_id: UUID,
+        level: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        if self.gazetteer:
+            children = self.gazetteer.children(parent_id, level)
+            if children is not None:
+                return children
+
+        try:
+            return await self._fetch("children", _uuids([parent_id])[0], level)
+        except Exception as e:
+            logger.error(f"Get children failed for {parent_id}: {e}")
+            return []
+
+    async def find_places_in_direction(
+        self,
+        base_place_ids: List[UUID],
+        direction: str
+    ) -> List[Dict[str, Any]]:
+        try:
+            return await self._fetch("direction", _uuids(base_place_ids), direction.lower())
+        except Exception as e:
+            logger.error(f"Directional search failed for {direction}: {e}")
+            return []
+
+    async def get_children_count(self, parent_id: UUID) -> int:
+        counts = await self.get_children_counts_batch([parent_id])
+        return counts.get(str(parent_id), 0)
+
+    async def get_children_counts_batch(
+        self,
+        parent_ids: List[UUID]
+    ) -> Dict[str, int]:
+        if not parent_ids:
+            return {}
+
+        counts: Dict[str, int] = {}
+        if self.gazetteer:
+            missing = []
+            for pid in parent_ids:
+                count = self.gazetteer.child_count(pid)
+                if count is None:
+                    missing.append(pid)
+                elif count:
+                    counts[str(pid)] = count
+            if not missing:
+                return counts
+            parent_ids = missing
+
+        try:
+            for row in await self._fetch("children_counts", _uuids(parent_ids)):
+                counts[row["parent_id"]] = row["children"]
+            return counts
+        except Exception as e:
+            logger.error(f"Batch children count failed: {e}")
+            return counts
+
+    async def get_by_ids_batch(self, place_ids: List[UUID]) -> Dict[str, Dict[str, Any]]:
+        if not place_ids:
+            return {}
+
+        places_dict: Dict[str, Dict[str, Any]] = {}
+        if self.gazetteer:
+            places_dict = self.gazetteer.get_many(place_ids)
+            place_ids = [pid for pid in place_ids if str(pid) not in places_dict]
+            if not place_ids:
+                return places_dict
+
+        try:
+            for row in await self._fetch("by_ids", _uuids(place_ids)):
+                places_dict[row["id"]] = row
+            return places_dict
+        except Exception as e:
+            logger.error(f"Batch get by IDs failed: {e}")
+            return places_dict
+
+    async def get_centroids_batch(self, place_ids: List[UUID]) -> Dict[str, Dict[str, Any]]:
+        if not place_ids:
+            return {}
+
+        try:
+            return {row["id"]: row for row in await self._fetch("centroids", _uuids(place_ids))}
+        except Exception as e:
+            logger.error(f"Batch centroid lookup failed: {e}")
+            return {}
+
+    async def list_places(self, page_size: int = 1000) -> List[Dict[str, Any]]:
+        # One streamed query; no row cap to page around
+        try:
+            return await self._fetch("all_places")
+        except Exception as e:
+            logger.error(f"Listing places failed: {e}")
+            return []
+
+    async def list_place_aliases(self, page_size: int = 1000) -> List[Dict[str, Any]]:
+        try:
+            return await self._fetch("aliases")
+        except Exception as e:
+            logger.error(f"Listing place aliases failed: {e}")
+            return []
@@ -1,23 +1,41 @@
+import asyncio
 from typing import List, Optional, Dict, Any, cast
 from uuid import UUID
 from supabase import Client
 import logging
 
+from ..gazetteer import LiveGazetteer
+
 logger = logging.getLogger(__name__)
 
 class PlacesRepository:
     """
     Repository for database operations on the places table.
     Provides abstraction over Supabase client with proper type handling.
+    
+    When a gazetteer snapshot is loaded, id and hierarchy lookups are served
+    from the live gazetteer (rows without polygon); ids it does not contain
+    fall back to the database. Fuzzy and spatial searches always go to the database.
+    
+    The Supabase client is synchronous, so every request runs in a worker thread:
+    concurrent lookups overlap and the caller's event loop (the API, or the
+    processing worker in embedded mode) is never blocked on PostgREST.
     """
     
-    def __init__(self, supabase_client: Client):
+    def __init__(self, supabase_client: Client, gazetteer: Optional[LiveGazetteer] = None):
         self.client = supabase_client
+        self.gazetteer = gazetteer
+    
+    @staticmethod
+    async def _execute(query):
+        """Run a blocking PostgREST request off the event loop"""
+        return await asyncio.to_thread(query.execute)
     
     async def search_by_fuzzy_name(
         self, 
         name: str, 
-        threshold: float = 0.85
+        threshold: float = 0.85,
+        max_results: int = 10
     ) -> List[Dict[str, Any]]:
         """
         Search places using fuzzy name matching via PostgreSQL function.
@@ -26,18 +44,20 @@ class PlacesRepository:
         Args:
             name: Location name to search for
             threshold: Minimum similarity score (0-1)
+            max_results: Maximum number of candidates returned
             
         Returns:
-            List of matching places with similarity scores
+            List of matching places with similarity scores, best first
         """
         try:
-            result = self.client.rpc(
+            result = await self._execute(self.client.rpc(
                 'search_places_fuzzy',
                 {
                     'search_name': name,
-                    'similarity_threshold': threshold
+                    'similarity_threshold': threshold,
+                    'max_results': max_results
                 }
-            ).execute()
+            ))
             
             # Type guard: ensure result.data is a list
             if result.data and isinstance(result.data, list):
@@ -64,10 +84,10 @@ class PlacesRepository:
             Place dict or None if no match found
         """
         try:
-            result = self.client.rpc(
+            result = await self._execute(self.client.rpc(
                 'find_place_by_point',
                 {'lon': longitude, 'lat': latitude}
-            ).execute()
+            ))
             
             # Type guard: ensure result.data is a list and return first element
             if result.data and isinstance(result.data, list) and len(result.data) > 0:
@@ -87,12 +107,17 @@ class PlacesRepository:
         Returns:
             Place dict or None if not found
         """
+        if self.gazetteer:
+            place = self.gazetteer.get(place_id)
+            if place:
+                return place
+        
         try:
-            result = self.client.table('places')\
+            query = self.client.table('places')\
                 .select('*')\
                 .eq('id', str(place_id))\
-                .single()\
-                .execute()
+                .single()
+            result = await self._execute(query)
             
             # Type guard for single result
             if result.data and isinstance(result.data, dict):
@@ -117,6 +142,11 @@ class PlacesRepository:
         Returns:
             List of child places
         """
+        if self.gazetteer:
+            children = self.gazetteer.children(parent_id, level)
+            if children is not None:
+                return children
+        
         try:
             query = self.client.table('places')\
                 .select('*')\
@@ -125,7 +155,7 @@ class PlacesRepository:
             if level is not None:
                 query = query.eq('hierarchy_level', level)
             
-            result = query.execute()
+            result = await self._execute(query)
             
             # Type guard: ensure result.data is a list
             if result.data and isinstance(result.data, list):
@@ -143,13 +173,13 @@ class PlacesRepository:
         try:
             logger.info(f"Calling find_places_in_direction with ids: {base_place_ids}, direction: {direction}")
             
-            result = self.client.rpc(
+            result = await self._execute(self.client.rpc(
                 'find_places_in_direction',
                 {
                     'base_place_ids': [str(pid) for pid in base_place_ids],
                     'direction': direction.lower()
                 }
-            ).execute()
+            ))
             
             # Type guard: ensure result.data is a list
             if result.data and isinstance(result.data, list):
@@ -181,11 +211,16 @@ class PlacesRepository:
         Returns:
             Count of direct children
         """
+        if self.gazetteer:
+            count = self.gazetteer.child_count(parent_id)
+            if count is not None:
+                return count
+        
         try:
-            result = self.client.table('places')\
+            query = self.client.table('places')\
                 .select('id')\
-                .eq('parent_id', str(parent_id))\
-                .execute()
+                .eq('parent_id', str(parent_id))
+            result = await self._execute(query)
             
             # Count result rows
             if result.data and isinstance(result.data, list):
@@ -214,14 +249,26 @@ class PlacesRepository:
         if not parent_ids:
             return {}
         
+        counts: Dict[str, int] = {}
+        if self.gazetteer:
+            missing = []
+            for pid in parent_ids:
+                count = self.gazetteer.child_count(pid)
+                if count is None:
+                    missing.append(pid)
+                elif count:
+                    counts[str(pid)] = count
+            if not missing:
+                return counts
+            parent_ids = missing
+        
         try:
-            result = self.client.table('places')\
+            query = self.client.table('places')\
                 .select('parent_id')\
-                .in_('parent_id', [str(pid) for pid in parent_ids])\
-                .execute()
+                .in_('parent_id', [str(pid) for pid in parent_ids])
+            result = await self._execute(query)
             
             # Count occurrences of each parent_id
-            counts: Dict[str, int] = {}
             if result.data and isinstance(result.data, list):
                 for row in result.data:
                     if isinstance(row, dict):
@@ -232,7 +279,7 @@ class PlacesRepository:
             return counts
         except Exception as e:
             logger.error(f"Batch children count failed: {e}")
-            return {}
+            return counts
     
     async def get_by_ids_batch(self, place_ids: List[UUID]) -> Dict[str, Dict[str, Any]]:
         """
@@ -250,14 +297,20 @@ class PlacesRepository:
         if not place_ids:
             return {}
         
+        places_dict: Dict[str, Dict[str, Any]] = {}
+        if self.gazetteer:
+            places_dict = self.gazetteer.get_many(place_ids)
+            place_ids = [pid for pid in place_ids if str(pid) not in places_dict]
+            if not place_ids:
+                return places_dict
+        
         try:
-            result = self.client.table('places')\
+            query = self.client.table('places')\
                 .select('*')\
-                .in_('id', [str(pid) for pid in place_ids])\
-                .execute()
+                .in_('id', [str(pid) for pid in place_ids])
+            result = await self._execute(query)
             
             # Build lookup dict
-            places_dict: Dict[str, Dict[str, Any]] = {}
             if result.data and isinstance(result.data, list):
                 for place in result.data:
                     if isinstance(place, dict) and 'id' in place:
@@ -266,4 +319,116 @@ class PlacesRepository:
             return places_dict
         except Exception as e:
             logger.error(f"Batch get by IDs failed: {e}")
-            return {}
\ No newline at end of file
+            return places_dict
+    
+    async def get_centroids_batch(self, place_ids: List[UUID]) -> Dict[str, Dict[str, Any]]:
+        """
+        Batch get precomputed centroids and provinces for places.
+        
+        Used as spatial context for batch disambiguation; one query for
+        all ids, no geometry transferred.
+        
+        Args:
+            place_ids: List of place UUIDs
+            
+        Returns:
+            Dict mapping place_id (as string) to centroid_lon, centroid_lat
+            and province_id (places without polygon are omitted)
+        """
+        if not place_ids:
+            return {}
+        
+        try:
+            query = self.client.table('places')\
+                .select('id, centroid_lon, centroid_lat, province_id')\
+                .in_('id', [str(pid) for pid in place_ids])\
+                .not_.is_('centroid_lon', 'null')
+            result = await self._execute(query)
+            
+            centroids: Dict[str, Dict[str, Any]] = {}
+            if result.data and isinstance(result.data, list):
+                for row in result.data:
+                    if isinstance(row, dict) and 'id' in row:
+                        centroids[str(row['id'])] = row
+            return centroids
+        except Exception as e:
+            logger.error(f"Batch centroid lookup failed: {e}")
+            return {}
+    
+    async def list_places(self, page_size: int = 1000) -> List[Dict[str, Any]]:
+        """
+        All places without geometry, for building in-memory indexes.
+        
+        Keyset-paginated by id so PostgREST's row cap does not truncate it.
+        
+        Args:
+            page_size: Rows per request
+            
+        Returns:
+            Rows with id, name, parent_id, parent_name and hierarchy_level
+            (empty if any page fails)
+        """
+        places: List[Dict[str, Any]] = []
+        try:
+            while True:
+                query = self.client.table('places')\
+                    .select('id, name, parent_id, parent_name, hierarchy_level')\
+                    .order('id')\
+                    .limit(page_size)
+                if places:
+                    query = query.gt('id', places[-1]['id'])
+                
+                result = await self._execute(query)
+                page = result.data if isinstance(result.data, list) else []
+                places.extend(cast(List[Dict[str, Any]], page))
+                if len(page) < page_size:
+                    return places
+        except Exception as e:
+            logger.error(f"Listing places failed: {e}")
+            return []
+    
+    async def list_place_aliases(self, page_size: int = 1000) -> List[Dict[str, Any]]:
+        """
+        All place aliases.
+        
+        Keyset-paginated by place_id so PostgREST's row cap does not truncate it.
+        A full page can end partway through a place's aliases, so the next
+        request starts again at that place.
+        
+        Args:
+            page_size: Rows per request
+            
+        Returns:
+            Rows with place_id and alias (empty if any page fails)
+        """
+        aliases: List[Dict[str, Any]] = []
+        start: Optional[str] = None
+        inclusive = True
+        try:
+            while True:
+                query = self.client.table('place_aliases')\
+                    .select('place_id, alias')\
+                    .order('place_id')\
+                    .order('alias')\
+                    .limit(page_size)
+                if start is not None:
+                    query = query.gte('place_id', start) if inclusive else query.gt('place_id', start)
+                
+                result = await self._execute(query)
+                page = cast(List[Dict[str, Any]], result.data if isinstance(result.data, list) else [])
+                if len(page) < page_size:
+                    aliases.extend(page)
+                    return aliases
+                
+                start = page[-1]['place_id']
+                complete = [row for row in page if row['place_id'] != start]
+                if complete:
+                    aliases.extend(complete)
+                    inclusive = True
+                else:
+                    logger.warning(f"Place {start} has more than {page_size} aliases, keeping the first {page_size}")
+                    aliases.extend(page)
+                    inclusive = False
+        except Exception as e:
+            logger.error(f"Listing place aliases failed: {e}")
+            return []
@@ -0,0 +1,115 @@
+"""
+Geocoder Runtime
+
+Container-lifecycle wrapper around the geocoding service. Everything expensive
+(settings, Supabase client, gazetteer snapshot, service graph, cache warm-up) happens once in
+setup()/warm(); geocode() then only does the lookup.
+
+Used by the Modal geocoder class (geocoding_modal.py) and runnable locally:
+
+    python -m geocoding.runtime Islamabad Lahore "Central Sindh"
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import time
+from typing import List, Optional
+
+from .config import get_settings
+from .dependencies import (
+    get_supabase_client, get_gazetteer_snapshot, get_settlement_gazetteer, get_shared_geocoding_service,
+    start_gazetteer_refresher, cleanup_services
+)
+from .services.geocoding_service import GeocodingService
+
+logger = logging.getLogger(__name__)
+
+# Province-level names resolved once at startup to open connections and fill caches
+WARMUP_PLACES = ["Punjab", "Sindh", "Khyber Pakhtunkhwa", "Balochistan", "Islamabad"]
+
+
+class GeocoderRuntime:
+    """
+    Holds one warm GeocodingService for the lifetime of a container or process.
+    """
+
+    def __init__(self, warmup_places: Optional[List[str]] = None):
+        self.warmup_places = WARMUP_PLACES if warmup_places is None else warmup_places
+        self.service: Optional[GeocodingService] = None
+
+    def setup(self):
+        """Configure logging, load settings, build clients and the service graph, start the gazetteer refresher"""
+        start = time.perf_counter()
+        logging.basicConfig(
+            level=logging.INFO,
+            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+        )
+        settings = get_settings()
+        get_supabase_client()
+        snapshot = get_gazetteer_snapshot()
+        settlements = get_settlement_gazetteer()
+        self.service = get_shared_geocoding_service()
+        start_gazetteer_refresher()
+        logger.info(
+            f"Geocoder runtime ready in {time.perf_counter() - start:.2f}s "
+            f"(LocationIQ configured: {'Yes' if settings.locationiq_api_key else 'No'}, "
+            f"gazetteer snapshot: {f'{len(snapshot)} places' if snapshot else 'none'}, "
+            f"settlements: {len(settlements) if settlements else 'none'})"
+        )
+
+    async def warm(self):
+        """Resolve a few common names so the first real request does not pay for cold caches"""
+        if not self.warmup_places:
+            return
+        start = time.perf_counter()
+        try:
+            await self.service.geocode_batch_simple(self.warmup_places)
+            logger.info(f"Warmed geocoder caches in {time.perf_counter() - start:.2f}s")
+        except Exception as e:
+            logger.warning(f"Geocoder warm-up failed: {e}")
+
+    async def geocode(self, place_names: List[str]) -> List[str]:
+        """
+        Geocode place names to place IDs.
+
+        Returns:
+            List of place ID strings (empty string if no match, all empty on error)
+        """
+        if self.service is None:
+            self.setup()
+        try:
+            logger.info(f"Geocoding {len(place_names)} places")
+            place_ids = await self.service.geocode_batch_simple(place_names)
+            logger.info(f"Successfully geocoded {len([id for id in place_ids if id])} places")
+            return place_ids
+        except Exception as e:
+            logger.error(f"Geocoding error: {e}", exc_info=True)
+            return [""] * len(place_names)
+
+    async def shutdown(self):
+        await cleanup_services()
+        self.service = None
+
+
+async def _run(place_names: List[str], warm: bool):
+    runtime = GeocoderRuntime()
+    runtime.setup()
+    if warm:
+        await runtime.warm()
+    place_ids = await runtime.geocode(place_names)
+    print(json.dumps(dict(zip(place_names, place_ids)), indent=2))
+    await runtime.shutdown()
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Geocode place names with a local geocoder runtime")
+    parser.add_argument("place_names", nargs="+", help="Place names to geocode")
+    parser.add_argument("--no-warm", action="store_true", help="Skip the cache warm-up")
+    args = parser.parse_args(argv)
+    asyncio.run(_run(args.place_names, warm=not args.no_warm))
+
+
+if __name__ == "__main__":
+    main()
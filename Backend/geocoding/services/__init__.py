@@ -2,15 +2,21 @@
 Business logic services for geocoding operations.
 """
 
-from .geocoding_service import GeocodingService
+from .geocoding_service import GeocodingService, BatchContext
 from .name_matcher import NameMatcher
 from .external_geocoder import ExternalGeocoder
 from .directional_parser import DirectionalParser, Direction
+from .result_cache import ResultCache
+from .autocomplete import AutocompleteIndex, PlaceAutocompleter
 
 __all__ = [
     'GeocodingService',
+    'BatchContext',
     'NameMatcher',
     'ExternalGeocoder',
     'DirectionalParser',
-    'Direction'
+    'Direction',
+    'ResultCache',
+    'AutocompleteIndex',
+    'PlaceAutocompleter'
 ]
@@ -0,0 +1,251 @@
+from typing import List, Dict, Any, Optional, Tuple, Iterable
+from bisect import bisect_left
+import asyncio
+import heapq
+import logging
+
+from ..gazetteer.settlements import normalize_name
+
+logger = logging.getLogger(__name__)
+
+# Match kinds, best first
+EXACT, NAME_PREFIX, ALIAS_PREFIX, TOKEN_PREFIX = 0, 1, 2, 3
+MATCH_TYPES = {EXACT: "exact", NAME_PREFIX: "prefix", ALIAS_PREFIX: "alias", TOKEN_PREFIX: "token"}
+
+PROVINCE_LEVEL = 1
+
+# Sorts after every character, closing a prefix range
+PREFIX_END = "\U0010ffff"
+
+# Unfiltered completions for queries shorter than this are memoized: their
+# prefix ranges cover a large share of the index
+SHORT_QUERY_LENGTH = 2
+MAX_COMPLETIONS = 50
+
+
+class AutocompleteIndex:
+    """
+    Immutable in-memory type-ahead index over place names and aliases.
+
+    Every normalized name and alias is stored in one sorted key array, along
+    with each of its trailing token sequences ("dera ghazi khan" also as
+    "ghazi khan" and "khan"), so a prefix query is two binary searches plus
+    a scan of the matching range - no database round trip.
+
+    Ranking: exact name/alias > name prefix > alias prefix > token prefix,
+    then broader places (lower hierarchy level) first, then shorter names.
+
+    Time Complexity: O(log k + m log limit) per query, k = keys, m = keys in the prefix range
+    """
+
+    def __init__(
+        self,
+        places: Iterable[Dict[str, Any]],
+        aliases: Iterable[Dict[str, Any]] = ()
+    ):
+        """
+        Build the index.
+
+        Args:
+            places: Rows with id, name, parent_id and hierarchy_level
+            aliases: Rows with place_id and alias
+        """
+        self.ids: List[str] = []
+        self.names: List[str] = []
+        self.levels: List[int] = []
+        self.parent_names: List[Optional[str]] = []
+        self.provinces: List[Optional[str]] = []
+
+        rows = [p for p in places if p.get('id') and p.get('name')]
+        position = {str(p['id']): i for i, p in enumerate(rows)}
+        parents = [position.get(str(p.get('parent_id'))) for p in rows]
+
+        for i, place in enumerate(rows):
+            self.ids.append(str(place['id']))
+            self.names.append(place['name'])
+            self.levels.append(place.get('hierarchy_level') or 0)
+            self.parent_names.append(rows[parents[i]]['name'] if parents[i] is not None else place.get('parent_name'))
+        for i in range(len(rows)):
+            self.provinces.append(self._province_of(i, parents))
+
+        entries: List[Tuple[str, int, int]] = []
+        for i, name in enumerate(self.names):
+            entries.extend(self._keys(name, i, NAME_PREFIX))
+        for alias in aliases:
+            i = position.get(str(alias.get('place_id')))
+            if i is not None and alias.get('alias'):
+                entries.extend(self._keys(alias['alias'], i, ALIAS_PREFIX))
+        entries.sort()
+
+        self._keys_sorted = [key for key, _, _ in entries]
+        self._postings = [(place, kind) for _, place, kind in entries]
+        self._short_queries: Dict[str, List[Dict[str, Any]]] = {}
+
+    def _province_of(self, i: int, parents: List[Optional[int]]) -> Optional[str]:
+        seen = 0
+        while i is not None and seen <= len(parents):
+            if self.levels[i] == PROVINCE_LEVEL:
+                return self.ids[i]
+            i = parents[i]
+            seen += 1  # guards against parent cycles
+        return None
+
+    @staticmethod
+    def _keys(text: str, place: int, kind: int) -> List[Tuple[str, int, int]]:
+        key = normalize_name(text)
+        if not key:
+            return []
+        tokens = key.split(" ")
+        keys = [(key, place, kind)]
+        keys += [(" ".join(tokens[t:]), place, TOKEN_PREFIX) for t in range(1, len(tokens))]
+        return keys
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def complete(
+        self,
+        query: str,
+        limit: int = 10,
+        level: Optional[int] = None,
+        province_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Ranked completions for a partial place name.
+
+        Args:
+            query: What the user has typed so far
+            limit: Maximum number of completions
+            level: Only places at this hierarchy level
+            province_id: Only places in this province (or the province itself)
+
+        Returns:
+            Completions with id, name, hierarchy_level, parent_name,
+            province_id, match_type and matched (the key that matched)
+        """
+        q = normalize_name(query)
+        if not q or limit < 1:
+            return []
+
+        if len(q) < SHORT_QUERY_LENGTH and level is None and province_id is None and limit <= MAX_COMPLETIONS:
+            if q not in self._short_queries:
+                self._short_queries[q] = self._scan(q, MAX_COMPLETIONS, None, None)
+            return self._short_queries[q][:limit]
+        return self._scan(q, limit, level, province_id)
+
+    def _scan(
+        self,
+        q: str,
+        limit: int,
+        level: Optional[int],
+        province_id: Optional[str]
+    ) -> List[Dict[str, Any]]:
+        lo = bisect_left(self._keys_sorted, q)
+        hi = bisect_left(self._keys_sorted, q + PREFIX_END, lo)
+
+        # Best-ranked key per place
+        best: Dict[int, Tuple[Tuple[int, int, int], int]] = {}
+        for k in range(lo, hi):
+            place, kind = self._postings[k]
+            if level is not None and self.levels[place] != level:
+                continue
+            if province_id is not None and self.provinces[place] != province_id:
+                continue
+            if kind != TOKEN_PREFIX and self._keys_sorted[k] == q:
+                kind = EXACT
+            rank = (kind, self.levels[place], len(self.names[place]))
+            current = best.get(place)
+            if current is None or rank < current[0]:
+                best[place] = (rank, k)
+
+        top = heapq.nsmallest(limit, best.items(), key=lambda item: (item[1][0], self.names[item[0]]))
+        return [
+            {
+                'id': self.ids[place],
+                'name': self.names[place],
+                'hierarchy_level': self.levels[place],
+                'parent_name': self.parent_names[place],
+                'province_id': self.provinces[place],
+                'match_type': MATCH_TYPES[rank[0]],
+                'matched': self._keys_sorted[k]
+            }
+            for place, (rank, k) in top
+        ]
+
+
+class PlaceAutocompleter:
+    """
+    Serves completions from an AutocompleteIndex built from the repository.
+
+    The index is loaded on first use. When the live gazetteer reports a
+    refresh, or its version no longer matches the one the index was built
+    at, it is rebuilt in the background while the previous index keeps
+    serving, so requests never wait on a rebuild after the first.
+    """
+
+    def __init__(self, places_repo, gazetteer=None):
+        self.repo = places_repo
+        self.gazetteer = gazetteer
+        self._index: Optional[AutocompleteIndex] = None
+        self._built_version: Optional[int] = None
+        self._stale = False
+        self._lock = asyncio.Lock()
+        self._rebuild_task: Optional[asyncio.Task] = None
+        if gazetteer is not None:
+            gazetteer.subscribe(self._on_gazetteer_refresh)
+
+    def _on_gazetteer_refresh(self, version: int):
+        self._stale = True
+        if self._index is not None:
+            self._schedule_rebuild()
+
+    def _schedule_rebuild(self):
+        if self._rebuild_task is not None and not self._rebuild_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return  # rebuilt on the next request instead
+        self._rebuild_task = loop.create_task(self._rebuild())
+
+    async def _rebuild(self) -> Optional[AutocompleteIndex]:
+        async with self._lock:
+            if self._index is not None and not self._stale:
+                return self._index
+            self._stale = False
+            # Read before loading: a refresh during the load leaves the index stale
+            version = self.gazetteer.version if self.gazetteer is not None else None
+            places, aliases = await asyncio.gather(
+                self.repo.list_places(), self.repo.list_place_aliases()
+            )
+            if not places:
+                # Load failed (already logged); keep what we have and retry later
+                self._stale = True
+                return self._index
+            self._index = AutocompleteIndex(places, aliases)
+            self._built_version = version
+            logger.info(f"Autocomplete index built: {len(self._index)} places, {len(aliases)} aliases")
+            return self._index
+
+    async def index(self) -> Optional[AutocompleteIndex]:
+        """Current index, building it on first use (None if places could not be loaded)"""
+        if self._index is None:
+            return await self._rebuild()
+        if self.gazetteer is not None and self.gazetteer.version != self._built_version:
+            self._stale = True
+        if self._stale:
+            self._schedule_rebuild()
+        return self._index
+
+    async def complete(
+        self,
+        query: str,
+        limit: int = 10,
+        level: Optional[int] = None,
+        province_id: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """See AutocompleteIndex.complete; empty when no index could be built"""
+        index = await self.index()
+        if index is None:
+            return []
+        return index.complete(query, limit, level, province_id)
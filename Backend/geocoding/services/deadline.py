@@ -0,0 +1,57 @@
+from typing import Awaitable, Optional, TypeVar
+import asyncio
+import math
+import time
+
+from ..exceptions import DeadlineExceededError
+
+T = TypeVar("T")
+
+
+class Deadline:
+    """
+    Time budget for one geocoding request, shared by every stage it runs.
+    
+    A Deadline without a budget never expires, so stages can use it
+    unconditionally.
+    """
+    
+    def __init__(self, timeout_ms: Optional[int] = None):
+        self.expires_at = time.monotonic() + timeout_ms / 1000 if timeout_ms else None
+    
+    def remaining(self) -> float:
+        """Seconds left (inf without a budget)"""
+        if self.expires_at is None:
+            return math.inf
+        return max(0.0, self.expires_at - time.monotonic())
+    
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+    
+    def can_afford(self, seconds: float) -> bool:
+        """Whether a stage expected to take `seconds` still fits in the budget"""
+        return self.remaining() >= seconds
+    
+    def check(self, stage: str):
+        if self.expired:
+            raise DeadlineExceededError(stage)
+    
+    async def run(self, awaitable: Awaitable[T], stage: str) -> T:
+        """
+        Await a stage within the remaining budget.
+        
+        Raises:
+            DeadlineExceededError: if the budget is already spent or runs out meanwhile
+        """
+        remaining = self.remaining()
+        if remaining == math.inf:
+            return await awaitable
+        if remaining <= 0:
+            if asyncio.iscoroutine(awaitable):
+                awaitable.close()
+            raise DeadlineExceededError(stage)
+        try:
+            return await asyncio.wait_for(awaitable, timeout=remaining)
+        except asyncio.TimeoutError:
+            raise DeadlineExceededError(stage)
@@ -5,6 +5,9 @@ from datetime import datetime, timedelta
 import logging
 import asyncio
 
+from .result_cache import ResultCache
+from ..gazetteer.settlements import SettlementGazetteer
+
 logger = logging.getLogger(__name__)
 
 class ExternalGeocoder:
@@ -12,18 +15,32 @@ class ExternalGeocoder:
     External geocoding service client with intelligent caching and disambiguation.
     
     Optimizations:
+    - Offline settlement gazetteer consulted first; the API only sees true misses
     - In-memory LRU-style cache with TTL to minimize API calls
+    - Optional shared cache tier so replicas reuse each other's API results
     - Connection pooling via shared httpx.AsyncClient
     - Batch request support for parallel geocoding
     - Spatial disambiguation using centroid calculation
     """
     
-    def __init__(self, api_key: str, base_url: str, cache_ttl_days: int = 30, max_cache_size: int = 1000):
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str,
+        cache_ttl_days: int = 30,
+        max_cache_size: int = 1000,
+        shared_cache: Optional[ResultCache] = None,
+        settlements: Optional[SettlementGazetteer] = None,
+        settlement_threshold: float = 0.9
+    ):
         self.api_key = api_key
         self.base_url = base_url
         self.cache_ttl = timedelta(days=cache_ttl_days)
         self.max_cache_size = max_cache_size
         self._cache: Dict[str, Tuple[List[Tuple[float, float]], datetime]] = {}
+        self.shared_cache = shared_cache
+        self.settlements = settlements
+        self.settlement_threshold = settlement_threshold
         self._client: Optional[httpx.AsyncClient] = None
         
     async def __aenter__(self):
@@ -68,7 +85,8 @@ class ExternalGeocoder:
     async def geocode(
         self, 
         location: str,
-        country_filter: str = "pk"  # Pakistan only
+        country_filter: str = "pk",  # Pakistan only
+        timeout: Optional[float] = None
     ) -> List[Tuple[float, float]]:
         """
         Geocode a location string to coordinates.
@@ -76,10 +94,18 @@ class ExternalGeocoder:
         Args:
             location: Place name to geocode
             country_filter: ISO country code filter (default: 'pk' for Pakistan)
+            timeout: Request timeout in seconds, capped at the client's 10s default
             
         Returns:
             List of (longitude, latitude) tuples, ordered by relevance
         """
+        # Local settlement gazetteer (no network)
+        if self.settlements and self.settlements.covers(country_filter):
+            coords = self.settlements.geocode(location, self.settlement_threshold)
+            if coords:
+                logger.debug(f"Settlement gazetteer hit for '{location}'")
+                return coords
+        
         # Check cache
         cache_key = self._get_cache_key(location, country_filter)
         if cache_key in self._cache:
@@ -88,6 +114,14 @@ class ExternalGeocoder:
                 logger.debug(f"Cache hit for '{location}'")
                 return coords
         
+        if self.shared_cache:
+            shared = await self.shared_cache.get("external", cache_key)
+            if shared is not None:
+                coords = [(lon, lat) for lon, lat in shared]
+                self._cache[cache_key] = (coords, datetime.now())
+                logger.debug(f"Shared cache hit for '{location}'")
+                return coords
+        
         # Make API request
         try:
             # Use persistent client if available (via context manager), else create temporary one
@@ -96,6 +130,7 @@ class ExternalGeocoder:
             try:
                 response = await client.get(
                     f"{self.base_url}/search",
+                    timeout=min(timeout, 10.0) if timeout else httpx.USE_CLIENT_DEFAULT,
                     params={
                         'key': self.api_key,
                         'q': location,
@@ -116,6 +151,10 @@ class ExternalGeocoder:
                 
                 # Cache results
                 self._cache[cache_key] = (coords, datetime.now())
+                if self.shared_cache:
+                    self.shared_cache.set(
+                        "external", cache_key, coords, int(self.cache_ttl.total_seconds())
+                    )
                 
                 # Periodic cache maintenance
                 if len(self._cache) > self.max_cache_size * 1.2:
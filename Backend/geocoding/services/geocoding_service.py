@@ -1,4 +1,4 @@
-from typing import List, Dict, Any, Optional, Tuple, Set
+from typing import List, Dict, Any, Optional, Tuple, Set, Union, Awaitable, NamedTuple
 from uuid import UUID
 import logging
 import asyncio
@@ -9,9 +9,42 @@ from ..repositories.places_repository import PlacesRepository
 from .name_matcher import NameMatcher
 from .external_geocoder import ExternalGeocoder
 from .directional_parser import DirectionalParser, Direction
+from .result_cache import ResultCache
+from .deadline import Deadline
+from ..exceptions import DeadlineExceededError
 
 logger = logging.getLogger(__name__)
 
+# Minimum budget (seconds) for the external geocoding fallback; with less left it is skipped
+EXTERNAL_GEOCODE_MIN_BUDGET = 1.5
+
+# Locations in flight at once per geocode_batch pass (bounds DB and API load)
+BATCH_CONCURRENCY = 8
+
+
+class BatchContext:
+    """
+    Spatial context for disambiguating a batch: centroids of the places the
+    batch already resolved and the provinces (level-1 ancestors) they lie in.
+    """
+    
+    def __init__(
+        self,
+        coordinates: List[Tuple[float, float]],
+        province_ids: Optional[Set[str]] = None
+    ):
+        self.coordinates = coordinates
+        self.province_ids = province_ids or set()
+    
+    def __bool__(self) -> bool:
+        return bool(self.coordinates)
+
+
+class _Unresolved(NamedTuple):
+    """First-pass outcome for a name fuzzy matching could not resolve"""
+    place_name: str
+    candidates: List[Dict[str, Any]]
+
 
 class GeocodingService:
     """
@@ -32,18 +65,23 @@ class GeocodingService:
         places_repo: PlacesRepository,
         name_matcher: NameMatcher,
         external_geocoder: ExternalGeocoder,
-        directional_parser: DirectionalParser
+        directional_parser: DirectionalParser,
+        result_cache: Optional[ResultCache] = None,
+        result_cache_ttl: int = 3600
     ):
         self.repo = places_repo
         self.matcher = name_matcher
         self.geocoder = external_geocoder
         self.parser = directional_parser
+        self.result_cache = result_cache
+        self.result_cache_ttl = result_cache_ttl
     
     async def geocode_location(
         self,
         location: str,
         options: GeocodeOptions,
-        batch_context: Optional[List[Tuple[float, float]]] = None
+        batch_context: Optional[Union[BatchContext, List[Tuple[float, float]]]] = None,
+        deadline: Optional[Deadline] = None
     ) -> GeocodeResult:
         """
         Geocode a single location string.
@@ -51,12 +89,65 @@ class GeocodingService:
         Args:
             location: Location string to geocode
             options: Geocoding options
-            batch_context: Context coordinates from other locations in batch (for disambiguation)
+            batch_context: Spatial context from other locations in batch (for
+                disambiguation); a bare list of coordinates is also accepted
+            deadline: Shared request deadline (default: one from options.timeout_ms)
             
         Returns:
-            GeocodeResult with matched places or error
+            GeocodeResult with matched places or error (timed_out=True if the budget ran out)
         """
-        try:
+        if deadline is None:
+            deadline = Deadline(options.timeout_ms)
+        if deadline.expired:
+            return self._timed_out(location, "before processing started")
+        if isinstance(batch_context, list):
+            batch_context = BatchContext(batch_context)
+        
+        # Batch context changes disambiguation, so only context-free results are shared
+        cache_key = None if batch_context else self._cache_key(location, options)
+        cached = await self._cached_result(cache_key)
+        if cached:
+            return cached
+        
+        result = await self._geocode_location(location, options, batch_context, deadline)
+        self._store_result(cache_key, result)
+        return result
+    
+    def _cache_key(self, location: str, options: GeocodeOptions) -> Optional[str]:
+        if not self.result_cache:
+            return None
+        return f"{location.strip().lower()}|{options.model_dump_json(exclude={'timeout_ms'})}"
+    
+    async def _cached_result(self, cache_key: Optional[str]) -> Optional[GeocodeResult]:
+        if not cache_key:
+            return None
+        cached = await self.result_cache.get("geocode", cache_key, versioned=True)
+        if cached is not None:
+            try:
+                return GeocodeResult.model_validate(cached)
+            except ValueError:
+                pass
+        return None
+    
+    def _store_result(self, cache_key: Optional[str], result: GeocodeResult):
+        # Timed-out results may be partial (e.g. unaggregated) even without an error
+        if cache_key and not result.error and not result.timed_out:
+            self.result_cache.set(
+                "geocode", cache_key, result.model_dump(mode="json", exclude_none=True),
+                self.result_cache_ttl, versioned=True
+            )
+    
+    async def _geocode_location(
+        self,
+        location: str,
+        options: GeocodeOptions,
+        batch_context: Optional[BatchContext] = None,
+        deadline: Optional[Deadline] = None,
+        defer_external: bool = False
+    ) -> Union[GeocodeResult, _Unresolved]:
+        deadline = deadline or Deadline()
+        
+        async def resolve():
             logger.info(f"Geocoding: '{location}'")
             
             # Parse for directional indicators
@@ -67,15 +158,24 @@ class GeocodingService:
             if direction:
                 # Directional description processing
                 return await self._process_directional(
-                    location, direction, place_names, options
+                    location, direction, place_names, options, deadline
                 )
             else:
                 # Simple place name resolution
                 return await self._process_simple(
                     location, place_names[0] if place_names else location, 
-                    options, batch_context
+                    options, batch_context, deadline, defer_external
                 )
-                
+        
+        return await self._guarded(location, resolve())
+    
+    async def _guarded(self, location: str, work: Awaitable) -> Any:
+        """Await one location's work, turning timeouts and failures into results"""
+        try:
+            return await work
+        except DeadlineExceededError as e:
+            logger.warning(f"Geocoding timed out for '{location}' during {e.stage}")
+            return self._timed_out(location, f"during {e.stage}")
         except Exception as e:
             logger.error(f"Geocoding failed for '{location}': {e}", exc_info=True)
             return GeocodeResult(
@@ -84,6 +184,15 @@ class GeocodingService:
                 error=f"Geocoding failed: {str(e)}"
             )
     
+    @staticmethod
+    def _timed_out(location: str, when: str) -> GeocodeResult:
+        return GeocodeResult(
+            input=location,
+            matched_places=[],
+            error=f"Time budget exhausted {when}",
+            timed_out=True
+        )
+    
     async def geocode_batch(
         self,
         locations: List[str],
@@ -93,58 +202,135 @@ class GeocodingService:
         Geocode multiple locations with context-aware disambiguation.
         
         Strategy:
-        1. First pass: Try fuzzy matching for all locations
-        2. Collect coordinates for successful matches
-        3. Second pass: Geocode failures with centroid context
+        1. First pass: resolve every location without the external geocoder
+           (fuzzy matching, directional queries, cache), concurrently
+        2. Collect precomputed centroids and provinces of the places found
+        3. Second pass: geocode the remaining names externally, concurrently,
+           preferring candidates in the batch's provinces, then the one
+           closest to the batch centroid
+        
+        At most BATCH_CONCURRENCY locations are in flight per pass. First-pass
+        lookups really overlap on both places backends: asyncpg queries share
+        its pool, and the sync PostgREST client runs each request in a worker
+        thread (so its concurrency is also bounded by the default executor).
         
         Time Complexity: O(n * log m) where n = locations, m = places in DB
         
+        options.timeout_ms bounds the whole batch: locations reached after the
+        budget is spent are returned with timed_out=True, the rest normally.
+        
         Args:
             locations: List of location strings
             options: Geocoding options
             
         Returns:
-            List of GeocodeResult objects
+            List of GeocodeResult objects, in input order
         """
         if not locations:
             return []
         
-        results = []
+        deadline = Deadline(options.timeout_ms)
+        semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+        
+        async def first_pass(location: str) -> Union[GeocodeResult, _Unresolved]:
+            async with semaphore:
+                if deadline.expired:
+                    return self._timed_out(location, "before processing started")
+                cache_key = self._cache_key(location, options)
+                cached = await self._cached_result(cache_key)
+                if cached:
+                    return cached
+                outcome = await self._geocode_location(
+                    location, options, None, deadline, defer_external=True
+                )
+                if isinstance(outcome, GeocodeResult):
+                    self._store_result(cache_key, outcome)
+                return outcome
+        
+        outcomes = list(await asyncio.gather(*(first_pass(loc) for loc in locations)))
+        pending = [i for i, outcome in enumerate(outcomes) if isinstance(outcome, _Unresolved)]
+        if not pending:
+            return outcomes
+        
+        # No context needed if the budget cannot cover the external fallback anyway
+        batch_context = None
+        if deadline.can_afford(EXTERNAL_GEOCODE_MIN_BUDGET):
+            batch_context = await self._build_batch_context(
+                [outcome for outcome in outcomes if isinstance(outcome, GeocodeResult)], deadline
+            )
+        logger.info(
+            f"Batch second pass: {len(pending)}/{len(locations)} locations, "
+            f"context of {len(batch_context.coordinates) if batch_context else 0} places"
+        )
+        
+        async def second_pass(index: int):
+            unresolved = outcomes[index]
+            async with semaphore:
+                outcomes[index] = await self._guarded(locations[index], self._external_fallback(
+                    locations[index], unresolved.place_name, unresolved.candidates, batch_context, deadline
+                ))
         
-        # Process each location
-        for location in locations:
-            result = await self.geocode_location(location, options, None)
-            results.append(result)
+        await asyncio.gather(*(second_pass(i) for i in pending))
+        return outcomes
+    
+    async def _build_batch_context(
+        self,
+        resolved: List[GeocodeResult],
+        deadline: Deadline
+    ) -> Optional[BatchContext]:
+        """Centroids and provinces of the places resolved in the first pass"""
+        place_ids = list({place.id for result in resolved for place in result.matched_places})
+        if not place_ids:
+            return None
         
-        return results
+        try:
+            centroids = await deadline.run(self.repo.get_centroids_batch(place_ids), "batch context")
+        except DeadlineExceededError:
+            return None
+        
+        coordinates = [
+            (row['centroid_lon'], row['centroid_lat']) for row in centroids.values()
+        ]
+        province_ids = {str(row['province_id']) for row in centroids.values() if row.get('province_id')}
+        return BatchContext(coordinates, province_ids) if coordinates else None
     
     async def _process_simple(
         self,
         original_input: str,
         place_name: str,
         options: GeocodeOptions,
-        batch_context: Optional[List[Tuple[float, float]]] = None
-    ) -> GeocodeResult:
+        batch_context: Optional[BatchContext] = None,
+        deadline: Optional[Deadline] = None,
+        defer_external: bool = False
+    ) -> Union[GeocodeResult, _Unresolved]:
         """
         Process simple place name (no directional indicator).
         
         Workflow:
         1. Try fuzzy name matching (fast, O(log n))
-        2. If fails, try external geocoding (slower, O(network))
-        3. If multiple external results, use context for disambiguation
-        4. Perform point-in-polygon to find containing place
+        2. If fails, fall back to external geocoding (see _external_fallback)
+        
+        Suggestions for a failed match come from the candidates retrieved in
+        step 1, so the failure path costs a single fuzzy query.
         
         Args:
             original_input: Original user input
             place_name: Parsed place name
             options: Geocoding options
-            batch_context: Context coordinates for disambiguation
+            batch_context: Spatial context for disambiguation
+            deadline: Request deadline
+            defer_external: Return _Unresolved instead of running step 2
+                (batch first pass)
             
         Returns:
             GeocodeResult with matched places
         """
-        # Step 1: Try fuzzy name matching
-        match = await self.matcher.match(place_name)
+        deadline = deadline or Deadline()
+        
+        # Step 1: Try fuzzy name matching (candidates kept for suggestions)
+        match, candidates = await deadline.run(
+            self.matcher.match_with_candidates(place_name), "name matching"
+        )
         
         if match:
             logger.info(f"Fuzzy match success: '{place_name}' -> {match['name']}")
@@ -160,16 +346,59 @@ class GeocodingService:
                 matched_places=[matched_place]
             )
         
-        # Step 2: Fallback to external geocoding
+        if defer_external:
+            return _Unresolved(place_name, candidates)
+        
+        return await self._external_fallback(
+            original_input, place_name, candidates, batch_context, deadline
+        )
+    
+    async def _external_fallback(
+        self,
+        original_input: str,
+        place_name: str,
+        candidates: List[Dict[str, Any]],
+        batch_context: Optional[BatchContext],
+        deadline: Deadline
+    ) -> GeocodeResult:
+        """
+        Resolve a name the fuzzy matcher could not, via external geocoding.
+        
+        Workflow:
+        1. Geocode externally (slower, O(network))
+        2. If multiple results, use batch context for disambiguation
+        3. Perform point-in-polygon to find containing place
+        
+        Skipped when the deadline cannot cover it.
+        
+        Args:
+            original_input: Original user input
+            place_name: Parsed place name
+            candidates: Fuzzy candidates from matching, used for suggestions
+            batch_context: Spatial context for disambiguation
+            deadline: Request deadline
+            
+        Returns:
+            GeocodeResult with the containing place, or an error with suggestions
+        """
+        if not deadline.can_afford(EXTERNAL_GEOCODE_MIN_BUDGET):
+            logger.info(f"Fuzzy match failed for '{place_name}', no budget left for external geocoding")
+            return self._timed_out(original_input, "before external geocoding")
+        
         logger.info(f"Fuzzy match failed for '{place_name}', trying external geocoding")
         
-        coords = await self.geocoder.geocode(place_name, country_filter="pk")
+        coords = await deadline.run(
+            self.geocoder.geocode(place_name, country_filter="pk", timeout=deadline.remaining()),
+            "external geocoding"
+        )
         
         if not coords:
+            if deadline.expired:
+                return self._timed_out(original_input, "during external geocoding")
             logger.warning(f"No geocoding results for '{place_name}'")
             
-            # Try to get suggestions
-            suggestions = await self.suggest_alternatives(place_name, limit=3)
+            # Suggestions from the matching candidates (no extra query)
+            suggestions = self.matcher.get_closest_suggestions(candidates, limit=3)
             if suggestions:
                 suggestion_names = [s['name'] for s in suggestions]
                 error_msg = f"No match found. Did you mean: {', '.join(suggestion_names)}?"
@@ -182,16 +411,18 @@ class GeocodingService:
                 error=error_msg
             )
         
-        # Step 3: Disambiguate if multiple results
+        # Step 2: Disambiguate if multiple results
+        place = None
         if len(coords) > 1 and batch_context:
-            selected_coord = self.geocoder.disambiguate_by_centroid(coords, batch_context)
+            selected_coord, place = await self._disambiguate(coords, batch_context, deadline)
         else:
             selected_coord = coords[0]
         
-        # Step 4: Point-in-polygon lookup
+        # Step 3: Point-in-polygon lookup (already done if disambiguation needed it)
         lon, lat = selected_coord
-        logger.info(f"Point-in-polygon lookup for ({lon:.4f}, {lat:.4f})")
-        place = await self.repo.find_by_coordinates(lon, lat)
+        if place is None:
+            logger.info(f"Point-in-polygon lookup for ({lon:.4f}, {lat:.4f})")
+            place = await deadline.run(self.repo.find_by_coordinates(lon, lat), "point-in-polygon lookup")
         
         if not place:
             logger.warning(f"Coordinates {lon}, {lat} not within any known place")
@@ -214,12 +445,48 @@ class GeocodingService:
             matched_places=[matched_place]
         )
     
+    async def _disambiguate(
+        self,
+        coords: List[Tuple[float, float]],
+        batch_context: BatchContext,
+        deadline: Deadline
+    ) -> Tuple[Tuple[float, float], Optional[Dict[str, Any]]]:
+        """
+        Pick one of several external geocoding results using batch context.
+        
+        When the batch resolved places in known provinces, each candidate is
+        located (point-in-polygon, concurrently) and only candidates inside
+        those provinces are considered; among them, or among all candidates
+        if none qualify, the one closest to the batch centroid wins.
+        
+        Returns:
+            Selected coordinate and its containing place if already looked up
+        """
+        if batch_context.province_ids:
+            places = await deadline.run(
+                asyncio.gather(*(self.repo.find_by_coordinates(lon, lat) for lon, lat in coords)),
+                "candidate lookup"
+            )
+            in_province = {
+                coord: place for coord, place in zip(coords, places)
+                if place and str(place.get('province_id')) in batch_context.province_ids
+            }
+            if in_province:
+                selected = self.geocoder.disambiguate_by_centroid(
+                    list(in_province), batch_context.coordinates
+                )
+                return selected, in_province[selected]
+            logger.debug("No external candidate inside the batch's provinces, using centroid only")
+        
+        return self.geocoder.disambiguate_by_centroid(coords, batch_context.coordinates), None
+    
     async def _process_directional(
         self,
         original_input: str,
         direction: Direction,
         place_names: Tuple[str, ...],
-        options: GeocodeOptions
+        options: GeocodeOptions,
+        deadline: Optional[Deadline] = None
     ) -> GeocodeResult:
         """
         Process directional description (e.g., "Central Sindh and Balochistan").
@@ -240,10 +507,13 @@ class GeocodingService:
             direction: Directional indicator (e.g., Direction.CENTRAL)
             place_names: Base place names to define region
             options: Geocoding options
+            deadline: Request deadline; if it runs out during aggregation the
+                unaggregated places are returned with timed_out=True
             
         Returns:
             GeocodeResult with matched places in directional region
         """
+        deadline = deadline or Deadline()
         if not place_names:
             logger.error("No place names found after parsing direction")
             return GeocodeResult(
@@ -260,7 +530,7 @@ class GeocodingService:
         logger.info(f"Matching base places: {place_names}")
         
         for place_name in place_names:
-            match = await self.matcher.match(place_name)
+            match = await deadline.run(self.matcher.match(place_name), "base place matching")
             if match:
                 # FIX: Handle both string and UUID types
                 place_id = match['id']
@@ -290,9 +560,9 @@ class GeocodingService:
         
         # Step 2: Query for places in directional region
         logger.info(f"Querying directional region: {direction.value} of {matched_base_names}")
-        directional_places = await self.repo.find_places_in_direction(
-            base_place_ids,
-            direction.value
+        directional_places = await deadline.run(
+            self.repo.find_places_in_direction(base_place_ids, direction.value),
+            "directional search"
         )
         
         logger.info(f"Found {len(directional_places)} places in directional region")
@@ -331,8 +601,14 @@ class GeocodingService:
         
         logger.debug(f"Valid places after filtering: {len(valid_places)}")
         
-        # Step 3: Apply hierarchical aggregation
-        aggregated_places = await self._aggregate_hierarchy(valid_places)
+        # Step 3: Apply hierarchical aggregation (partial result if the budget runs out)
+        timed_out = False
+        try:
+            aggregated_places = await deadline.run(self._aggregate_hierarchy(valid_places), "aggregation")
+        except DeadlineExceededError:
+            logger.warning("Time budget exhausted during aggregation, returning unaggregated places")
+            aggregated_places = valid_places
+            timed_out = True
         
         logger.info(f"After aggregation: {len(aggregated_places)} places")
         
@@ -363,7 +639,8 @@ class GeocodingService:
             input=original_input,
             matched_places=matched_places,
             regions_processed=list(matched_base_names),
-            direction=direction.value
+            direction=direction.value,
+            timed_out=timed_out
         )
     
     async def _aggregate_hierarchy(
@@ -526,20 +803,10 @@ class GeocodingService:
         Returns:
             List of suggested places with similarity scores
         """
-        # Lower threshold to get suggestions
-        candidates = await self.repo.search_by_fuzzy_name(location, threshold=0.5)
+        # Same candidate retrieval as matching (suggestion threshold, capped)
+        candidates = await self.matcher.find_candidates(location)
         
-        if not candidates:
-            return []
-        
-        # Sort by similarity and return top N
-        sorted_candidates = sorted(
-            candidates,
-            key=lambda x: x.get('similarity_score', 0),
-            reverse=True
-        )
-        
-        return sorted_candidates[:limit]
+        return self.matcher.get_closest_suggestions(candidates, limit)
     
     async def geocode_batch_simple(self, place_names: List[str]) -> List[str]:
         """
@@ -548,6 +815,8 @@ class GeocodingService:
         Accepts a list of place names and returns a list of place IDs.
         This is a simplified interface that uses default options and
         returns only the IDs from the first matched place for each input.
+        Runs through geocode_batch, so names are resolved concurrently and
+        external lookups are disambiguated with the rest of the list.
         
         Args:
             place_names: List of location strings to geocode
@@ -560,20 +829,14 @@ class GeocodingService:
             ids = await service.geocode_batch_simple(names)
             # Returns: ["uuid-islamabad", "uuid-lahore", "uuid-karachi"]
         """
-        options = GeocodeOptions()
-        results = []
-        
-        for name in place_names:
-            try:
-                result = await self.geocode_location(name, options)
-                if result.matched_places:
-                    # Return the first matched place ID
-                    results.append(str(result.matched_places[0].id))
-                else:
-                    # No match found
-                    results.append("")
-            except Exception as e:
-                logger.error(f"Error geocoding '{name}': {e}")
-                results.append("")
-        
-        return results
\ No newline at end of file
+        try:
+            results = await self.geocode_batch(place_names, GeocodeOptions())
+        except Exception as e:
+            logger.error(f"Error geocoding batch of {len(place_names)} names: {e}")
+            return [""] * len(place_names)
+        
+        # Return the first matched place ID, empty string if no match found
+        return [
+            str(result.matched_places[0].id) if result.matched_places else ""
+            for result in results
+        ]
\ No newline at end of file
@@ -1,4 +1,4 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Tuple
 from uuid import UUID
 import logging
 
@@ -12,6 +12,9 @@ class NameMatcher:
     - Delegates fuzzy matching to PostgreSQL (pg_trgm) for efficiency
     - Implements business logic for candidate selection
     - Prefers more specific (higher hierarchy level) places when scores are similar
+    - One candidate query per name, at the suggestion threshold: the match is
+      picked from the candidates above the match threshold, and the same set
+      provides "did you mean" suggestions when nothing qualifies
     
     Time Complexity: O(n log n) where n is number of candidates (for sorting)
     """
@@ -21,7 +24,9 @@ class NameMatcher:
         places_repo,
         threshold: float = 0.85,
         prefer_lower_levels: bool = True,
-        similarity_tolerance: float = 0.05
+        similarity_tolerance: float = 0.05,
+        candidate_threshold: float = 0.5,
+        max_candidates: int = 10
     ):
         """
         Initialize name matcher.
@@ -31,47 +36,47 @@ class NameMatcher:
             threshold: Minimum similarity score for fuzzy matching (0-1)
             prefer_lower_levels: Prefer more specific places (higher hierarchy numbers)
             similarity_tolerance: Score difference within which to prefer lower levels
+            candidate_threshold: Similarity floor for retrieved candidates (suggestions)
+            max_candidates: Cap on candidates retrieved per name
         """
         self.repo = places_repo
         self.threshold = threshold
         self.prefer_lower_levels = prefer_lower_levels
         self.similarity_tolerance = similarity_tolerance
+        self.candidate_threshold = min(candidate_threshold, threshold)
+        self.max_candidates = max_candidates
     
-    async def match(self, location: str) -> Optional[Dict[str, Any]]:
+    async def find_candidates(self, location: str) -> List[Dict[str, Any]]:
         """
-        Match a location string to a place using fuzzy matching.
-        
-        Algorithm:
-        1. Query database with pg_trgm similarity (O(log n) with GIN index)
-        2. Select best candidate using business rules (O(n log n))
+        Retrieve fuzzy candidates for a name once, at the candidate threshold.
         
         Args:
-            location: Location name to match
+            location: Location name
             
         Returns:
-            Dict with matched place info or None if no match found
-            Contains: id, name, hierarchy_level, match_method, confidence
+            Candidates with similarity scores, best first (at most max_candidates)
         """
         if not location or not location.strip():
-            logger.warning("Empty location string provided")
-            return None
-        
-        location = location.strip()
-        
-        # Try fuzzy search via database (pg_trgm handles the heavy lifting)
-        candidates = await self.repo.search_by_fuzzy_name(
-            location, 
-            self.threshold
+            return []
+        return await self.repo.search_by_fuzzy_name(
+            location.strip(),
+            self.candidate_threshold,
+            self.max_candidates
         )
+    
+    def select_match(self, candidates: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Pick the match from retrieved candidates (only those at or above the match threshold).
         
-        if not candidates:
-            logger.info(f"No fuzzy matches for '{location}' above threshold {self.threshold}")
+        Returns:
+            Dict with id, name, hierarchy_level, match_method, confidence; None if none qualifies
+        """
+        qualifying = [c for c in candidates if c.get('similarity_score', 1.0) >= self.threshold]
+        if not qualifying:
             return None
         
-        logger.debug(f"Found {len(candidates)} candidates for '{location}'")
-        
         # Select best candidate using business rules
-        best_match = self._select_best_candidate(candidates)
+        best_match = self._select_best_candidate(qualifying)
         
         # Determine match method based on similarity score
         similarity = best_match.get('similarity_score', 1.0)
@@ -85,6 +90,44 @@ class NameMatcher:
             'confidence': similarity
         }
     
+    async def match_with_candidates(
+        self,
+        location: str
+    ) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        Match a location and keep the candidate set for suggestions.
+        
+        Returns:
+            (match or None, candidates)
+        """
+        candidates = await self.find_candidates(location)
+        match = self.select_match(candidates)
+        if not match:
+            logger.info(f"No fuzzy matches for '{location}' above threshold {self.threshold}")
+        return match, candidates
+    
+    async def match(self, location: str) -> Optional[Dict[str, Any]]:
+        """
+        Match a location string to a place using fuzzy matching.
+        
+        Algorithm:
+        1. Query database with pg_trgm similarity (O(log n) with GIN index)
+        2. Select best candidate using business rules (O(n log n))
+        
+        Args:
+            location: Location name to match
+            
+        Returns:
+            Dict with matched place info or None if no match found
+            Contains: id, name, hierarchy_level, match_method, confidence
+        """
+        if not location or not location.strip():
+            logger.warning("Empty location string provided")
+            return None
+        
+        match, _ = await self.match_with_candidates(location)
+        return match
+    
     async def match_multiple(
         self,
         locations: List[str]
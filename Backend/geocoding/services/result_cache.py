@@ -0,0 +1,134 @@
+from typing import Any, Callable, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """
+    Shared cache tier (Redis or any RESP-compatible server) for geocoding
+    results, so autoscaled replicas warm each other instead of starting cold.
+
+    - Read-through: callers try get() first and compute on a miss
+    - Write-behind: set() only queues; a background task pipelines SETEX batches
+    - Compact values: JSON without whitespace, keys hashed to fixed length
+    - Outage tolerant: any Redis error opens a short circuit during which the
+      cache is skipped entirely, so a dead server costs one timeout, not one per lookup
+
+    Versioned kinds put the gazetteer version in the key, so results computed
+    against older place data stop being read as soon as the gazetteer refreshes.
+    """
+
+    def __init__(
+        self,
+        client,
+        namespace: str = "reach-geo",
+        version: Optional[Callable[[], int]] = None,
+        retry_after_seconds: float = 30.0,
+        max_pending: int = 1000,
+        flush_batch_size: int = 100
+    ):
+        self.client = client
+        self.namespace = namespace
+        self.version = version
+        self.retry_after_seconds = retry_after_seconds
+        self.flush_batch_size = flush_batch_size
+        self._pending: asyncio.Queue = asyncio.Queue(maxsize=max_pending)
+        self._flusher: Optional[asyncio.Task] = None
+        self._down_until = 0.0
+
+    def key(self, kind: str, raw_key: str, versioned: bool = False) -> str:
+        digest = hashlib.blake2b(raw_key.encode(), digest_size=12).hexdigest()
+        if versioned and self.version:
+            return f"{self.namespace}:{kind}:{self.version()}:{digest}"
+        return f"{self.namespace}:{kind}:{digest}"
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    def _mark_down(self, action: str, error: Exception):
+        if self.available:
+            logger.warning(f"Result cache {action} failed, bypassing cache for {self.retry_after_seconds:g}s: {error}")
+        self._down_until = time.monotonic() + self.retry_after_seconds
+
+    async def get(self, kind: str, raw_key: str, versioned: bool = False) -> Optional[Any]:
+        """Cached value, or None on a miss or while the cache is unavailable"""
+        if not self.available:
+            return None
+        try:
+            data = await self.client.get(self.key(kind, raw_key, versioned))
+        except Exception as e:
+            self._mark_down("read", e)
+            return None
+        if data is None:
+            return None
+        try:
+            return json.loads(data)
+        except ValueError:
+            return None
+
+    def set(self, kind: str, raw_key: str, value: Any, ttl_seconds: int, versioned: bool = False):
+        """Queue a write; never blocks and drops the write when the queue is full or the cache is down"""
+        if not self.available:
+            return
+        try:
+            payload = json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+            self._pending.put_nowait((self.key(kind, raw_key, versioned), payload, int(ttl_seconds)))
+        except asyncio.QueueFull:
+            return
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Result cache skipped unserializable value for {kind}: {e}")
+            return
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._flush_loop())
+
+    def _take_batch(self, first: Tuple[str, str, int]):
+        batch = [first]
+        while len(batch) < self.flush_batch_size and not self._pending.empty():
+            batch.append(self._pending.get_nowait())
+        return batch
+
+    async def _write(self, batch):
+        pipe = self.client.pipeline(transaction=False)
+        for key, payload, ttl in batch:
+            pipe.set(key, payload, ex=ttl)
+        await pipe.execute()
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                first = await asyncio.wait_for(self._pending.get(), timeout=5.0)
+            except asyncio.TimeoutError:
+                return  # idle; restarted by the next set()
+            batch = self._take_batch(first)
+            if not self.available:
+                continue
+            try:
+                await self._write(batch)
+            except Exception as e:
+                self._mark_down("write", e)
+
+    async def flush(self):
+        """Write everything queued so far (used on shutdown and in tests)"""
+        while not self._pending.empty():
+            batch = self._take_batch(self._pending.get_nowait())
+            if self.available:
+                try:
+                    await self._write(batch)
+                except Exception as e:
+                    self._mark_down("write", e)
+
+    async def close(self):
+        if self._flusher:
+            self._flusher.cancel()
+            self._flusher = None
+        await self.flush()
+        try:
+            await self.client.aclose()
+        except Exception as e:
+            logger.debug(f"Result cache close failed: {e}")
@@ -0,0 +1,127 @@
+"""
+asyncpg repository tests.
+
+The unit tests use a stand-in pool. Set TEST_DATABASE_URL to a PostGIS database
+with db_queries.sql applied (e.g. a local postgis/postgis container) to also run
+the integration test against real Postgres.
+
+Usage:
+    python -m pytest geocoding/tests/test_asyncpg_repository.py
+"""
+
+import asyncio
+import os
+import uuid
+
+import pytest
+
+from geocoding.repositories.asyncpg_repository import AsyncpgPlacesRepository, STATEMENTS
+
+PUNJAB = uuid.uuid4()
+LAHORE = uuid.uuid4()
+
+
+class StandInConnection:
+    """Records prepared and executed SQL; answers from canned rows per statement"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.prepared = []
+        self.executed = []
+
+    async def prepare(self, sql):
+        self.prepared.append(sql)
+
+    async def fetch(self, sql, *args):
+        self.executed.append((sql, args))
+        name = next(key for key, statement in STATEMENTS.items() if statement == sql)
+        return self.responses.get(name, [])
+
+
+class StandInPool:
+    def __init__(self, connection):
+        self.connection = connection
+        self.closed = False
+
+    def acquire(self):
+        pool = self
+
+        class Acquire:
+            async def __aenter__(self):
+                return pool.connection
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Acquire()
+
+    async def close(self):
+        self.closed = True
+
+
+def make_repository(responses):
+    connection = StandInConnection(responses)
+    return AsyncpgPlacesRepository(pool=StandInPool(connection)), connection
+
+
+def test_rows_are_shaped_like_postgrest_rows():
+    repo, connection = make_repository({
+        "fuzzy": [{"id": LAHORE, "name": "Lahore", "hierarchy_level": 2, "similarity_score": 0.9}],
+        "by_ids": [{"id": LAHORE, "name": "Lahore", "parent_id": PUNJAB, "parent_name": "Punjab", "hierarchy_level": 2}],
+        "children_counts": [{"parent_id": PUNJAB, "children": 36}],
+    })
+
+    async def run():
+        matches = await repo.search_by_fuzzy_name("Lahor", threshold=0.5)
+        places = await repo.get_by_ids_batch([LAHORE])
+        counts = await repo.get_children_counts_batch([PUNJAB, LAHORE])
+        return matches, places, counts
+
+    matches, places, counts = asyncio.run(run())
+    assert matches == [{"id": str(LAHORE), "name": "Lahore", "hierarchy_level": 2, "similarity_score": 0.9}]
+    assert places[str(LAHORE)]["parent_id"] == str(PUNJAB)
+    assert counts == {str(PUNJAB): 36}
+
+    # UUIDs go over the wire as uuid[] parameters, not strings
+    sql, args = connection.executed[1]
+    assert sql == STATEMENTS["by_ids"] and args == ([LAHORE],)
+
+
+def test_errors_degrade_like_the_postgrest_backend():
+    class BrokenPool(StandInPool):
+        def acquire(self):
+            raise ConnectionError("database unavailable")
+
+    repo = AsyncpgPlacesRepository(pool=BrokenPool(None))
+
+    async def run():
+        return (
+            await repo.search_by_fuzzy_name("Lahore"),
+            await repo.get_by_id(LAHORE),
+            await repo.find_places_in_direction([PUNJAB], "North"),
+            await repo.get_children_count(PUNJAB),
+        )
+
+    assert asyncio.run(run()) == ([], None, [], 0)
+
+
+def test_statements_prepared_on_connect():
+    connection = StandInConnection({})
+    asyncio.run(AsyncpgPlacesRepository._prepare_statements(connection))
+    assert connection.prepared == list(STATEMENTS.values())
+
+
+@pytest.mark.skipif(not os.environ.get("TEST_DATABASE_URL"), reason="TEST_DATABASE_URL not set")
+def test_against_postgis():
+    async def run():
+        repo = AsyncpgPlacesRepository(os.environ["TEST_DATABASE_URL"], max_size=2)
+        try:
+            matches = await repo.search_by_fuzzy_name("Lahore", threshold=0.5)
+            assert matches and isinstance(matches[0]["id"], str)
+            place = await repo.get_by_id(uuid.UUID(matches[0]["id"]))
+            assert place["name"] == matches[0]["name"]
+            assert await repo.find_by_coordinates(74.3587, 31.5204) is not None
+        finally:
+            await repo.close()
+
+    asyncio.run(run())
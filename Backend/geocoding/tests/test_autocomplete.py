@@ -0,0 +1,178 @@
+"""
+Autocomplete index tests on in-memory places (no database needed).
+
+Usage:
+    python -m pytest geocoding/tests/test_autocomplete.py
+    RUN_BENCHMARKS=1 python -m pytest -s geocoding/tests/test_autocomplete.py  # include the latency benchmark
+"""
+
+import asyncio
+import os
+import random
+import string
+import time
+import uuid
+
+import pytest
+
+from geocoding.gazetteer import GazetteerRefresher, LiveGazetteer
+from geocoding.services.autocomplete import AutocompleteIndex, PlaceAutocompleter
+
+
+def place(name, level, parent=None):
+    return {"id": str(uuid.uuid4()), "name": name, "hierarchy_level": level,
+            "parent_id": parent["id"] if parent else None}
+
+
+PAKISTAN = place("Pakistan", 0)
+PUNJAB = place("Punjab", 1, PAKISTAN)
+KPK = place("Khyber Pakhtunkhwa", 1, PAKISTAN)
+LAHORE = place("Lahore", 2, PUNJAB)
+LAHORE_CITY = place("Lahore City", 3, LAHORE)
+DG_KHAN = place("Dera Ghazi Khan", 2, PUNJAB)
+DI_KHAN = place("Dera Ismail Khan", 2, KPK)
+LAKKI = place("Lakki Marwat", 2, KPK)
+PLACES = [PAKISTAN, PUNJAB, KPK, LAHORE, LAHORE_CITY, DG_KHAN, DI_KHAN, LAKKI]
+ALIASES = [
+    {"place_id": KPK["id"], "alias": "KPK"},
+    {"place_id": KPK["id"], "alias": "NWFP"},
+    {"place_id": DG_KHAN["id"], "alias": "D.G. Khan"},
+]
+
+
+def names(results):
+    return [r["name"] for r in results]
+
+
+def test_ranking():
+    index = AutocompleteIndex(PLACES, ALIASES)
+
+    # Name prefix, broader place first; the word-prefix match ranks last
+    assert names(index.complete("la")) == ["Lahore", "Lakki Marwat", "Lahore City"]
+    results = index.complete("lahore")
+    assert [(r["name"], r["match_type"]) for r in results] == [("Lahore", "exact"), ("Lahore City", "prefix")]
+    assert results[1]["parent_name"] == "Lahore" and results[1]["province_id"] == PUNJAB["id"]
+
+    # Later words and aliases, normalized
+    assert names(index.complete("ghazi")) == ["Dera Ghazi Khan"]
+    assert index.complete("ghazi")[0]["match_type"] == "token"
+    assert [(r["name"], r["match_type"]) for r in index.complete("kp")] == [("Khyber Pakhtunkhwa", "alias")]
+    assert index.complete("d g kh")[0]["name"] == "Dera Ghazi Khan"
+    assert names(index.complete("Dera ")) == ["Dera Ghazi Khan", "Dera Ismail Khan"]
+    assert index.complete("zzz") == [] and index.complete("  ") == []
+
+
+def test_filters():
+    index = AutocompleteIndex(PLACES, ALIASES)
+    assert names(index.complete("dera", province_id=KPK["id"])) == ["Dera Ismail Khan"]
+    assert names(index.complete("la", level=3)) == ["Lahore City"]
+    assert names(index.complete("khan", limit=1)) == ["Dera Ghazi Khan"]
+
+
+@pytest.mark.skipif(not os.environ.get("RUN_BENCHMARKS"), reason="benchmark; set RUN_BENCHMARKS=1")
+def test_latency_on_a_large_index():
+    rng = random.Random(7)
+    provinces = [place(f"Province {i}", 1) for i in range(7)]
+    districts = [place(f"{''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 10)))} district", 2,
+                       rng.choice(provinces)) for _ in range(1000)]
+    tehsils = [place(" ".join("".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8)))
+                              for _ in range(rng.randint(1, 3))), 3, rng.choice(districts))
+               for _ in range(20000)]
+    index = AutocompleteIndex(provinces + districts + tehsils)
+
+    queries = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(2, 5))) for _ in range(2000)]
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.complete(query, limit=10)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    p99 = timings[int(len(timings) * 0.99)]
+    print(f"autocomplete p99 over {len(timings)} queries on {len(index)} places: {p99 * 1000:.3f} ms")
+    # Loose bound: wall-clock timings vary on shared machines; the target is sub-millisecond
+    assert p99 < 0.01
+
+
+class StubRepo:
+    def __init__(self, places):
+        self.places = places
+        self.loads = 0
+
+    async def list_places(self, page_size=1000):
+        self.loads += 1
+        return list(self.places)
+
+    async def list_place_aliases(self):
+        return ALIASES
+
+
+def test_autocompleter_rebuilds_after_gazetteer_refresh():
+    async def run():
+        repo = StubRepo(PLACES)
+        gazetteer = LiveGazetteer()
+        autocompleter = PlaceAutocompleter(repo, gazetteer)
+
+        assert names(await autocompleter.complete("lah")) == ["Lahore", "Lahore City"]
+        assert names(await autocompleter.complete("lak")) == ["Lakki Marwat"]
+        assert repo.loads == 1
+
+        renamed = {**LAKKI, "name": "Lakki"}
+        repo.places = [p for p in PLACES if p is not LAKKI] + [renamed]
+        gazetteer.apply([renamed], 1)
+        await autocompleter._rebuild_task
+        assert [(r["name"], r["match_type"]) for r in await autocompleter.complete("lakki")] == [("Lakki", "exact")]
+        assert repo.loads == 2
+
+    asyncio.run(run())
+
+
+class VersionClient:
+    """Supabase stand-in answering gazetteer_version with the latest places watermark"""
+
+    def __init__(self, watermark):
+        self.data = watermark
+
+    def rpc(self, name, params):
+        return self
+
+    def execute(self):
+        return self
+
+
+def test_autocompleter_rebuilds_on_refresh_without_snapshot():
+    async def run():
+        repo = StubRepo(PLACES)
+        gazetteer = LiveGazetteer()
+        autocompleter = PlaceAutocompleter(repo, gazetteer)
+        refresher = GazetteerRefresher(VersionClient("2026-01-01T00:00:00+00:00"), gazetteer)
+        await refresher.refresh_once()
+
+        assert names(await autocompleter.complete("lak")) == ["Lakki Marwat"]
+        assert repo.loads == 1
+
+        # No snapshot: the refresher only advances the version
+        repo.places = [p for p in PLACES if p is not LAKKI] + [{**LAKKI, "name": "Lakki"}]
+        refresher.client.data = "2026-01-02T00:00:00+00:00"
+        await refresher.refresh_once()
+        await autocompleter._rebuild_task
+        assert names(await autocompleter.complete("lakki")) == ["Lakki"]
+        assert repo.loads == 2
+
+    asyncio.run(run())
+
+
+def test_autocompleter_notices_a_new_version_on_lookup():
+    async def run():
+        repo = StubRepo(PLACES)
+        gazetteer = LiveGazetteer()
+        autocompleter = PlaceAutocompleter(repo, gazetteer)
+        await autocompleter.complete("lah")
+
+        # A refresh whose notification was missed is caught by the version check
+        gazetteer._listeners.clear()
+        gazetteer.apply([], 5)
+        await autocompleter.complete("lah")
+        await autocompleter._rebuild_task
+        return repo.loads
+
+    assert asyncio.run(run()) == 2
@@ -0,0 +1,178 @@
+"""
+Two-pass batch geocoding tests with in-memory stand-ins (no database or API needed).
+
+Usage:
+    python -m pytest geocoding/tests/test_batch_context.py
+"""
+
+import asyncio
+import time
+import uuid
+from types import SimpleNamespace
+
+from geocoding.models import GeocodeOptions
+from geocoding.repositories.places_repository import PlacesRepository
+from geocoding.services.directional_parser import DirectionalParser
+from geocoding.services.external_geocoder import ExternalGeocoder
+from geocoding.services.geocoding_service import GeocodingService
+from geocoding.services.name_matcher import NameMatcher
+
+PUNJAB = str(uuid.uuid4())
+SINDH = str(uuid.uuid4())
+KPK = str(uuid.uuid4())
+
+
+def place(name, lon, lat, province_id, level=2):
+    return {
+        "id": str(uuid.uuid4()), "name": name, "hierarchy_level": level,
+        "centroid_lon": lon, "centroid_lat": lat, "province_id": province_id,
+    }
+
+
+LAHORE = place("Lahore", 74.34, 31.52, PUNJAB)
+KASUR = place("Kasur", 74.45, 31.12, PUNJAB)
+HYDERABAD = place("Hyderabad", 68.37, 25.39, SINDH)
+JARANWALA = place("Jaranwala", 73.42, 31.33, PUNJAB, level=3)
+MARDAN = place("Mardan", 72.04, 34.20, KPK)
+
+# Containing place for each external geocoding result
+BY_POINT = {(p["centroid_lon"], p["centroid_lat"]): p for p in (HYDERABAD, JARANWALA, MARDAN)}
+
+
+class StubRepo:
+    def __init__(self, known, delay=0.0):
+        self.known = {p["name"].lower(): p for p in known}
+        self.delay = delay
+        self.fuzzy_calls = 0
+        self.point_calls = 0
+
+    async def search_by_fuzzy_name(self, name, threshold=0.85, max_results=10):
+        self.fuzzy_calls += 1
+        await asyncio.sleep(self.delay)
+        match = self.known.get(name.lower())
+        return [{**match, "similarity_score": 1.0}] if match else []
+
+    async def get_centroids_batch(self, place_ids):
+        rows = {p["id"]: p for p in self.known.values()}
+        return {str(pid): rows[str(pid)] for pid in place_ids if str(pid) in rows}
+
+    async def find_by_coordinates(self, lon, lat):
+        self.point_calls += 1
+        return BY_POINT.get((lon, lat))
+
+
+class StubGeocoder(ExternalGeocoder):
+    """Real disambiguation logic, canned results instead of LocationIQ"""
+
+    def __init__(self, results):
+        super().__init__("", "http://unused.invalid")
+        self.results = results
+        self.calls = []
+
+    async def geocode(self, location, country_filter="pk", timeout=None):
+        self.calls.append(location)
+        return self.results.get(location, [])
+
+
+def make_service(known, results, delay=0.0):
+    repo = StubRepo(known, delay)
+    geocoder = StubGeocoder(results)
+    return GeocodingService(repo, NameMatcher(repo), geocoder, DirectionalParser()), repo, geocoder
+
+
+def point(p):
+    return (p["centroid_lon"], p["centroid_lat"])
+
+
+def test_province_context_overrides_first_external_hit():
+    # LocationIQ ranks the Sindh match first; the batch is about Punjab
+    service, repo, geocoder = make_service(
+        [LAHORE, KASUR], {"Hyderabad Town": [point(HYDERABAD), point(JARANWALA)]}
+    )
+    results = asyncio.run(service.geocode_batch(["Lahore", "Hyderabad Town", "Kasur"], GeocodeOptions()))
+
+    assert [r.matched_places[0].name for r in results] == ["Lahore", "Jaranwala", "Kasur"]
+    assert results[1].matched_places[0].match_method == "point_in_polygon"
+    # Only the unresolved name goes external, and its fuzzy candidates are not re-queried
+    assert geocoder.calls == ["Hyderabad Town"]
+    assert repo.fuzzy_calls == 3
+    # Candidates were located once for disambiguation, no extra point-in-polygon
+    assert repo.point_calls == 2
+
+
+def test_single_location_keeps_first_external_hit():
+    service, _, _ = make_service([LAHORE], {"Hyderabad Town": [point(HYDERABAD), point(JARANWALA)]})
+    result = asyncio.run(service.geocode_location("Hyderabad Town", GeocodeOptions()))
+    assert result.matched_places[0].name == "Hyderabad"
+
+
+def test_centroid_decides_when_no_candidate_is_in_batch_provinces():
+    # Neither candidate is in Punjab; Mardan is closer to Lahore and Kasur
+    service, _, _ = make_service(
+        [LAHORE, KASUR], {"Shahbaz Garhi": [point(HYDERABAD), point(MARDAN)]}
+    )
+    results = asyncio.run(service.geocode_batch(["Lahore", "Kasur", "Shahbaz Garhi"], GeocodeOptions()))
+    assert results[2].matched_places[0].name == "Mardan"
+
+
+def test_first_pass_runs_concurrently():
+    names = ["Lahore", "Kasur"] * 3
+    service, repo, _ = make_service([LAHORE, KASUR], {}, delay=0.1)
+    start = time.perf_counter()
+    results = asyncio.run(service.geocode_batch(names, GeocodeOptions()))
+    elapsed = time.perf_counter() - start
+
+    assert [r.matched_places[0].name for r in results] == names
+    assert repo.fuzzy_calls == 6
+    assert elapsed < 0.3
+
+
+class BlockingQuery:
+    """Query builder whose execute() blocks like the sync Supabase client"""
+
+    def __init__(self, rows, delay=0.0):
+        self.rows = rows
+        self.delay = delay
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        time.sleep(self.delay)
+        return SimpleNamespace(data=self.rows)
+
+
+class BlockingFuzzyClient:
+    """Sync Supabase stand-in: fuzzy searches block for delay seconds, table queries find nothing"""
+
+    def __init__(self, known, delay):
+        self.known = {p["name"].lower(): p for p in known}
+        self.delay = delay
+
+    def rpc(self, name, params):
+        match = self.known.get(params["search_name"].lower())
+        return BlockingQuery([{**match, "similarity_score": 1.0}] if match else [], self.delay)
+
+    def table(self, name):
+        return BlockingQuery([])
+
+
+def test_first_pass_overlaps_on_the_postgrest_repository():
+    names = ["Lahore", "Kasur"] * 3
+    repo = PlacesRepository(BlockingFuzzyClient([LAHORE, KASUR], delay=0.1))
+    service = GeocodingService(repo, NameMatcher(repo), StubGeocoder({}), DirectionalParser())
+    start = time.perf_counter()
+    results = asyncio.run(service.geocode_batch(names, GeocodeOptions()))
+
+    assert [r.matched_places[0].name for r in results] == names
+    # Six blocking 0.1 s searches run in worker threads, not one after another
+    assert time.perf_counter() - start < 0.4
+
+
+def test_simple_batch_interface_uses_batch_context():
+    service, _, geocoder = make_service(
+        [LAHORE, KASUR], {"Hyderabad Town": [point(HYDERABAD), point(JARANWALA)]}
+    )
+    ids = asyncio.run(service.geocode_batch_simple(["Lahore", "Hyderabad Town", "Kasur", "Nowhere"]))
+    assert ids == [LAHORE["id"], JARANWALA["id"], KASUR["id"], ""]
+    assert geocoder.calls == ["Hyderabad Town", "Nowhere"]
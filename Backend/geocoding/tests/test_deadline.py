@@ -0,0 +1,132 @@
+"""
+Deadline-aware geocoding tests with in-memory stand-ins (no database or API needed).
+
+Usage:
+    python -m pytest geocoding/tests/test_deadline.py
+"""
+
+import asyncio
+import time
+import uuid
+
+from geocoding.models import GeocodeOptions
+from geocoding.services.directional_parser import DirectionalParser
+from geocoding.services.geocoding_service import GeocodingService
+from geocoding.services.name_matcher import NameMatcher
+
+LAHORE = {"id": str(uuid.uuid4()), "name": "Lahore", "hierarchy_level": 2}
+
+
+class SlowGeocoder:
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = 0
+
+    async def geocode(self, location, country_filter="pk", timeout=None):
+        self.calls += 1
+        await asyncio.sleep(min(self.delay, timeout or self.delay))
+        return []
+
+
+class StubRepo:
+    """Fuzzy search over one place: exact for "Lahore", 0.6 similar for anything else"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.fuzzy_calls = 0
+
+    async def search_by_fuzzy_name(self, name, threshold=0.85, max_results=10):
+        self.fuzzy_calls += 1
+        await asyncio.sleep(self.delay)
+        score = 1.0 if name.lower() == "lahore" else 0.6
+        return [{**LAHORE, "similarity_score": score}] if score > threshold else []
+
+
+class SlowAggregationRepo(StubRepo):
+    """Directional search answers at once; the aggregation lookups are slow"""
+
+    async def find_places_in_direction(self, base_place_ids, direction):
+        return [
+            {"id": str(uuid.uuid4()), "name": f"Tehsil {i}", "hierarchy_level": 3, "parent_id": LAHORE["id"]}
+            for i in range(3)
+        ]
+
+    async def get_children_counts_batch(self, parent_ids):
+        await asyncio.sleep(5.0)
+        return {}
+
+    async def get_by_ids_batch(self, place_ids):
+        return {}
+
+
+class RecordingCache:
+    def __init__(self):
+        self.stored = []
+
+    async def get(self, kind, raw_key, versioned=False):
+        return None
+
+    def set(self, kind, raw_key, value, ttl_seconds, versioned=False):
+        self.stored.append(raw_key)
+
+
+def make_service(matcher_delay=0.0, geocoder_delay=0.0, repo=None, result_cache=None):
+    repo = repo or StubRepo(matcher_delay)
+    geocoder = SlowGeocoder(geocoder_delay)
+    service = GeocodingService(
+        repo, NameMatcher(repo), geocoder, DirectionalParser(), result_cache=result_cache
+    )
+    return service, repo, geocoder
+
+
+def test_no_budget_keeps_full_fallback_chain():
+    service, repo, geocoder = make_service()
+    result = asyncio.run(service.geocode_location("Lahorr", GeocodeOptions()))
+    assert not result.timed_out
+    assert geocoder.calls == 1
+    assert "Did you mean: Lahore" in result.error
+    # Match and suggestions share one candidate query
+    assert repo.fuzzy_calls == 1
+
+
+def test_expensive_fallbacks_skipped_when_budget_is_short():
+    service, repo, geocoder = make_service()
+    result = asyncio.run(service.geocode_location("Lahorr", GeocodeOptions(timeout_ms=200)))
+    assert result.timed_out
+    assert geocoder.calls == 0
+
+
+def test_slow_stage_is_cut_off_at_the_deadline():
+    service, _, geocoder = make_service(geocoder_delay=5.0)
+    start = time.perf_counter()
+    result = asyncio.run(service.geocode_location("Lahorr", GeocodeOptions(timeout_ms=1600)))
+    elapsed = time.perf_counter() - start
+    assert result.timed_out and geocoder.calls == 1
+    assert elapsed < 2.0
+
+
+def test_batch_returns_partial_results():
+    service, _, geocoder = make_service(matcher_delay=0.05)
+    results = asyncio.run(service.geocode_batch(
+        ["Lahore", "Lahorr", "Lahore", "Lahorr"], GeocodeOptions(timeout_ms=400)
+    ))
+    # Names resolve in the first pass; the budget cannot cover the external second pass
+    assert [r.matched_places[0].name if r.matched_places else None for r in results] == [
+        "Lahore", None, "Lahore", None
+    ]
+    assert [r.timed_out for r in results] == [False, True, False, True]
+    assert geocoder.calls == 0
+
+
+def test_partial_directional_result_is_not_cached():
+    cache = RecordingCache()
+    service, _, _ = make_service(repo=SlowAggregationRepo(), result_cache=cache)
+    result = asyncio.run(service.geocode_location("Central Lahore", GeocodeOptions(timeout_ms=300)))
+
+    # Unaggregated places come back without an error, but must not be shared
+    assert result.timed_out and result.error is None
+    assert len(result.matched_places) == 3
+    assert cache.stored == []
+
+    full = asyncio.run(service.geocode_location("Lahore", GeocodeOptions()))
+    assert not full.timed_out and len(cache.stored) == 1
@@ -0,0 +1,210 @@
+"""
+Gazetteer snapshot tests (no database needed).
+
+Usage:
+    python -m pytest geocoding/tests/test_gazetteer.py
+"""
+
+import asyncio
+import struct
+import uuid
+
+import pytest
+
+from geocoding.gazetteer import (
+    GazetteerSnapshot, SnapshotFormatError, LiveGazetteer, GazetteerRefresher, encode_snapshot, write_snapshot
+)
+from geocoding.repositories.places_repository import PlacesRepository
+
+PUNJAB = str(uuid.uuid4())
+LAHORE = str(uuid.uuid4())
+KASUR = str(uuid.uuid4())
+RAVI = str(uuid.uuid4())
+POLYGON = struct.pack("<BI", 1, 3) + b"\x00" * 20
+
+PLACES = [
+    {"id": PUNJAB, "name": "Punjab", "parent_id": None, "hierarchy_level": 1,
+     "min_lon": 69.3, "min_lat": 27.7, "max_lon": 75.4, "max_lat": 34.0, "polygon_wkb": POLYGON.hex()},
+    {"id": LAHORE, "name": "Lahore", "parent_id": PUNJAB, "hierarchy_level": 2},
+    {"id": KASUR, "name": "Kasūr", "parent_id": PUNJAB, "hierarchy_level": 2},
+    {"id": RAVI, "name": "Ravi Town", "parent_id": LAHORE, "hierarchy_level": 3},
+]
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = tmp_path / "gazetteer.bin"
+    assert write_snapshot(PLACES, str(path), source_version=1234) == 4
+    snap = GazetteerSnapshot.open(str(path))
+    yield snap
+    snap.close()
+
+
+def test_round_trip(snapshot):
+    assert len(snapshot) == 4
+    assert snapshot.source_version == 1234
+
+    lahore = snapshot.get(LAHORE)
+    assert lahore == {
+        "id": LAHORE, "name": "Lahore", "hierarchy_level": 2,
+        "parent_id": PUNJAB, "parent_name": "Punjab",
+    }
+    assert snapshot.get(KASUR)["name"] == "Kasūr"
+    assert snapshot.get(uuid.UUID(PUNJAB))["parent_id"] is None
+    assert snapshot.get(str(uuid.uuid4())) is None
+    assert snapshot.get("not-a-uuid") is None
+
+
+def test_geometry_sections(snapshot):
+    punjab = snapshot.index_of(PUNJAB)
+    assert snapshot.bbox(punjab) == pytest.approx((69.3, 27.7, 75.4, 34.0), abs=1e-4)
+    assert bytes(snapshot.wkb(punjab)) == POLYGON
+
+    lahore = snapshot.index_of(LAHORE)
+    assert snapshot.bbox(lahore) is None
+    assert len(snapshot.wkb(lahore)) == 0
+
+
+def test_hierarchy(snapshot):
+    counts = snapshot.child_counts()
+    assert counts[snapshot.index_of(PUNJAB)] == 2
+    assert counts[snapshot.index_of(LAHORE)] == 1
+    assert counts[snapshot.index_of(RAVI)] == 0
+    assert {c["name"] for c in snapshot.children(PUNJAB)} == {"Lahore", "Kasūr"}
+    assert snapshot.children(PUNJAB, level=3) == []
+    assert snapshot.children(str(uuid.uuid4())) is None
+
+
+def test_rejects_other_files():
+    with pytest.raises(SnapshotFormatError):
+        GazetteerSnapshot(b"not a snapshot at all, just some bytes")
+
+    data = bytearray(encode_snapshot(PLACES))
+    data[8] = 99  # format version
+    with pytest.raises(SnapshotFormatError):
+        GazetteerSnapshot(bytes(data))
+
+
+class FailingClient:
+    """Supabase stand-in that fails every query, so only snapshot hits succeed"""
+
+    def table(self, name):
+        raise RuntimeError("database unavailable")
+
+
+def test_repository_serves_from_snapshot(snapshot):
+    repo = PlacesRepository(FailingClient(), gazetteer=LiveGazetteer(snapshot))
+    missing = str(uuid.uuid4())
+
+    async def run():
+        place = await repo.get_by_id(uuid.UUID(RAVI))
+        batch = await repo.get_by_ids_batch([uuid.UUID(LAHORE), uuid.UUID(missing)])
+        counts = await repo.get_children_counts_batch([uuid.UUID(PUNJAB), uuid.UUID(RAVI)])
+        children = await repo.get_children(uuid.UUID(LAHORE))
+        return place, batch, counts, children
+
+    place, batch, counts, children = asyncio.run(run())
+    assert place["parent_name"] == "Lahore"
+    assert set(batch) == {LAHORE}
+    assert counts == {PUNJAB: 2}
+    assert [c["id"] for c in children] == [RAVI]
+
+
+def change(place_id, name, parent_id, level, updated_at="2026-01-01T00:00:00+00:00", deleted=False):
+    return {
+        "id": place_id, "name": name, "parent_id": parent_id, "parent_name": None,
+        "hierarchy_level": level, "updated_at": updated_at, "deleted": deleted,
+    }
+
+
+def test_live_overlay(snapshot):
+    live = LiveGazetteer(snapshot)
+    assert live.version == 1234
+    versions = []
+    live.subscribe(versions.append)
+
+    shahdara = str(uuid.uuid4())
+    applied = live.apply([
+        change(LAHORE, "Lahore District", PUNJAB, 2),        # rename
+        change(RAVI, "Ravi Town", KASUR, 3),                  # moved to another parent
+        change(shahdara, "Shahdara Town", LAHORE, 3),         # new place
+        change(KASUR, None, None, None, deleted=True),        # deleted
+    ], version=2000)
+
+    assert applied == 4 and versions == [2000]
+    assert live.get(LAHORE)["name"] == "Lahore District"
+    assert live.get(KASUR) is None
+    assert live.get(shahdara)["parent_id"] == LAHORE
+    assert live.child_count(PUNJAB) == 1
+    assert live.child_count(LAHORE) == 1
+    assert [c["id"] for c in live.children(LAHORE)] == [shahdara]
+
+    # Re-applying the same rows (a poll at the same watermark) changes nothing
+    assert live.apply([change(LAHORE, "Lahore District", PUNJAB, 2)], version=2000) == 0
+    assert versions == [2000]
+
+
+def test_live_swap_is_copy_on_write(snapshot):
+    live = LiveGazetteer(snapshot)
+    before = live._state
+    live.apply([change(LAHORE, "Lahore City", PUNJAB, 2)], version=1500)
+    assert live._state is not before
+    assert before.overlay == {} and before.version == 1234
+
+
+class ChangesClient:
+    """Supabase stand-in answering places_changed_since from a list, one page at a time"""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = []
+
+    def rpc(self, name, params):
+        self.calls.append(params)
+        rows = [r for r in self.rows if (r["updated_at"], r["id"]) > (params["since"], params["after_id"] or "")]
+        self.data = rows[:params["page_size"]]
+        return self
+
+    def execute(self):
+        return self
+
+
+def test_refresher_pages_through_changes(snapshot):
+    live = LiveGazetteer(snapshot, version=0)
+    rows = [change(str(uuid.uuid4()), f"Place {i}", PUNJAB, 2, f"2026-01-01T00:00:0{i}+00:00") for i in range(5)]
+    client = ChangesClient(rows)
+    refresher = GazetteerRefresher(client, live, page_size=2)
+
+    assert asyncio.run(refresher.refresh_once()) == 5
+    assert len(client.calls) == 3
+    assert live.version == 1767225604000
+    assert live.child_count(PUNJAB) == 7
+
+
+class VersionClient:
+    """Supabase stand-in answering gazetteer_version with the latest places watermark"""
+
+    def __init__(self, watermark):
+        self.data = watermark
+
+    def rpc(self, name, params):
+        assert name == "gazetteer_version"
+        return self
+
+    def execute(self):
+        return self
+
+
+def test_refresh_without_snapshot_notifies_on_new_versions():
+    live = LiveGazetteer()
+    versions = []
+    live.subscribe(versions.append)
+    client = VersionClient("2026-01-01T00:00:00+00:00")
+    refresher = GazetteerRefresher(client, live)
+
+    asyncio.run(refresher.refresh_once())
+    asyncio.run(refresher.refresh_once())  # same watermark: nothing to report
+    client.data = "2026-01-02T00:00:00+00:00"
+    asyncio.run(refresher.refresh_once())
+    assert versions == [1767225600000, 1767312000000]
+    assert live.version == 1767312000000
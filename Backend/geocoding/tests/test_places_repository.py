@@ -0,0 +1,129 @@
+"""
+PostgREST repository tests with a blocking stand-in client (no database needed).
+
+Usage:
+    python -m pytest geocoding/tests/test_places_repository.py
+"""
+
+import asyncio
+import time
+import uuid
+from types import SimpleNamespace
+
+from geocoding.repositories.places_repository import PlacesRepository
+
+
+class BlockingQuery:
+    """Query builder whose execute() blocks like the sync Supabase client"""
+
+    def __init__(self, rows, delay):
+        self.rows = rows
+        self.delay = delay
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        time.sleep(self.delay)
+        return SimpleNamespace(data=self.rows)
+
+
+class BlockingClient:
+    def __init__(self, rows, delay=0.1):
+        self.rows = rows
+        self.delay = delay
+
+    def table(self, name):
+        return BlockingQuery(self.rows, self.delay)
+
+    def rpc(self, name, params):
+        return BlockingQuery(self.rows, self.delay)
+
+
+def test_requests_do_not_block_the_event_loop():
+    place = {"id": str(uuid.uuid4()), "name": "Lahore", "similarity_score": 1.0}
+    repo = PlacesRepository(BlockingClient([place]))
+
+    async def run():
+        ticks = []
+
+        async def ticker():
+            for _ in range(5):
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.02)
+
+        start = time.monotonic()
+        results = await asyncio.gather(
+            repo.search_by_fuzzy_name("Lahore"),
+            repo.search_by_fuzzy_name("Kasur"),
+            repo.get_children(uuid.uuid4()),
+            ticker(),
+        )
+        return results, ticks, time.monotonic() - start
+
+    results, ticks, elapsed = asyncio.run(run())
+    assert results[0] == [place] and results[2] == [place]
+    # Three 0.1 s requests overlap, and the loop kept running meanwhile
+    assert elapsed < 0.25
+    assert ticks[-1] - ticks[0] < 0.15
+
+
+class AliasesQuery:
+    """place_aliases query builder over a list, capped like PostgREST's max-rows"""
+
+    def __init__(self, rows, calls, max_rows):
+        self.rows = sorted(rows, key=lambda row: (row["place_id"], row["alias"]))
+        self.calls = calls
+        self.max_rows = max_rows
+        self.page_size = None
+
+    def select(self, columns):
+        return self
+
+    def order(self, column):
+        return self
+
+    def limit(self, n):
+        self.page_size = n
+        return self
+
+    def gt(self, column, value):
+        self.rows = [row for row in self.rows if row[column] > value]
+        return self
+
+    def gte(self, column, value):
+        self.rows = [row for row in self.rows if row[column] >= value]
+        return self
+
+    def execute(self):
+        self.calls.append(len(self.rows))
+        return SimpleNamespace(data=self.rows[:min(self.page_size, self.max_rows)])
+
+
+class AliasesClient:
+    def __init__(self, rows, max_rows=1000):
+        self.rows = rows
+        self.max_rows = max_rows
+        self.calls = []
+
+    def table(self, name):
+        return AliasesQuery(self.rows, self.calls, self.max_rows)
+
+
+def test_aliases_are_paged_past_the_row_cap():
+    place_ids = sorted(str(uuid.uuid4()) for _ in range(4))
+    rows = [{"place_id": pid, "alias": f"alias {i}"} for pid in place_ids for i in range(3)]
+    client = AliasesClient(rows)
+    aliases = asyncio.run(PlacesRepository(client).list_place_aliases(page_size=5))
+
+    # Pages end partway through a place; that place is fetched again from its first alias
+    assert sorted((a["place_id"], a["alias"]) for a in aliases) == sorted((r["place_id"], r["alias"]) for r in rows)
+    assert len(aliases) == len(rows) and len(client.calls) == 4
+
+
+def test_place_with_more_aliases_than_a_page_still_advances():
+    place_ids = sorted(str(uuid.uuid4()) for _ in range(2))
+    rows = [{"place_id": place_ids[0], "alias": f"alias {i}"} for i in range(6)]
+    rows.append({"place_id": place_ids[1], "alias": "other"})
+    aliases = asyncio.run(PlacesRepository(AliasesClient(rows)).list_place_aliases(page_size=4))
+    assert [a["alias"] for a in aliases] == ["alias 0", "alias 1", "alias 2", "alias 3", "other"]
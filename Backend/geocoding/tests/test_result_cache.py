@@ -0,0 +1,160 @@
+"""
+Shared result cache tests against an in-process fake RESP server (no Redis needed).
+
+Usage:
+    python -m pytest geocoding/tests/test_result_cache.py
+"""
+
+import asyncio
+import time
+import uuid
+
+import redis.asyncio as redis
+
+from geocoding.models import GeocodeOptions, GeocodeResult, MatchedPlace
+from geocoding.services.external_geocoder import ExternalGeocoder
+from geocoding.services.geocoding_service import GeocodingService
+from geocoding.services.result_cache import ResultCache
+
+
+class FakeRedisServer:
+    """Minimal RESP server: HELLO, GET, SET [EX], PING; other commands answer +OK"""
+
+    def __init__(self):
+        self.data = {}
+        self.commands = []
+        self.server = None
+
+    async def start(self) -> str:
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        host, port = self.server.sockets[0].getsockname()[:2]
+        return f"redis://{host}:{port}/0"
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def _read_command(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        args = []
+        for _ in range(int(line[1:])):
+            length = int((await reader.readline())[1:])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    async def _handle(self, reader, writer):
+        try:
+            while (args := await self._read_command(reader)) is not None:
+                name = args[0].decode().upper()
+                self.commands.append(name)
+                if name == "HELLO":
+                    writer.write(b"%1\r\n+proto\r\n:3\r\n")
+                elif name == "GET":
+                    value = self.data.get(args[1])
+                    writer.write(b"_\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value))
+                elif name == "SET":
+                    self.data[args[1]] = args[2]
+                    writer.write(b"+OK\r\n")
+                elif name == "PING":
+                    writer.write(b"+PONG\r\n")
+                else:
+                    writer.write(b"+OK\r\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+
+def run_with_server(test):
+    async def run():
+        server = FakeRedisServer()
+        url = await server.start()
+        client = redis.from_url(url, socket_timeout=0.5)
+        try:
+            await test(server, client)
+        finally:
+            await client.aclose()
+            await server.stop()
+    asyncio.run(run())
+
+
+def test_read_through_write_behind():
+    async def test(server, client):
+        version = [1]
+        cache = ResultCache(client, version=lambda: version[0])
+
+        assert await cache.get("geocode", "lahore", versioned=True) is None
+        cache.set("geocode", "lahore", {"ids": ["a", "b"], "name": "Lāhore"}, 60, versioned=True)
+        assert "SET" not in server.commands  # write-behind: nothing sent yet
+        await cache.flush()
+
+        stored = list(server.data.values())[0]
+        assert stored == '{"ids":["a","b"],"name":"Lāhore"}'.encode()
+        assert await cache.get("geocode", "lahore", versioned=True) == {"ids": ["a", "b"], "name": "Lāhore"}
+
+        version[0] = 2  # gazetteer refreshed: old entries no longer read
+        assert await cache.get("geocode", "lahore", versioned=True) is None
+
+    run_with_server(test)
+
+
+def test_outage_falls_through():
+    async def run():
+        # Nothing listens on this port
+        client = redis.from_url("redis://127.0.0.1:1/0", socket_connect_timeout=0.2)
+        cache = ResultCache(client, retry_after_seconds=60)
+
+        assert await cache.get("external", "karachi") is None
+        assert not cache.available
+
+        start = time.perf_counter()
+        assert await cache.get("external", "karachi") is None  # circuit open: no connection attempt
+        cache.set("external", "karachi", [[67.0, 24.8]], 60)
+        assert time.perf_counter() - start < 0.05
+        await cache.close()
+
+    asyncio.run(run())
+
+
+class CountingService(GeocodingService):
+    def __init__(self, result_cache):
+        super().__init__(None, None, None, None, result_cache=result_cache)
+        self.calls = 0
+
+    async def _geocode_location(self, location, options, batch_context=None, deadline=None):
+        self.calls += 1
+        return GeocodeResult(input=location, matched_places=[MatchedPlace(
+            id=uuid.UUID(int=1), name="Lahore", hierarchy_level=2, match_method="exact_name"
+        )])
+
+
+def test_geocoding_service_shares_results_across_replicas():
+    async def test(server, client):
+        replica_a = CountingService(ResultCache(client, version=lambda: 7))
+        replica_b = CountingService(ResultCache(client, version=lambda: 7))
+        options = GeocodeOptions()
+
+        first = await replica_a.geocode_location("Lahore", options)
+        await replica_a.result_cache.flush()
+        second = await replica_b.geocode_location(" lahore ", options)
+
+        assert second == first
+        assert (replica_a.calls, replica_b.calls) == (1, 0)
+
+    run_with_server(test)
+
+
+def test_external_geocoder_uses_shared_cache():
+    async def test(server, client):
+        cache = ResultCache(client)
+        seeded = ExternalGeocoder("", "http://unused.invalid", shared_cache=cache)
+        cache.set("external", seeded._get_cache_key("Swat"), [(72.36, 35.22)], 60)
+        await cache.flush()
+
+        geocoder = ExternalGeocoder("", "http://unused.invalid", shared_cache=ResultCache(client))
+        assert await geocoder.geocode("Swat") == [(72.36, 35.22)]
+
+    run_with_server(test)
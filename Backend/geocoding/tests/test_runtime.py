@@ -0,0 +1,93 @@
+"""
+GeocoderRuntime lifecycle tests with a stubbed service graph (no database or API needed).
+
+Usage:
+    python -m pytest geocoding/tests/test_runtime.py
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import geocoding.runtime as runtime_module
+from geocoding.runtime import GeocoderRuntime, WARMUP_PLACES
+
+
+class StubService:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    async def geocode_batch_simple(self, place_names):
+        self.calls.append(list(place_names))
+        if self.fail:
+            raise ConnectionError("database unavailable")
+        return [f"id-{name}" for name in place_names]
+
+
+@pytest.fixture
+def wiring(monkeypatch):
+    """Replace the dependency singletons the runtime builds; returns what was called"""
+    state = SimpleNamespace(service=StubService(), refresher_starts=0, cleanups=0)
+
+    def start_refresher():
+        state.refresher_starts += 1
+
+    async def cleanup():
+        state.cleanups += 1
+
+    monkeypatch.setattr(runtime_module, "get_settings", lambda: SimpleNamespace(locationiq_api_key=""))
+    monkeypatch.setattr(runtime_module, "get_supabase_client", lambda: object())
+    monkeypatch.setattr(runtime_module, "get_gazetteer_snapshot", lambda: None)
+    monkeypatch.setattr(runtime_module, "get_settlement_gazetteer", lambda: None)
+    monkeypatch.setattr(runtime_module, "get_shared_geocoding_service", lambda: state.service)
+    monkeypatch.setattr(runtime_module, "start_gazetteer_refresher", start_refresher)
+    monkeypatch.setattr(runtime_module, "cleanup_services", cleanup)
+    return state
+
+
+def test_setup_builds_the_shared_service_and_starts_refreshing(wiring):
+    runtime = GeocoderRuntime()
+    runtime.setup()
+    assert runtime.service is wiring.service
+    assert wiring.refresher_starts == 1
+
+
+def test_warm_resolves_the_warmup_places(wiring):
+    runtime = GeocoderRuntime()
+    runtime.setup()
+    asyncio.run(runtime.warm())
+    assert wiring.service.calls == [WARMUP_PLACES]
+
+
+def test_failed_or_disabled_warmup_is_not_fatal(wiring):
+    wiring.service.fail = True
+    runtime = GeocoderRuntime()
+    runtime.setup()
+    asyncio.run(runtime.warm())
+
+    disabled = GeocoderRuntime(warmup_places=[])
+    disabled.setup()
+    asyncio.run(disabled.warm())
+    assert wiring.service.calls == [WARMUP_PLACES]
+
+
+def test_geocode_sets_up_on_first_use(wiring):
+    runtime = GeocoderRuntime()
+    assert asyncio.run(runtime.geocode(["Lahore", "Kasur"])) == ["id-Lahore", "id-Kasur"]
+    assert wiring.refresher_starts == 1
+
+
+def test_geocode_error_returns_empty_ids(wiring):
+    wiring.service.fail = True
+    runtime = GeocoderRuntime()
+    runtime.setup()
+    assert asyncio.run(runtime.geocode(["Lahore", "Kasur"])) == ["", ""]
+
+
+def test_shutdown_releases_the_service(wiring):
+    runtime = GeocoderRuntime()
+    runtime.setup()
+    asyncio.run(runtime.shutdown())
+    assert runtime.service is None and wiring.cleanups == 1
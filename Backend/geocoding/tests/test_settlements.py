@@ -0,0 +1,98 @@
+"""
+Offline settlement gazetteer tests on a small synthetic GeoNames dump (no download needed).
+
+Usage:
+    python -m pytest geocoding/tests/test_settlements.py
+"""
+
+import asyncio
+import zipfile
+
+import httpx
+
+from geocoding.gazetteer.settlements import SettlementGazetteer, normalize_name
+from geocoding.services.external_geocoder import ExternalGeocoder
+
+
+def geonames_row(geonameid, name, alternates, lat, lon, feature_class="P", feature_code="PPL", population=0):
+    ascii_name = normalize_name(name).title()
+    return "\t".join([
+        str(geonameid), name, ascii_name, ",".join(alternates), str(lat), str(lon),
+        feature_class, feature_code, "PK", "", "04", "", "", "", str(population), "", "300",
+        "Asia/Karachi", "2024-01-01",
+    ])
+
+
+ROWS = [
+    geonames_row(1, "Shāhbāz Garhi", ["Shahbazgarhi", "شہباز گڑھی"], 34.2408, 72.1619, population=12000),
+    geonames_row(2, "Shahbaz Garhi Rock Edicts", ["Shahbaz Garhi"], 34.2450, 72.1650, "S", "HSTS"),
+    geonames_row(3, "Shahbaz Garhi", [], 30.1021, 71.4402, population=800),
+    geonames_row(4, "Babusar Top", ["Babusar Pass"], 35.1447, 74.0419, "T", "PASS"),
+    geonames_row(5, "Mardan", [], 34.1986, 72.0404, "P", "PPLA2", population=358604),
+    geonames_row(6, "Indus River", [], 24.0, 67.5, "H", "STM"),
+]
+
+
+def write_dump(tmp_path, zipped=False):
+    txt = tmp_path / "PK.txt"
+    txt.write_text("\n".join(ROWS) + "\n", encoding="utf-8")
+    if not zipped:
+        return str(txt)
+    archive = tmp_path / "PK.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("readme.txt", "GeoNames")
+        zf.write(txt, "PK.txt")
+    return str(archive)
+
+
+def test_exact_and_alternate_names(tmp_path):
+    gazetteer = SettlementGazetteer.load(write_dump(tmp_path, zipped=True))
+    assert len(gazetteer) == 5  # hydrographic features are not loaded
+    assert gazetteer.covers("pk") and not gazetteer.covers("in")
+
+    # Diacritics and alternate spellings resolve; the more populous place ranks
+    # first and the landmark 500 m from the town is collapsed into it
+    results = gazetteer.search("shahbaz garhi")
+    assert [(r["name"], r["population"]) for r in results] == [("Shāhbāz Garhi", 12000), ("Shahbaz Garhi", 800)]
+    assert gazetteer.search("Babusar Pass")[0]["feature_code"] == "PASS"
+    assert gazetteer.geocode("شہباز گڑھی") == [(72.1619, 34.2408)]
+
+
+def test_fuzzy_names(tmp_path):
+    gazetteer = SettlementGazetteer.load(write_dump(tmp_path))
+
+    typo = gazetteer.search("Babusar Topp")
+    assert typo[0]["name"] == "Babusar Top" and 0.9 <= typo[0]["score"] < 1.0
+    assert gazetteer.search("Mardann")[0]["name"] == "Mardan"
+    assert gazetteer.search("Murree") == []
+
+
+def test_nearby(tmp_path):
+    gazetteer = SettlementGazetteer.load(write_dump(tmp_path))
+    near = gazetteer.nearby(72.16, 34.24, radius_km=15)
+    assert [s["name"] for s in near] == ["Shāhbāz Garhi", "Shahbaz Garhi Rock Edicts", "Mardan"]
+    assert near[0]["distance_km"] < near[1]["distance_km"] < 15
+    assert gazetteer.nearby(72.16, 34.24, radius_km=15, limit=1)[0]["name"] == "Shāhbāz Garhi"
+
+
+def test_external_geocoder_uses_network_only_for_misses(tmp_path):
+    requests = []
+
+    def handler(request):
+        requests.append(request.url.params["q"])
+        return httpx.Response(200, json=[{"lon": "73.0", "lat": "33.9"}])
+
+    async def run():
+        geocoder = ExternalGeocoder("key", "https://locationiq.test", settlements=SettlementGazetteer.load(write_dump(tmp_path)))
+        geocoder._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        try:
+            hit = await geocoder.geocode("Mardan")
+            miss = await geocoder.geocode("Murree")
+        finally:
+            await geocoder._client.aclose()
+        return hit, miss
+
+    hit, miss = asyncio.run(run())
+    assert hit == [(72.0404, 34.1986)]
+    assert miss == [(73.0, 33.9)]
+    assert requests == ["Murree"]
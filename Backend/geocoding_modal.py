@@ -65,107 +65,112 @@ image = (
         "httpx",
         "rapidfuzz",
         "geopy",
-        "redis"
+        "redis",
+        "asyncpg"
     )
     .add_local_dir("geocoding", remote_path="/root/geocoding"))
 
 app = modal.App(name="reach-geocoder", image=image)
 
+# Binary gazetteer snapshot, uploaded with:
+#   python -m geocoding.gazetteer.builder --out gazetteer.bin
+#   modal volume put reach-gazetteer gazetteer.bin /gazetteer.bin
+# and the GeoNames settlement dump (https://download.geonames.org/export/dump/PK.zip):
+#   modal volume put reach-gazetteer PK.zip /PK.zip
+gazetteer_volume = modal.Volume.from_name("reach-gazetteer", create_if_missing=True)
+GAZETTEER_DIR = "/gazetteer"
+
 #################################################
-# GEOCODING FUNCTION
+# GEOCODER CLASS (warm container)
 #################################################
 
-@app.function(
+@app.cls(
     secrets=[modal.Secret.from_name("reach-secrets")],
-    timeout=300  # 5 minutes timeout
+    volumes={GAZETTEER_DIR: gazetteer_volume},
+    timeout=300,  # 5 minutes timeout
+    scaledown_window=600  # keep warm containers (and their caches) for 10 minutes
 )
-async def geocode_places(place_names: List[str]) -> List[str]:
+class Geocoder:
     """
-    Internal function that performs the actual geocoding.
-    Uses the geocoding service to convert place names to IDs.
-    
-    Args:
-        place_names: List of place name strings
-        
-    Returns:
-        List of place ID strings (empty string if no match)
+    One warm GeocoderRuntime per container: settings, clients and caches are set up
+    once in the enter hook, so each request only does the lookup.
     """
-    import logging
-    from geocoding import get_geocoding_service
     
-    # Setup logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-    )
-    logger = logging.getLogger(__name__)
+    @modal.enter()
+    async def start(self):
+        from geocoding.runtime import GeocoderRuntime
+        
+        snapshot_path = os.path.join(GAZETTEER_DIR, "gazetteer.bin")
+        if os.path.exists(snapshot_path):
+            os.environ.setdefault("GAZETTEER_SNAPSHOT_PATH", snapshot_path)
+        settlements_path = os.path.join(GAZETTEER_DIR, "PK.zip")
+        if os.path.exists(settlements_path):
+            os.environ.setdefault("SETTLEMENT_GAZETTEER_PATH", settlements_path)
+        
+        self.runtime = GeocoderRuntime()
+        self.runtime.setup()
+        await self.runtime.warm()
     
-    try:
-        logger.info(f"Geocoding {len(place_names)} places")
+    @modal.method()
+    async def geocode_places(self, place_names: List[str]) -> List[str]:
+        """
+        Geocode place names for other Modal functions.
         
-        # Initialize the geocoding service
-        service = get_geocoding_service()
+        Args:
+            place_names: List of place name strings
+            
+        Returns:
+            List of place ID strings (empty string if no match)
+        """
+        return await self.runtime.geocode(place_names)
+    
+    # Same URL as the former function endpoint, so MODAL_GEOCODER does not change
+    @modal.fastapi_endpoint(method="POST", label="reach-geocoder-geocode")
+    async def geocode(
+        self,
+        token: HTTPAuthorizationCredentials = Depends(auth_scheme),
+        request: GeocodeRequest = GeocodeRequest(place_names=[])
+    ) -> GeocodeResponse:
+        """
+        FastAPI endpoint that authenticates requests and geocodes place names.
         
-        # Use the simple batch geocoding interface
-        place_ids = await service.geocode_batch_simple(place_names)
+        Accepts a list of place name strings and returns their corresponding place IDs
+        from the Pakistan administrative boundary hierarchy. Geocoding runs in-process
+        on the warm runtime.
         
-        logger.info(f"Successfully geocoded {len([id for id in place_ids if id])} places")
-        return place_ids
+        Args:
+            token: Bearer token for authentication
+            request: GeocodeRequest containing list of place names
+            
+        Returns:
+            GeocodeResponse with place IDs
+            
+        Raises:
+            HTTPException: If authentication fails or request is invalid
+        """
+        # Validate authentication
+        if token.credentials != os.environ.get("SECRET_KEY"):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid authentication token",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
         
-    except Exception as e:
-        logger.error(f"Geocoding error: {e}", exc_info=True)
-        # Return empty strings for all places on error
-        return [""] * len(place_names)
-
-#################################################
-# WEB ENDPOINT (Authentication & Request Handling)
-#################################################
-
-@app.function(secrets=[modal.Secret.from_name("reach-secrets")])
-@modal.fastapi_endpoint(method="POST")
-async def geocode(
-    token: HTTPAuthorizationCredentials = Depends(auth_scheme),
-    request: GeocodeRequest = GeocodeRequest(place_names=[])
-) -> GeocodeResponse:
-    """
-    FastAPI endpoint that authenticates requests and geocodes place names.
-    
-    Accepts a list of place name strings and returns their corresponding place IDs
-    from the Pakistan administrative boundary hierarchy.
-    
-    Args:
-        token: Bearer token for authentication
-        request: GeocodeRequest containing list of place names
+        # Validate request
+        if not request.place_names:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="place_names list cannot be empty"
+            )
         
-    Returns:
-        GeocodeResponse with place IDs
+        # Perform geocoding
+        place_ids = await self.runtime.geocode(request.place_names)
         
-    Raises:
-        HTTPException: If authentication fails or request is invalid
-    """
-    # Validate authentication
-    if token.credentials != os.environ.get("SECRET_KEY"):
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid authentication token",
-            headers={"WWW-Authenticate": "Bearer"},
+        return GeocodeResponse(
+            status="success",
+            place_ids=place_ids,
+            count=len(place_ids)
         )
-    
-    # Validate request
-    if not request.place_names:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="place_names list cannot be empty"
-        )
-    
-    # Perform geocoding
-    place_ids = await geocode_places.remote.aio(request.place_names)
-    
-    return GeocodeResponse(
-        status="success",
-        place_ids=place_ids,
-        count=len(place_ids)
-    )
 
 #################################################
 # HEALTH CHECK ENDPOINT
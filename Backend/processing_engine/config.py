@@ -0,0 +1,82 @@
+import os
+from utils import load_env
+
+# Load env into the system
+load_env()
+
+# PGMQ queues
+QUEUE_NAME = os.getenv("PROCESSING_QUEUE", "processing_queue")
+URGENT_QUEUE_NAME = os.getenv("PROCESSING_URGENT_QUEUE", "processing_queue_urgent")
+DEAD_LETTER_QUEUE = os.getenv("PROCESSING_DEAD_LETTER_QUEUE", "processing_dlq")
+
+# Deliveries (pgmq read_ct) a message gets before it is moved to the dead-letter queue
+MAX_READ_COUNT = int(os.getenv("PROCESSING_MAX_READ_COUNT", "3"))
+
+# Visibility timeout (seconds) set when a job is read; a heartbeat keeps extending it while the job runs
+VISIBILITY_TIMEOUT = int(os.getenv("PROCESSING_VISIBILITY_TIMEOUT", "60"))
+HEARTBEAT_INTERVAL = int(os.getenv("PROCESSING_HEARTBEAT_INTERVAL", "20"))
+
+# Cancel a job (and stop extending its visibility) when it has not finished a stage for this long
+STALL_TIMEOUT = int(os.getenv("PROCESSING_STALL_TIMEOUT", "1800"))
+
+# Processing lanes as "queue:weight" pairs; workers read from lanes in smooth weighted round-robin order
+LANES = [
+    (name.strip(), int(weight))
+    for name, weight in (
+        lane.split(":") for lane in os.getenv(
+            "PROCESSING_LANES", f"{URGENT_QUEUE_NAME}:3,{QUEUE_NAME}:1"
+        ).split(",")
+    )
+]
+
+# Seconds before a lane that came back empty is read again
+LANE_PROBE_INTERVAL = int(os.getenv("PROCESSING_LANE_PROBE_INTERVAL", "30"))
+
+# Extraction models (llm_configs.json keys); more than one spreads jobs across providers through LLMRouter
+LLM_ROUTES = [
+    model.strip()
+    for model in os.getenv("PROCESSING_LLM_ROUTES", "ernie-4.5-vl-thinking:baidu").split(",")
+    if model.strip()
+]
+
+# LLM call resilience: overall deadline per call, per-attempt timeout and retry budget (seconds / count)
+LLM_CALL_DEADLINE = float(os.getenv("PROCESSING_LLM_DEADLINE", "1200"))
+LLM_ATTEMPT_TIMEOUT = float(os.getenv("PROCESSING_LLM_ATTEMPT_TIMEOUT", "600"))
+LLM_MAX_RETRIES = int(os.getenv("PROCESSING_LLM_MAX_RETRIES", "2"))
+
+# Hedging: after the p95 latency (or the initial delay until enough samples exist) a second
+# request is sent to PROCESSING_LLM_HEDGE_MODEL (or the same model) and the first valid response wins.
+# Streamed extraction (PROCESSING_STREAM_GEOCODE) is hedged too: the hedge is buffered and replayed to
+# the area prefetch only if it wins, so areas the losing stream already listed are geocoded early for nothing
+LLM_HEDGE = os.getenv("PROCESSING_LLM_HEDGE", "false").lower() == "true"
+LLM_HEDGE_MODEL = os.getenv("PROCESSING_LLM_HEDGE_MODEL") or None
+LLM_HEDGE_INITIAL_DELAY = float(os.getenv("PROCESSING_LLM_HEDGE_DELAY", "240"))
+
+# Model cascade: simple documents go to the cheaper non-thinking model first and are
+# escalated to the routed model when its output fails validation or the document is complex
+LLM_CASCADE = os.getenv("PROCESSING_LLM_CASCADE", "false").lower() == "true"
+CASCADE_FAST_MODEL = os.getenv("PROCESSING_CASCADE_FAST_MODEL", "ernie-4.5-vl:baidu")
+CASCADE_MAX_PAGES = int(os.getenv("PROCESSING_CASCADE_MAX_PAGES", "2"))
+# Share of strongly coloured pixels above which a page is treated as a map
+CASCADE_MAX_MAP_DENSITY = float(os.getenv("PROCESSING_CASCADE_MAX_MAP_DENSITY", "0.12"))
+
+# Start geocoding each area list as soon as it appears in the streamed LLM completion
+STREAM_GEOCODE = os.getenv("PROCESSING_STREAM_GEOCODE", "true").lower() == "true"
+
+# Page-chunked extraction: documents longer than PROCESSING_CHUNK_MIN_PAGES are split into groups of
+# PROCESSING_CHUNK_PAGES pages that are extracted concurrently and merged (0 disables chunking)
+CHUNK_PAGES = int(os.getenv("PROCESSING_CHUNK_PAGES", "0"))
+CHUNK_MIN_PAGES = int(os.getenv("PROCESSING_CHUNK_MIN_PAGES", "6"))
+
+# Near-duplicate detection over the document text layer: off | flag | skip | diff
+# (diff sends near-duplicates to a cheap text-only prompt against the earlier document's alert)
+DEDUP_MODE = os.getenv("PROCESSING_DEDUP_MODE", "flag").lower()
+DEDUP_THRESHOLD = float(os.getenv("PROCESSING_DEDUP_THRESHOLD", "0.85"))
+DEDUP_LOOKBACK_DAYS = int(os.getenv("PROCESSING_DEDUP_LOOKBACK_DAYS", "14"))
+DEDUP_MIN_WORDS = int(os.getenv("PROCESSING_DEDUP_MIN_WORDS", "30"))
+
+# Geocoding: "http" posts area lists to the MODAL_GEOCODER endpoint, "embedded" runs the
+# geocoding package in this process with one shared GeocodingService. Embedded lookups share the
+# worker's event loop with LLM streams and heartbeats: PLACES_BACKEND=asyncpg is the better fit,
+# and the default PostgREST backend runs each request in a worker thread so it never blocks the loop
+GEOCODER_MODE = os.getenv("GEOCODER_MODE", "http").lower()
@@ -0,0 +1,269 @@
+-- Processing engine database objects
+-- Run in the Supabase SQL Editor (pgmq and the processing_queue are assumed to exist)
+
+-- Dead-letter queue for jobs that exhausted their retry budget
+SELECT pgmq.create('processing_dlq');
+
+-- Page through a queue without reading it: pgmq.read would hide the messages for
+-- the visibility timeout and count a delivery (used to list and requeue dead letters)
+CREATE OR REPLACE FUNCTION pgmq_public.peek(
+    queue_name TEXT,
+    after_msg_id BIGINT DEFAULT 0,
+    max_messages INTEGER DEFAULT 100,
+    message_ids BIGINT[] DEFAULT NULL
+)
+RETURNS TABLE (
+    msg_id BIGINT,
+    read_ct INTEGER,
+    enqueued_at TIMESTAMPTZ,
+    message JSONB
+) AS $$
+BEGIN
+    RETURN QUERY EXECUTE format(
+        'SELECT q.msg_id, q.read_ct, q.enqueued_at, q.message FROM pgmq.%I q
+         WHERE q.msg_id > $1 AND ($3 IS NULL OR q.msg_id = ANY($3))
+         ORDER BY q.msg_id LIMIT $2',
+        'q_' || queue_name
+    ) USING after_msg_id, max_messages, message_ids;
+END;
+$$ LANGUAGE plpgsql STABLE SET search_path = '';
+
+GRANT EXECUTE ON FUNCTION pgmq_public.peek(TEXT, BIGINT, INTEGER, BIGINT[]) TO service_role;
+
+-- Per-stage checkpoints so redelivered queue messages resume instead of restarting
+CREATE TABLE IF NOT EXISTS processing_checkpoints (
+    document_id UUID PRIMARY KEY REFERENCES documents(id) ON DELETE CASCADE,
+    msg_id BIGINT,
+    pages JSONB,          -- {"url": ..., "page_count": ...}; pages are re-rendered on resume
+    llm_output TEXT,      -- raw LLM completion
+    parsed_alert JSONB,   -- {"structured_text": ..., "alert": ...}
+    alert_areas JSONB,    -- geocoded alert_areas rows
+    last_error TEXT,      -- failure reason of the latest delivery
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+
+-- One alert_areas row per (alert, place) so reprocessing can upsert instead of delete-and-insert.
+-- Remove duplicates left by earlier delete-and-insert runs before adding the constraint.
+DELETE FROM alert_areas a
+USING alert_areas b
+WHERE a.alert_id = b.alert_id
+    AND a.place_id = b.place_id
+    AND a.id > b.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_alert_areas_alert_place
+ON alert_areas(alert_id, place_id);
+
+-- Save a processed alert in a single transaction:
+-- update the document, upsert its alert and apply the alert_areas delta.
+-- Returns the id of the stored alert (the existing id when reprocessing).
+CREATE OR REPLACE FUNCTION save_processed_alert(
+    document_id UUID,
+    structured_text JSONB,
+    alert JSONB,
+    areas JSONB
+)
+RETURNS UUID AS $$
+#variable_conflict use_column
+DECLARE
+    saved_alert_id UUID;
+BEGIN
+    UPDATE documents
+    SET processed_at = CURRENT_TIMESTAMP,
+        structured_text = save_processed_alert.structured_text
+    WHERE id = save_processed_alert.document_id;
+
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Document % not found', save_processed_alert.document_id;
+    END IF;
+
+    -- One alert per document: keep the existing id when the document is reprocessed
+    INSERT INTO alerts (
+        id, document_id, category, event, urgency, severity,
+        description, instruction, effective_from, effective_until
+    )
+    SELECT
+        COALESCE(a.id, gen_random_uuid()), save_processed_alert.document_id,
+        a.category, a.event, a.urgency, a.severity,
+        a.description, a.instruction, a.effective_from, a.effective_until
+    FROM jsonb_populate_record(NULL::alerts, save_processed_alert.alert) a
+    ON CONFLICT (document_id) DO UPDATE SET
+        category = EXCLUDED.category,
+        event = EXCLUDED.event,
+        urgency = EXCLUDED.urgency,
+        severity = EXCLUDED.severity,
+        description = EXCLUDED.description,
+        instruction = EXCLUDED.instruction,
+        effective_from = EXCLUDED.effective_from,
+        effective_until = EXCLUDED.effective_until
+    RETURNING alerts.id INTO saved_alert_id;
+
+    -- Apply only the delta against the stored alert_areas (one row per place)
+    WITH incoming AS (
+        SELECT DISTINCT ON (r.place_id) r.*
+        FROM jsonb_populate_recordset(NULL::alert_areas, COALESCE(save_processed_alert.areas, '[]'::jsonb))
+            WITH ORDINALITY AS r
+        WHERE r.place_id IS NOT NULL
+        ORDER BY r.place_id, r.ordinality
+    ),
+    removed AS (
+        DELETE FROM alert_areas aa
+        WHERE aa.alert_id = saved_alert_id
+            AND NOT EXISTS (SELECT 1 FROM incoming i WHERE i.place_id = aa.place_id)
+    )
+    INSERT INTO alert_areas (
+        alert_id, place_id, specific_effective_from, specific_effective_until,
+        specific_urgency, specific_severity, specific_instruction
+    )
+    SELECT
+        saved_alert_id, i.place_id, i.specific_effective_from, i.specific_effective_until,
+        i.specific_urgency, i.specific_severity, i.specific_instruction
+    FROM incoming i
+    ON CONFLICT (alert_id, place_id) DO UPDATE SET
+        specific_effective_from = EXCLUDED.specific_effective_from,
+        specific_effective_until = EXCLUDED.specific_effective_until,
+        specific_urgency = EXCLUDED.specific_urgency,
+        specific_severity = EXCLUDED.specific_severity,
+        specific_instruction = EXCLUDED.specific_instruction
+    WHERE (alert_areas.specific_effective_from, alert_areas.specific_effective_until,
+           alert_areas.specific_urgency, alert_areas.specific_severity, alert_areas.specific_instruction)
+        IS DISTINCT FROM
+          (EXCLUDED.specific_effective_from, EXCLUDED.specific_effective_until,
+           EXCLUDED.specific_urgency, EXCLUDED.specific_severity, EXCLUDED.specific_instruction);
+
+    RETURN saved_alert_id;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Expose pgmq.set_vt next to the other pgmq_public wrappers so workers can
+-- extend the visibility timeout of a message they are still processing
+CREATE OR REPLACE FUNCTION pgmq_public.set_vt(
+    queue_name TEXT,
+    message_id BIGINT,
+    sleep_seconds INTEGER
+)
+RETURNS SETOF pgmq.message_record AS $$
+BEGIN
+    RETURN QUERY
+    SELECT * FROM pgmq.set_vt(queue_name := queue_name, msg_id := message_id, vt := sleep_seconds);
+END;
+$$ LANGUAGE plpgsql SET search_path = '';
+
+GRANT EXECUTE ON FUNCTION pgmq_public.set_vt(TEXT, BIGINT, INTEGER) TO service_role;
+
+-- Priority lanes: scrapers store a 0-100 priority score on each document and the
+-- enqueue trigger routes high-priority documents to the urgent lane
+SELECT pgmq.create('processing_queue_urgent');
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS priority SMALLINT;
+
+-- Lane settings read by the enqueue trigger; the urgent threshold is defined only here
+CREATE TABLE IF NOT EXISTS processing_lane_settings (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),  -- single row
+    urgent_min_priority SMALLINT NOT NULL DEFAULT 70
+);
+
+INSERT INTO processing_lane_settings DEFAULT VALUES ON CONFLICT (id) DO NOTHING;
+
+-- Enqueue every new document on its lane
+CREATE OR REPLACE FUNCTION enqueue_document()
+RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pgmq.send(
+        CASE WHEN COALESCE(NEW.priority, 0) >= (SELECT urgent_min_priority FROM processing_lane_settings)
+            THEN 'processing_queue_urgent'
+            ELSE 'processing_queue'
+        END,
+        jsonb_build_object(
+            'url', NEW.url,
+            'title', NEW.title,
+            'source', NEW.source,
+            'filename', NEW.filename,
+            'filetype', NEW.filetype,
+            'raw_text', NEW.raw_text,
+            'document_id', NEW.id,
+            'posted_date', NEW.posted_date,
+            'priority', NEW.priority
+        )
+    );
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+-- documents_enqueue replaces any enqueue trigger created outside this file: drop that
+-- trigger by name before running this, or every new document is queued twice
+DROP TRIGGER IF EXISTS documents_enqueue ON documents;
+CREATE TRIGGER documents_enqueue
+AFTER INSERT ON documents
+FOR EACH ROW EXECUTE FUNCTION enqueue_document();
+
+-- Per-stage timings and LLM token usage for every processed document
+CREATE TABLE IF NOT EXISTS document_timings (
+    id BIGSERIAL PRIMARY KEY,
+    document_id UUID REFERENCES documents(id) ON DELETE CASCADE,
+    msg_id BIGINT,
+    queue_name TEXT,
+    model TEXT,
+    stages JSONB NOT NULL,  -- {"fetch": 0.41, "rasterize": 0.08, ..., "upload": 0.12} in seconds
+    time_to_first_token FLOAT8,
+    prompt_tokens INT,
+    completion_tokens INT,
+    total_tokens INT,
+    total_time FLOAT8,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_document_timings_created_at
+ON document_timings(created_at);
+
+-- p50/p95 seconds per stage and model over a date range (time_to_first_token reported as stage 'ttft')
+CREATE OR REPLACE FUNCTION stage_timing_percentiles(
+    from_ts TIMESTAMPTZ,
+    to_ts TIMESTAMPTZ
+)
+RETURNS TABLE (
+    model TEXT,
+    stage TEXT,
+    samples BIGINT,
+    p50 FLOAT8,
+    p95 FLOAT8
+) AS $$
+BEGIN
+    RETURN QUERY
+    WITH samples_in_range AS (
+        SELECT t.model, s.key AS stage, s.value::FLOAT8 AS seconds
+        FROM document_timings t, jsonb_each_text(t.stages) s
+        WHERE t.created_at >= from_ts AND t.created_at < to_ts
+        UNION ALL
+        SELECT t.model, 'ttft', t.time_to_first_token
+        FROM document_timings t
+        WHERE t.created_at >= from_ts AND t.created_at < to_ts
+            AND t.time_to_first_token IS NOT NULL
+    )
+    SELECT
+        r.model,
+        r.stage,
+        COUNT(*),
+        percentile_cont(0.5) WITHIN GROUP (ORDER BY r.seconds),
+        percentile_cont(0.95) WITHIN GROUP (ORDER BY r.seconds)
+    FROM samples_in_range r
+    GROUP BY r.model, r.stage
+    ORDER BY r.model, r.stage;
+END;
+$$ LANGUAGE plpgsql STABLE;
+
+-- MinHash signatures of document text layers for near-duplicate detection
+CREATE TABLE IF NOT EXISTS document_signatures (
+    document_id UUID PRIMARY KEY REFERENCES documents(id) ON DELETE CASCADE,
+    signature BIGINT[] NOT NULL,   -- 128 MinHash values
+    bands TEXT[] NOT NULL,         -- LSH bucket keys "band:hash"; any shared key makes a candidate
+    near_duplicate_of UUID REFERENCES documents(id) ON DELETE SET NULL,
+    processed_at TIMESTAMPTZ,      -- set once the alert is uploaded; only processed documents are candidates
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Candidate lookup (bands && ARRAY[...]) within the lookback window
+CREATE INDEX IF NOT EXISTS idx_document_signatures_bands
+ON document_signatures USING gin(bands);
+
+CREATE INDEX IF NOT EXISTS idx_document_signatures_processed_at
+ON document_signatures(processed_at);
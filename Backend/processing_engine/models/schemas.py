@@ -14,6 +14,7 @@ class DocumentPayload(BaseModel):
     raw_text: Optional[str] = None
     document_id: str
     posted_date: str
+    priority: Optional[int] = None
 
 class QueueJob(BaseModel):
     """Complete schema for a PGMQ queue job"""
@@ -22,6 +23,7 @@ class QueueJob(BaseModel):
     enqueued_at: datetime
     vt: datetime
     message: DocumentPayload
+    queue_name: str = "processing_queue"
 
 class ExtractedContent(BaseModel):
     """Output from document processor"""
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from processing_engine.processor_utils.json_repair import repair_json
+
+logger = logging.getLogger(__name__)
+
+
+class AreaStreamParser:
+    """
+    Incremental scanner over a streamed extraction completion. Calls on_area with each
+    element of the top-level `areas` array as soon as its closing brace arrives.
+    Malformed fragments are skipped; the final parse of the full completion stays authoritative.
+    """
+    def __init__(self, on_area: Callable[[dict], None]):
+        self.on_area = on_area
+        self.start()
+
+    def start(self):
+        """Reset for a new completion (retries and escalations restart the stream)"""
+        self._text = ""
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._string_start = 0
+        self._pending_key: Optional[str] = None
+        self._key: Optional[str] = None
+        self._areas_depth: Optional[int] = None
+        self._area_start: Optional[int] = None
+
+    def feed(self, delta: str):
+        offset = len(self._text)
+        self._text += delta
+        for i in range(offset, len(self._text)):
+            self._scan(self._text, i)
+
+    def _scan(self, text: str, i: int):
+        char = text[i]
+        if self._in_string:
+            if self._escaped:
+                self._escaped = False
+            elif char == "\\":
+                self._escaped = True
+            elif char == '"':
+                self._in_string = False
+                if self._depth == 1:
+                    self._pending_key = text[self._string_start:i]
+            return
+
+        if char == '"':
+            self._in_string = True
+            self._string_start = i + 1
+        elif char == ":" and self._depth == 1:
+            self._key = self._pending_key
+        elif char in "{[":
+            self._depth += 1
+            if char == "[" and self._depth == 2 and self._key == "areas":
+                self._areas_depth = self._depth
+            elif char == "{" and self._areas_depth is not None and self._depth == self._areas_depth + 1:
+                self._area_start = i
+        elif char in "}]":
+            if char == "}" and self._area_start is not None and self._depth == self._areas_depth + 1:
+                self._emit(text[self._area_start:i + 1])
+                self._area_start = None
+            elif char == "]" and self._depth == self._areas_depth:
+                self._areas_depth = None
+            self._depth = max(0, self._depth - 1)
+
+    def _emit(self, fragment: str):
+        try:
+            area = repair_json(fragment)
+        except ValueError:
+            return
+        if isinstance(area.get("place_names"), str):
+            area["place_names"] = [area["place_names"]]
+        if area.get("place_names"):
+            self.on_area(area)
+
+
+def area_key(place_names: List[str]) -> Tuple[str, ...]:
+    return tuple(name.strip() for name in place_names)
+
+
+class GeocodePrefetch:
+    """
+    Stream consumer (start/feed) that starts geocoding every area list while the LLM is
+    still generating the rest of the completion. geocode_areas then awaits the matching
+    task instead of calling the geocoder on the critical path.
+    """
+    def __init__(self, geocode: Callable[[List[str]], Awaitable[List[str]]]):
+        self.geocode = geocode
+        self.tasks: Dict[Tuple[str, ...], asyncio.Task] = {}
+        self.parser = AreaStreamParser(self._on_area)
+
+    def start(self):
+        # Tasks from an abandoned stream are kept: an escalated run often lists the same areas
+        self.parser.start()
+
+    def feed(self, delta: str):
+        self.parser.feed(delta)
+
+    def consumer(self) -> AreaStreamParser:
+        """Separate stream consumer sharing this prefetch's tasks, for concurrent completions"""
+        return AreaStreamParser(self._on_area)
+
+    def _on_area(self, area: dict):
+        key = area_key(area["place_names"])
+        if key in self.tasks:
+            return
+        task = asyncio.create_task(self.geocode(list(key)))
+        # Failures surface when the task is awaited; unused tasks must not log unretrieved errors
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self.tasks[key] = task
+
+    def pop(self, place_names: List[str]) -> Optional[asyncio.Task]:
+        return self.tasks.pop(area_key(place_names), None)
+
+    def cancel_unused(self):
+        for task in self.tasks.values():
+            task.cancel()
+        if self.tasks:
+            logger.info(f"Discarded {len(self.tasks)} prefetched geocodes not in the final output")
+        self.tasks.clear()
@@ -0,0 +1,91 @@
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+from processing_engine.models.schemas import QueueJob
+
+# Pipeline stages in execution order; each name is also a column of the checkpoint table
+STAGES = ("pages", "llm_output", "parsed_alert", "alert_areas")
+
+
+class CheckpointStore:
+    """
+    Persists the output of each pipeline stage keyed by document_id, so a
+    redelivered queue message resumes at the first incomplete stage instead
+    of re-running the whole job.
+    """
+    def __init__(self, supabase, table: str = "processing_checkpoints"):
+        self.logger = logging.getLogger(__name__)
+        self.db = supabase
+        self.table = table
+
+    async def load(self, document_id: str) -> Dict[str, Any]:
+        """Return the saved stage outputs for a document (empty dict if none)"""
+        try:
+            response = await self.db.table(self.table).select("*").eq("document_id", document_id).limit(1).execute()
+            if response.data:
+                return response.data[0]
+        except Exception as e:
+            self.logger.warning(f"Could not load checkpoint for document {document_id}: {e}")
+        return {}
+
+    async def save(self, job: QueueJob, stage: str, value: Any) -> bool:
+        """Upsert a single stage output; failures are logged but never fail the job"""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown checkpoint stage: {stage}")
+        try:
+            await self.db.table(self.table).upsert({
+                "document_id": job.message.document_id,
+                "msg_id": job.msg_id,
+                stage: value,
+                "updated_at": datetime.now(timezone.utc).isoformat()
+            }, on_conflict="document_id").execute()
+            return True
+        except Exception as e:
+            self.logger.warning(f"Could not save '{stage}' checkpoint for job {job.msg_id}: {e}")
+            return False
+
+    async def discard(self, document_id: str, *stages: str) -> bool:
+        """Forget stage outputs that turned out to be unusable so the next delivery regenerates them"""
+        try:
+            await self.db.table(self.table).update({stage: None for stage in stages}).eq("document_id", document_id).execute()
+            return True
+        except Exception as e:
+            self.logger.warning(f"Could not discard {stages} checkpoints for document {document_id}: {e}")
+            return False
+
+    async def record_error(self, job: QueueJob, reason: str) -> bool:
+        """Remember why the latest delivery failed, for the dead-letter record"""
+        try:
+            await self.db.table(self.table).upsert({
+                "document_id": job.message.document_id,
+                "msg_id": job.msg_id,
+                "last_error": reason,
+                "updated_at": datetime.now(timezone.utc).isoformat()
+            }, on_conflict="document_id").execute()
+            return True
+        except Exception as e:
+            self.logger.warning(f"Could not record failure for job {job.msg_id}: {e}")
+            return False
+
+    async def clear(self, document_id: str) -> bool:
+        """Drop checkpoints once the job has been uploaded and removed from the queue"""
+        try:
+            await self.db.table(self.table).delete().eq("document_id", document_id).execute()
+            return True
+        except Exception as e:
+            self.logger.warning(f"Could not clear checkpoint for document {document_id}: {e}")
+            return False
+
+    @staticmethod
+    def resume_index(state: Dict[str, Any]) -> int:
+        """Index in STAGES of the first stage after the latest completed one"""
+        for i in range(len(STAGES) - 1, -1, -1):
+            if state.get(STAGES[i]) is not None:
+                return i + 1
+        return 0
+
+    @staticmethod
+    def resume_stage(state: Dict[str, Any]) -> Optional[str]:
+        """Name of the stage a job will resume at (None when every stage is done)"""
+        index = CheckpointStore.resume_index(state)
+        return STAGES[index] if index < len(STAGES) else None
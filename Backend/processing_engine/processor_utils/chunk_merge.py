@@ -0,0 +1,87 @@
+from datetime import datetime
+from typing import Any, List, Optional
+from processing_engine.models.schemas import AlertSeverity, AlertUrgency
+
+# Most to least serious; unknown or invalid values rank last
+SEVERITY_ORDER = [s.value for s in (
+    AlertSeverity.EXTREME, AlertSeverity.SEVERE, AlertSeverity.MODERATE, AlertSeverity.MINOR, AlertSeverity.UNKNOWN
+)]
+URGENCY_ORDER = [u.value for u in (
+    AlertUrgency.IMMEDIATE, AlertUrgency.EXPECTED, AlertUrgency.FUTURE, AlertUrgency.PAST, AlertUrgency.UNKNOWN
+)]
+
+AREA_FIELDS = (
+    "specific_effective_from", "specific_effective_until",
+    "specific_urgency", "specific_severity", "specific_instruction"
+)
+
+
+def page_chunks(pages: List[str], size: int) -> List[List[str]]:
+    """Consecutive page groups of at most `size` pages"""
+    return [pages[i:i + size] for i in range(0, len(pages), size)]
+
+
+def _most_serious(values: List[Any], order: List[str]) -> Optional[str]:
+    ranked = [v for v in values if v in order]
+    return min(ranked, key=order.index) if ranked else next((v for v in values if v), None)
+
+
+def _parse_date(value: Any) -> Optional[datetime]:
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+
+
+def _widest(values: List[Any], latest: bool) -> Any:
+    dated = [(d, v) for v in values if v and (d := _parse_date(v)) is not None and d.tzinfo is not None]
+    if not dated:
+        return next((v for v in values if v), None)
+    return (max if latest else min)(dated, key=lambda pair: pair[0])[1]
+
+
+def _join_distinct(values: List[Any]) -> str:
+    seen = []
+    for value in values:
+        if isinstance(value, str) and value.strip() and value.strip() not in seen:
+            seen.append(value.strip())
+    return "\n\n".join(seen)
+
+
+def _area_identity(area: dict) -> tuple:
+    names = tuple(sorted(name.strip().lower() for name in area.get("place_names") or []))
+    return (names,) + tuple(area.get(field) for field in AREA_FIELDS)
+
+
+def merge_alerts(parts: List[dict]) -> dict:
+    """
+    Deterministically merge structured alerts extracted from page chunks (in page order):
+    category and event from the first chunk, the most serious severity and urgency,
+    the widest effective window, distinct descriptions and instructions in page order,
+    and the union of area lists with exact duplicates removed.
+    """
+    if len(parts) == 1:
+        return parts[0]
+
+    areas, seen = [], set()
+    for part in parts:
+        for area in part.get("areas") or []:
+            if not isinstance(area, dict):
+                continue
+            identity = _area_identity(area)
+            if identity not in seen:
+                seen.add(identity)
+                areas.append(area)
+
+    first = parts[0]
+    return {
+        "category": first.get("category"),
+        "event": first.get("event") or next((p.get("event") for p in parts if p.get("event")), None),
+        "urgency": _most_serious([p.get("urgency") for p in parts], URGENCY_ORDER),
+        "severity": _most_serious([p.get("severity") for p in parts], SEVERITY_ORDER),
+        "description": _join_distinct([p.get("description") for p in parts]),
+        "instruction": _join_distinct([p.get("instruction") for p in parts]),
+        "effective_from": _widest([p.get("effective_from") for p in parts], latest=False),
+        "effective_until": _widest([p.get("effective_until") for p in parts], latest=True),
+        "areas": areas,
+    }
@@ -0,0 +1,119 @@
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional
+from processing_engine.config import QUEUE_NAME, DEAD_LETTER_QUEUE
+from processing_engine.models.schemas import QueueJob
+
+
+class DeadLetterQueue:
+    """
+    Parks queue messages that exhausted their retry budget in a separate PGMQ queue,
+    together with the failure reason, and puts them back on request.
+    """
+    def __init__(self, supabase, queue_name: str = DEAD_LETTER_QUEUE, source_queue: str = QUEUE_NAME):
+        self.logger = logging.getLogger(__name__)
+        self.db = supabase
+        self.queue_name = queue_name
+        self.source_queue = source_queue
+
+    async def send(self, job: QueueJob, reason: str) -> bool:
+        """Copy the job into the dead-letter queue, then delete it from the source queue"""
+        try:
+            await self.db.schema("pgmq_public").rpc("send", {
+                "queue_name": self.queue_name,
+                "message": {
+                    "payload": job.message.model_dump(mode="json"),
+                    "source_queue": job.queue_name,
+                    "source_msg_id": job.msg_id,
+                    "read_ct": job.read_ct,
+                    "failure_reason": reason,
+                    "failed_at": datetime.now(timezone.utc).isoformat()
+                }
+            }).execute()
+
+            await self.db.schema("pgmq_public").rpc("delete", {
+                "queue_name": job.queue_name,
+                "message_id": job.msg_id
+            }).execute()
+            self.logger.warning(f"Moved job {job.msg_id} to {self.queue_name} after {job.read_ct} deliveries: {reason}")
+            return True
+        except Exception as e:
+            self.logger.error(f"Could not dead-letter job {job.msg_id}: {e}")
+            return False
+
+    async def _peek(self, after_msg_id: int = 0, limit: int = 100, msg_ids: Optional[List[int]] = None) -> List[dict]:
+        """
+        One page of dead-lettered messages in msg_id order, selected straight from the
+        queue table: unlike pgmq read, this neither hides them nor bumps their read_ct.
+        """
+        response = await self.db.schema("pgmq_public").rpc("peek", {
+            "queue_name": self.queue_name,
+            "after_msg_id": after_msg_id,
+            "max_messages": limit,
+            "message_ids": msg_ids
+        }).execute()
+        return response.data or []
+
+    async def list(self, limit: int = 100) -> List[dict]:
+        """Peek at dead-lettered messages without hiding them from other readers"""
+        return await self._peek(limit=limit)
+
+    async def requeue(self, msg_ids: Optional[List[int]] = None, limit: int = 100) -> int:
+        """
+        Send dead-lettered payloads back to their source queue.
+        Requeues every dead-lettered message when msg_ids is None, paging through
+        the queue limit messages at a time.
+        """
+        requeued = 0
+        after_msg_id = 0
+        while True:
+            records = await self._peek(after_msg_id, limit, msg_ids)
+            for record in records:
+                message = record["message"]
+                await self.db.schema("pgmq_public").rpc("send", {
+                    "queue_name": message.get("source_queue", self.source_queue),
+                    "message": message["payload"]
+                }).execute()
+                await self.db.schema("pgmq_public").rpc("delete", {
+                    "queue_name": self.queue_name,
+                    "message_id": record["msg_id"]
+                }).execute()
+                requeued += 1
+                self.logger.info(f"Requeued dead letter {record['msg_id']} (document {message['payload'].get('document_id')})")
+            if len(records) < limit:
+                break
+            after_msg_id = records[-1]["msg_id"]
+
+        if msg_ids is not None and requeued < len(set(msg_ids)):
+            self.logger.warning(f"Requeued {requeued} of {len(set(msg_ids))} requested dead letters; the rest were not found")
+        return requeued
+
+async def main(argv: Optional[List[str]] = None):
+    from utils import async_supabase_client
+
+    parser = argparse.ArgumentParser(description="Inspect or requeue dead-lettered processing jobs")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("list", help="Show dead-lettered jobs and their failure reasons")
+    requeue_parser = subcommands.add_parser("requeue", help="Put dead-lettered jobs back on the processing queue")
+    requeue_parser.add_argument("--msg-id", type=int, action="append", help="Dead-letter message id (repeatable)")
+    requeue_parser.add_argument("--all", action="store_true", help="Requeue every dead-lettered job")
+    args = parser.parse_args(argv)
+    if args.command == "requeue" and not args.all and not args.msg_id:
+        parser.error("requeue needs --msg-id or --all")
+
+    dlq = DeadLetterQueue(await async_supabase_client())
+    if args.command == "list":
+        for record in await dlq.list():
+            message = record["message"]
+            print(f"{record['msg_id']}\t{message['payload'].get('document_id')}\t"
+                  f"read_ct={message.get('read_ct')}\t{message.get('failure_reason')}")
+    elif args.command == "requeue":
+        count = await dlq.requeue(None if args.all else args.msg_id)
+        print(f"Requeued {count} job(s)")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -5,7 +5,8 @@ import fitz
 from httpx import AsyncClient
 from urllib.parse import urlparse
 import os
-from typing import List
+from typing import List, Optional, Tuple
+from processing_engine.processor_utils.timings import StageTimings
 
 async def fetch_file(url: str):
     async with AsyncClient(timeout=60.0) as http_client:
@@ -30,32 +31,69 @@ def pdf_to_images(file: bytes, dpi: int = 72):
     document.close()
     return images
 
+def pdf_text(file: bytes) -> str:
+    """Text layer of a pdf file byte stream (empty for scanned documents)"""
+    document = fitz.open(stream=file, filetype="pdf")
+    text = "\n".join(page.get_text() for page in document)
+    document.close()
+    return text
+
 def to_base64(img: Image.Image) -> str:
     """Convert PIL Image to base64 string."""
     buffered = io.BytesIO()
     img.save(buffered, format="JPEG", quality=90)
     return base64.b64encode(buffered.getvalue()).decode()
 
-async def url_to_b64_strings(url: str) -> List[str]:
+def map_density(pages: List[str], size: int = 128) -> float:
+    """
+    Largest share of strongly coloured pixels across the rendered pages.
+    Text advisories are mostly black on white; hazard maps are dense with colour.
+    """
+    density = 0.0
+    for page in pages:
+        img = Image.open(io.BytesIO(base64.b64decode(page.split(",", 1)[-1])))
+        img.thumbnail((size, size))
+        hsv = img.convert("RGB").convert("HSV")
+        pixels = list(hsv.getdata())
+        coloured = sum(1 for _, s, v in pixels if s > 80 and v > 60)
+        density = max(density, coloured / max(1, len(pixels)))
+    return density
+
+def file_type_from_url(url: str) -> str:
     _, file_ext = os.path.splitext(urlparse(url).path)
-    file_type = file_ext.lstrip('.').lower()
-    file = await fetch_file(url)
+    return file_ext.lstrip('.').lower()
+
+async def url_to_b64_strings(url: str, timings: Optional[StageTimings] = None) -> List[str]:
+    strings, _ = await render_document(url, timings)
+    return strings
+
+async def render_document(url: str, timings: Optional[StageTimings] = None) -> Tuple[List[str], str]:
+    """Base64 image data URLs of every page, plus the text layer when the file has one"""
+    timings = timings or StageTimings()
+    text = ""
+    file_type = file_type_from_url(url)
+    with timings.stage("fetch"):
+        file = await fetch_file(url)
     
     strings = []
     if file_type in ["png", "jpeg", "jpg", "gif", "webp"]:
-        mime_type = "jpeg" if file_type == "jpg" else file_type
-        b64_encoding = base64.b64encode(file).decode("utf-8")
-        strings.append(f"data:image/{mime_type};base64,{b64_encoding}")
+        with timings.stage("encode"):
+            mime_type = "jpeg" if file_type == "jpg" else file_type
+            b64_encoding = base64.b64encode(file).decode("utf-8")
+            strings.append(f"data:image/{mime_type};base64,{b64_encoding}")
     
     elif file_type == "pdf":
-        images = pdf_to_images(file)
+        with timings.stage("rasterize"):
+            images = pdf_to_images(file)
+            text = pdf_text(file)
         if images:
-            for image in images:
-                strings.append(f"data:image/jpeg;base64,{to_base64(image)}")
+            with timings.stage("encode"):
+                for image in images:
+                    strings.append(f"data:image/jpeg;base64,{to_base64(image)}")
         else:
             raise ValueError("Could not extract images from PDF")
     
     else:
         raise ValueError(f"Unsupported file type: {file_type}")
     
-    return strings
\ No newline at end of file
+    return strings, text
\ No newline at end of file
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import time
+from processing_engine.config import QUEUE_NAME, VISIBILITY_TIMEOUT, HEARTBEAT_INTERVAL, STALL_TIMEOUT
+
+
+class JobStalledError(TimeoutError):
+    """Raised out of a Heartbeat block whose job was cancelled for making no progress"""
+
+class Heartbeat:
+    """
+    Keeps a queue message invisible while its job is alive by periodically pushing
+    the visibility timeout forward (pgmq set_vt).
+
+    Jobs are read with a short visibility timeout, so a crashed worker releases its
+    message within seconds, while a long-running job is never redelivered to a second
+    worker. A job that stops reporting progress for stall_timeout seconds is assumed
+    hung: the task running the block is cancelled before its message becomes visible
+    again, so a second worker never writes results alongside it, and the block raises
+    JobStalledError.
+    """
+    def __init__(
+        self,
+        supabase,
+        msg_id: int,
+        queue_name: str = QUEUE_NAME,
+        visibility_timeout: int = VISIBILITY_TIMEOUT,
+        interval: int = HEARTBEAT_INTERVAL,
+        stall_timeout: int = STALL_TIMEOUT
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.db = supabase
+        self.msg_id = msg_id
+        self.queue_name = queue_name
+        self.visibility_timeout = visibility_timeout
+        self.interval = interval
+        self.stall_timeout = stall_timeout
+        self._last_progress = time.monotonic()
+        self._task = None
+        self._job_task = None
+        self._stalled = False
+
+    async def __aenter__(self):
+        self.touch()
+        self._job_task = asyncio.current_task()
+        self._stalled = False
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Turn our own cancellation into a job failure; any other cancellation still propagates
+        if self._stalled and exc_type is asyncio.CancelledError and self._job_task.uncancel() == 0:
+            raise JobStalledError(f"Job {self.msg_id} made no progress for {self.stall_timeout}s") from exc_val
+
+    def touch(self):
+        """Record that the job made progress"""
+        self._last_progress = time.monotonic()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            stalled_for = time.monotonic() - self._last_progress
+            if stalled_for > self.stall_timeout:
+                self.logger.warning(
+                    f"Job {self.msg_id} made no progress for {stalled_for:.0f}s, "
+                    f"cancelling it and letting its message become visible again"
+                )
+                self._stalled = True
+                self._job_task.cancel()
+                return
+            await self._extend()
+
+    async def _extend(self):
+        try:
+            await self.db.schema("pgmq_public").rpc("set_vt", {
+                "queue_name": self.queue_name,
+                "message_id": self.msg_id,
+                "sleep_seconds": self.visibility_timeout
+            }).execute()
+        except Exception as e:
+            # A missed beat is recovered by the next one as long as interval < visibility_timeout
+            self.logger.warning(f"Heartbeat for job {self.msg_id} failed: {e}")
@@ -0,0 +1,175 @@
+import json
+import re
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from processing_engine.models.schemas import AlertCategory, AlertSeverity, AlertUrgency
+
+# Documents are issued in Pakistan Standard Time; naive datetimes are read as PKT
+PKT = timezone(timedelta(hours=5))
+
+_ENUM_FIELDS = {
+    "category": AlertCategory,
+    "urgency": AlertUrgency,
+    "severity": AlertSeverity,
+    "specific_urgency": AlertUrgency,
+    "specific_severity": AlertSeverity,
+}
+_DATE_FIELDS = ("effective_from", "effective_until", "specific_effective_from", "specific_effective_until")
+_DATE_FORMATS = (
+    "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d",
+    "%d-%m-%Y %H:%M", "%d-%m-%Y", "%d/%m/%Y %H:%M", "%d/%m/%Y", "%d.%m.%Y",
+    "%d %B %Y", "%d %b %Y", "%B %d, %Y", "%b %d, %Y", "%d %B, %Y",
+)
+_TRAILING_COMMA = re.compile(r",\s*([}\]])")
+
+
+def extract_json_text(response: str) -> str:
+    """Strip markdown fences and surrounding prose, keeping a possibly truncated object"""
+    response = re.sub(r"```(?:json)?", "", response)
+    start = response.find("{")
+    if start == -1:
+        return response.strip()
+    tail = response[start:]
+    # The last brace may sit inside a string of truncated output; only cut there when the object is complete
+    end = tail.rfind("}")
+    if end != -1:
+        try:
+            json.loads(_TRAILING_COMMA.sub(r"\1", tail[:end + 1]))
+            return tail[:end + 1]
+        except json.JSONDecodeError:
+            pass
+    return tail
+
+
+def _close_truncated(text: str, keep_tail: bool = True) -> str:
+    """
+    Close strings, arrays and objects left open by a completion cut off mid-output.
+    With keep_tail=False the partial member after the last separator is dropped.
+    """
+    stack: List[str] = []
+    in_string = escaped = False
+    last_safe = 0  # end of the last complete value inside the innermost container
+    for i, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in "{[":
+            stack.append("}" if char == "{" else "]")
+            last_safe = i + 1
+        elif char in "}]" and stack:
+            stack.pop()
+            last_safe = i + 1
+        elif char == ",":
+            last_safe = i
+
+    if not stack and not in_string:
+        return text
+    if in_string:
+        text += '"'
+    # A dangling key (`, "sever` or `"key":`) is never valid, so it is always dropped;
+    # inside an array the same text is a complete string value
+    tail = text[last_safe:]
+    dangling = r'^[,\s]*("[^"]*"\s*:?\s*)?$' if not stack or stack[-1] == "}" else r'^[,\s]*$'
+    if not keep_tail or re.search(dangling, tail) or tail.rstrip().endswith(":"):
+        text = text[:last_safe]
+    return _TRAILING_COMMA.sub(r"\1", text.rstrip().rstrip(",") + "".join(reversed(stack)))
+
+
+def repair_json(response: str) -> Dict[str, Any]:
+    """Parse an LLM completion, fixing fences, trailing commas and truncation; raises ValueError"""
+    text = _TRAILING_COMMA.sub(r"\1", extract_json_text(response))
+    for candidate in (text, _close_truncated(text), _close_truncated(text, keep_tail=False)):
+        try:
+            data = json.loads(candidate)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(data, dict):
+            return data
+    raise ValueError("LLM returned invalid JSON that could not be repaired")
+
+
+def _normalize_enum(value: Any, enum) -> Any:
+    if not isinstance(value, str):
+        return value
+    for member in enum:
+        if value.strip().lower() == member.value.lower():
+            return member.value
+    return value
+
+
+def normalize_date(value: Any) -> Any:
+    """ISO 8601 with an offset; naive datetimes are PKT. Unknown formats are left for validation"""
+    if not isinstance(value, str) or not value.strip():
+        return value
+    text = value.strip()
+    try:
+        parsed = datetime.fromisoformat(text.replace("Z", "+00:00"))
+    except ValueError:
+        parsed = None
+        for fmt in _DATE_FORMATS:
+            try:
+                parsed = datetime.strptime(text, fmt)
+                break
+            except ValueError:
+                continue
+        if parsed is None:
+            return value
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=PKT)
+    return parsed.isoformat()
+
+
+def _normalize_fields(data: Dict[str, Any]):
+    for key, value in list(data.items()):
+        if key in _ENUM_FIELDS:
+            data[key] = _normalize_enum(value, _ENUM_FIELDS[key])
+        elif key in _DATE_FIELDS:
+            data[key] = normalize_date(value)
+
+
+def normalize_alert(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Fix enum case and date formats in a structured alert, in place"""
+    _normalize_fields(data)
+    areas = data.get("areas")
+    if isinstance(areas, dict):
+        data["areas"] = areas = [areas]
+    for area in areas or []:
+        if isinstance(area, dict):
+            if isinstance(area.get("place_names"), str):
+                area["place_names"] = [area["place_names"]]
+            _normalize_fields(area)
+    return data
+
+
+def invalid_fields(error: ValidationError) -> List[Tuple[str, str]]:
+    """Dotted path and message of every field that failed validation"""
+    return [(".".join(str(part) for part in e["loc"]), e["msg"]) for e in error.errors()]
+
+
+def apply_fixes(data: Dict[str, Any], fixes: Dict[str, Any]) -> Dict[str, Any]:
+    """Set each dotted path (e.g. `areas.0.specific_severity`) to its corrected value, in place"""
+    for path, value in fixes.items():
+        parts = path.split(".")
+        target: Optional[Any] = data
+        for part in parts[:-1]:
+            if isinstance(target, list) and part.isdigit() and int(part) < len(target):
+                target = target[int(part)]
+            elif isinstance(target, dict):
+                target = target.setdefault(part, {})
+            else:
+                target = None
+                break
+        last = parts[-1]
+        if isinstance(target, dict):
+            target[last] = value
+        elif isinstance(target, list) and last.isdigit() and int(last) < len(target):
+            target[int(last)] = value
+    return data
@@ -0,0 +1,42 @@
+import time
+from typing import Dict, List, Optional, Tuple
+from processing_engine.config import LANES, LANE_PROBE_INTERVAL
+
+
+class LaneScheduler:
+    """
+    Smooth weighted round-robin over processing lanes (PGMQ queues).
+
+    With weights urgent:3 and normal:1 the read order is urgent, urgent, normal, urgent, ...
+    so a deep backlog in the normal lane cannot starve fresh urgent documents, while the
+    normal lane still keeps draining. A lane that comes back empty is skipped until
+    probe_interval seconds have passed.
+    """
+    def __init__(self, lanes: List[Tuple[str, int]] = LANES, probe_interval: float = LANE_PROBE_INTERVAL):
+        self.weights: Dict[str, int] = dict(lanes)
+        self.probe_interval = probe_interval
+        self._current: Dict[str, int] = {name: 0 for name in self.weights}
+        self._empty_at: Dict[str, float] = {}
+
+    def next_lane(self) -> Optional[str]:
+        """Lane to read from next, or None when every lane is currently empty"""
+        now = time.monotonic()
+        active = [
+            name for name in self.weights
+            if now - self._empty_at.get(name, float("-inf")) >= self.probe_interval
+        ]
+        if not active:
+            return None
+
+        total = sum(self.weights[name] for name in active)
+        for name in active:
+            self._current[name] += self.weights[name]
+        chosen = max(active, key=lambda name: self._current[name])
+        self._current[chosen] -= total
+        return chosen
+
+    def mark_empty(self, lane: str):
+        self._empty_at[lane] = time.monotonic()
+
+    def mark_active(self, lane: str):
+        self._empty_at.pop(lane, None)
@@ -1,6 +1,9 @@
 import os
-from openai import OpenAI
+import time
+from openai import AsyncOpenAI
 from pathlib import Path
+from pydantic import BaseModel
+from typing import Optional
 from utils import load_env
 import json
 
@@ -13,34 +16,103 @@ config_path = CURRENT_DIR / "llm_configs.json"
 with open(config_path, 'r') as f:
     configs = json.load(f)
 
+
+class LLMResult(BaseModel):
+    """Completion text with the timing and usage data of the call"""
+    content: str
+    model: str
+    usage: Optional[dict] = None
+    time_to_first_token: Optional[float] = None
+    latency: float
+
+
 # Unified LLM client with abstraction, based on Openai
 class LLMClient:
-    def __init__(self, model: str):
+    def __init__(self, model: str, api_key_name: Optional[str] = None):
         if model not in configs:
             raise ValueError(f"Model not configured: {model}")
         
         self.model = model
         self.config = configs[model]
+        self.api_key_name = api_key_name or self.config.get("api_key_name")
         self._client = self._create_client()
 
-    def _create_client(self) -> OpenAI:
+    def _create_client(self) -> AsyncOpenAI:
         """Create an OpenAI client with the configured key and base_url"""
-        key = os.getenv(self.config.get("api_key_name"))
+        key = os.getenv(self.api_key_name)
         if not key:
-            raise ValueError(f"API key not found for {self.config.get('api_key_name')}")
+            raise ValueError(f"API key not found for {self.api_key_name}")
         
         url = self.config.get("base_url")
 
-        return OpenAI(api_key=key, base_url=url)
+        # No SDK retries: LLMRouter fails over and ResilientLLM retries, each with its own backoff
+        return AsyncOpenAI(api_key=key, base_url=url, max_retries=0)
     
+    def _params(self, kwargs: dict) -> dict:
+        """Default params overridden by kwargs; json_mode=True asks for a JSON object where the provider supports it"""
+        json_mode = kwargs.pop("json_mode", False)
+        params = {**self.config["default_params"], **kwargs}
+        if json_mode and self.config.get("supports_json_mode"):
+            params["response_format"] = {"type": "json_object"}
+        return params
+
     async def call(self, messages, **kwargs):
         """Make a call to the LLM"""
         #Merge default and custom params
-        params = {**self.config["default_params"], **kwargs}
+        params = self._params(kwargs)
         
-        response = self._client.chat.completions.create(
+        response = await self._client.chat.completions.create(
             model = self.config["model"],
             messages=messages,
             **params
         )
-        return response.choices[0].message.content
\ No newline at end of file
+        return response.choices[0].message.content
+
+    async def stream(self, messages, **kwargs):
+        """Streamed call to the LLM, yielding raw completion chunks (the last one carries usage)"""
+        params = self._params(kwargs)
+        stream = await self._client.chat.completions.create(
+            model=self.config["model"],
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True},
+            **params
+        )
+        async for chunk in stream:
+            yield chunk
+
+    async def complete(self, messages, stream_to=None, **kwargs) -> LLMResult:
+        """
+        Make a streamed call to the LLM and return the full completion together with
+        time-to-first-token (reasoning tokens count) and token usage.
+
+        stream_to receives start() when the stream begins and feed(delta) for every
+        content delta, so callers can act on a completion while it is generated.
+        """
+        start = time.perf_counter()
+        if stream_to is not None:
+            stream_to.start()
+        
+        parts = []
+        usage = None
+        time_to_first_token = None
+        async for chunk in self.stream(messages, **kwargs):
+            if chunk.usage:
+                usage = chunk.usage.model_dump()
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if time_to_first_token is None and (delta.content or getattr(delta, "reasoning_content", None)):
+                time_to_first_token = time.perf_counter() - start
+            if delta.content:
+                parts.append(delta.content)
+                if stream_to is not None:
+                    stream_to.feed(delta.content)
+        
+        return LLMResult(
+            content="".join(parts),
+            model=self.model,
+            usage=usage,
+            time_to_first_token=time_to_first_token,
+            latency=time.perf_counter() - start
+        )
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import Callable, Optional
+from openai import APIConnectionError, APIStatusError, RateLimitError
+from processing_engine.config import (
+    LLM_CALL_DEADLINE, LLM_ATTEMPT_TIMEOUT, LLM_MAX_RETRIES,
+    LLM_HEDGE, LLM_HEDGE_INITIAL_DELAY
+)
+from processing_engine.processor_utils.llm_client import LLMResult
+from processing_engine.processor_utils.llm_router import AllRoutesFailedError
+
+logger = logging.getLogger(__name__)
+
+
+class InvalidLLMResponse(Exception):
+    """Raised when a completion arrives but fails the response validator"""
+    pass
+
+
+def _content(result) -> str:
+    return result.content if isinstance(result, LLMResult) else (result or "")
+
+
+def _is_retryable(error: BaseException) -> bool:
+    if isinstance(error, APIStatusError):
+        return isinstance(error, RateLimitError) or error.status_code >= 500
+    return isinstance(error, (APIConnectionError, asyncio.TimeoutError, InvalidLLMResponse, AllRoutesFailedError))
+
+
+class StreamBuffer:
+    """Stream consumer that holds a hedged completion until it is known to have won"""
+    def __init__(self):
+        self.parts = []
+
+    def start(self):
+        self.parts = []
+
+    def feed(self, delta: str):
+        self.parts.append(delta)
+
+    def replay(self, consumer):
+        consumer.start()
+        consumer.feed("".join(self.parts))
+
+
+class LatencyTracker:
+    """Rolling window of successful call latencies"""
+    def __init__(self, window: int = 50):
+        self._samples = deque(maxlen=window)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def percentile(self, q: float, min_samples: int = 10) -> Optional[float]:
+        if len(self._samples) < min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ResilientLLM:
+    """
+    Wraps an LLMClient or LLMRouter with a per-call deadline, bounded exponential
+    retries with jitter, and optional hedging.
+
+    With hedging on, a second request is sent (to the alternate client, or the same one)
+    when the first has not returned after the observed p95 latency. The first response
+    that passes the validator wins and the other request is cancelled. A streamed
+    hedge is buffered and replayed to stream_to only if it wins, since the first
+    request is already streaming there.
+    """
+    def __init__(
+        self,
+        llm,
+        alternate=None,
+        validator: Callable[[str], bool] = lambda content: bool(content.strip()),
+        deadline: float = LLM_CALL_DEADLINE,
+        attempt_timeout: float = LLM_ATTEMPT_TIMEOUT,
+        max_retries: int = LLM_MAX_RETRIES,
+        hedge: bool = LLM_HEDGE,
+        hedge_initial_delay: float = LLM_HEDGE_INITIAL_DELAY,
+        base_backoff: float = 2.0
+    ):
+        self.llm = llm
+        self.alternate = alternate or llm
+        self.validator = validator
+        self.deadline = deadline
+        self.attempt_timeout = attempt_timeout
+        self.max_retries = max_retries
+        self.hedge = hedge
+        self.hedge_initial_delay = hedge_initial_delay
+        self.base_backoff = base_backoff
+        self.latencies = LatencyTracker()
+        self.model = llm.model
+        self.config = llm.config
+
+    async def call(self, messages, **kwargs):
+        """Make a call to the LLM within the deadline and retry budget"""
+        return await self._run("call", messages, kwargs)
+
+    async def complete(self, messages, **kwargs) -> LLMResult:
+        """Streamed call with timing and usage, within the deadline and retry budget"""
+        return await self._run("complete", messages, kwargs)
+
+    def hedge_delay(self) -> float:
+        return self.latencies.percentile(0.95) or self.hedge_initial_delay
+
+    async def _run(self, method: str, messages, kwargs: dict):
+        deadline_at = time.monotonic() + self.deadline
+        last_error: Optional[BaseException] = None
+        attempts = 0
+
+        for attempt in range(self.max_retries + 1):
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                break
+            attempts += 1
+            try:
+                return await asyncio.wait_for(
+                    self._attempt(method, messages, kwargs),
+                    timeout=min(remaining, self.attempt_timeout)
+                )
+            except Exception as e:
+                if not _is_retryable(e):
+                    raise
+                last_error = e
+                logger.warning(f"LLM attempt {attempt + 1}/{self.max_retries + 1} failed: {type(e).__name__}: {e}")
+
+            # Full-jitter exponential backoff, never past the deadline
+            backoff = random.uniform(0, self.base_backoff * 2 ** attempt)
+            if attempt < self.max_retries and time.monotonic() + backoff < deadline_at:
+                await asyncio.sleep(backoff)
+
+        raise TimeoutError(
+            f"LLM call did not succeed within {self.deadline:g}s ({attempts} attempts): {last_error!r}"
+        )
+
+    async def _timed(self, client, method: str, messages, kwargs: dict):
+        start = time.monotonic()
+        result = await getattr(client, method)(messages, **kwargs)
+        self.latencies.record(time.monotonic() - start)
+        return result
+
+    async def _attempt(self, method: str, messages, kwargs: dict):
+        tasks = {asyncio.create_task(self._timed(self.llm, method, messages, kwargs))}
+        hedged, buffer = None, None
+        try:
+            if self.hedge:
+                done, _ = await asyncio.wait(tasks, timeout=self.hedge_delay())
+                if not done:
+                    logger.info(f"No LLM response after {self.hedge_delay():.0f}s, sending hedged request")
+                    hedge_kwargs = kwargs
+                    if kwargs.get("stream_to") is not None:
+                        buffer = StreamBuffer()
+                        hedge_kwargs = {**kwargs, "stream_to": buffer}
+                    hedged = asyncio.create_task(self._timed(self.alternate, method, messages, hedge_kwargs))
+                    tasks.add(hedged)
+
+            last_error: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                    elif self.validator(_content(task.result())):
+                        if task is hedged and buffer:
+                            buffer.replay(kwargs["stream_to"])
+                        return task.result()
+                    else:
+                        last_error = InvalidLLMResponse("Completion failed validation")
+            raise last_error
+        finally:
+            # Cancel the losing (or abandoned) request
+            for task in tasks:
+                task.cancel()
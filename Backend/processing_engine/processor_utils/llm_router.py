@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import os
+import time
+from typing import List, Optional
+from openai import APIConnectionError, APIStatusError, RateLimitError
+from processing_engine.processor_utils.llm_client import LLMClient, LLMResult, configs
+
+logger = logging.getLogger(__name__)
+
+# Rough prompt-size estimate used for tokens-per-minute budgeting before the real usage is known
+TOKENS_PER_IMAGE = 1200
+CHARS_PER_TOKEN = 4
+
+
+class AllRoutesFailedError(RuntimeError):
+    """Raised when every route failed over; a later attempt may find one out of cooldown"""
+    pass
+
+
+def estimate_tokens(messages: list, max_completion_tokens: int = 0) -> int:
+    """Estimate the tokens a request will consume (prompt + completion budget)"""
+    tokens = max_completion_tokens
+    for message in messages:
+        content = message.get("content")
+        if isinstance(content, str):
+            tokens += len(content) // CHARS_PER_TOKEN
+        elif isinstance(content, list):
+            for part in content:
+                if part.get("type") == "text":
+                    tokens += len(part.get("text", "")) // CHARS_PER_TOKEN
+                else:
+                    tokens += TOKENS_PER_IMAGE
+    return tokens
+
+
+class Route:
+    """
+    One provider model + API key with its own limits.
+
+    - max_concurrency: in-flight requests allowed on this key
+    - tokens_per_minute: token bucket refilled continuously, debited with an estimate
+      before the call and corrected with the reported usage afterwards
+    - health: moving score in (0, 1], halved on retryable failures and restored on success
+    """
+    def __init__(self, model: str, api_key_name: Optional[str] = None):
+        self.client = LLMClient(model, api_key_name)
+        routing = self.client.config.get("routing", {})
+        self.name = f"{model}#{self.client.api_key_name}"
+        self.max_concurrency = routing.get("max_concurrency", 4)
+        self.tokens_per_minute = routing.get("tokens_per_minute", 100000)
+        self.weight = routing.get("weight", 1)
+        self.health = 1.0
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+        self.consecutive_failures = 0
+        self.slots = asyncio.Semaphore(self.max_concurrency)
+        self._tokens = float(self.tokens_per_minute)
+        self._refilled_at = time.monotonic()
+
+    def score(self) -> float:
+        """Higher is better: healthy, heavily weighted, lightly loaded routes win"""
+        return self.health * self.weight / (1 + self.in_flight / self.max_concurrency)
+
+    def cooling_down(self, now: float) -> bool:
+        return now < self.cooldown_until
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(
+            self.tokens_per_minute,
+            self._tokens + (now - self._refilled_at) * self.tokens_per_minute / 60
+        )
+        self._refilled_at = now
+
+    async def reserve_tokens(self, tokens: int):
+        """Wait until the token bucket can cover the request"""
+        tokens = min(tokens, self.tokens_per_minute)
+        self._refill()
+        while self._tokens < tokens:
+            await asyncio.sleep((tokens - self._tokens) * 60 / self.tokens_per_minute)
+            self._refill()
+        self._tokens -= tokens
+
+    def settle_tokens(self, estimated: int, actual: Optional[int]):
+        """Correct the bucket with the usage the provider reported"""
+        if actual is not None:
+            self._tokens = min(self.tokens_per_minute, self._tokens + estimated - actual)
+
+    def record_success(self):
+        self.health = min(1.0, self.health * 0.8 + 0.2)
+        self.consecutive_failures = 0
+
+    def record_failure(self, retry_after: Optional[float] = None):
+        self.health = max(0.05, self.health * 0.5)
+        self.consecutive_failures += 1
+        backoff = retry_after if retry_after is not None else min(60.0, 2.0 ** self.consecutive_failures)
+        self.cooldown_until = time.monotonic() + backoff
+
+
+def _retry_after(error: APIStatusError) -> Optional[float]:
+    try:
+        return float(error.response.headers.get("retry-after"))
+    except (TypeError, ValueError, AttributeError):
+        return None
+
+
+class LLMRouter:
+    """
+    Spreads LLM calls over several configured models and API keys.
+
+    Drop-in for LLMClient (call/complete). Each call goes to the best-scoring route that
+    is not cooling down; a 429, 5xx or connection failure puts that route in cooldown,
+    lowers its health and fails over to the next route.
+    """
+    def __init__(self, models: List[str]):
+        self.routes: List[Route] = []
+        for model in models:
+            config = configs[model]
+            key_names = [config.get("api_key_name")] + config.get("extra_api_key_names", [])
+            for key_name in key_names:
+                if os.getenv(key_name):
+                    self.routes.append(Route(model, key_name))
+        if not self.routes:
+            raise ValueError(f"No API keys found for any of {models}")
+        self.model = self.routes[0].client.model
+        self.config = self.routes[0].client.config
+        logger.info(f"LLM router over {len(self.routes)} routes: {[r.name for r in self.routes]}")
+
+    def _ordered_routes(self) -> List[Route]:
+        now = time.monotonic()
+        ready = [r for r in self.routes if not r.cooling_down(now)]
+        cooling = sorted((r for r in self.routes if r.cooling_down(now)), key=lambda r: r.cooldown_until)
+        return sorted(ready, key=lambda r: r.score(), reverse=True) + cooling
+
+    @staticmethod
+    def _fail_over(route: Route, error: Exception) -> bool:
+        """Put the route in cooldown for a 429, 5xx or connection failure; False for errors another route would repeat"""
+        if isinstance(error, RateLimitError):
+            route.record_failure(_retry_after(error))
+            logger.warning(f"{route.name} rate limited, failing over: {error}")
+        elif isinstance(error, APIStatusError) and error.status_code >= 500:
+            route.record_failure()
+            logger.warning(f"{route.name} returned {error.status_code}, failing over")
+        elif isinstance(error, APIConnectionError):
+            route.record_failure()
+            logger.warning(f"{route.name} connection failed, failing over: {error}")
+        else:
+            return False
+        return True
+
+    async def _dispatch(self, method: str, messages, **kwargs):
+        last_error: Optional[Exception] = None
+        for route in self._ordered_routes():
+            wait = route.cooldown_until - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            params = {**route.client.config["default_params"], **kwargs}
+            estimated = estimate_tokens(messages, params.get("max_completion_tokens", 0))
+            await route.reserve_tokens(estimated)
+
+            async with route.slots:
+                route.in_flight += 1
+                try:
+                    result = await getattr(route.client, method)(messages, **kwargs)
+                except Exception as e:
+                    # Return the reservation so a failed call does not throttle the route
+                    route.settle_tokens(estimated, 0)
+                    if not self._fail_over(route, e):
+                        raise
+                    last_error = e
+                    continue
+                finally:
+                    route.in_flight -= 1
+
+            route.record_success()
+            usage = result.usage if isinstance(result, LLMResult) else None
+            route.settle_tokens(estimated, (usage or {}).get("total_tokens"))
+            return result
+
+        raise AllRoutesFailedError(f"All LLM routes failed: {last_error}")
+
+    async def call(self, messages, **kwargs):
+        """Make a call to the best available route"""
+        return await self._dispatch("call", messages, **kwargs)
+
+    async def complete(self, messages, **kwargs) -> LLMResult:
+        """Streamed call with timing and usage on the best available route"""
+        return await self._dispatch("complete", messages, **kwargs)
@@ -0,0 +1,139 @@
+import hashlib
+import logging
+import random
+import re
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Set
+from pydantic import BaseModel
+from processing_engine.config import DEDUP_THRESHOLD, DEDUP_LOOKBACK_DAYS, DEDUP_MIN_WORDS
+
+# MinHash parameters: NUM_PERM = BANDS * ROWS. 32 bands of 4 rows put the LSH
+# candidate threshold near Jaccard 0.42, well below the similarity we act on.
+NUM_PERM = 128
+BANDS = 32
+ROWS = 4
+SHINGLE_SIZE = 5
+
+_PRIME = (1 << 61) - 1
+_rng = random.Random(20240601)  # fixed seed: signatures must be stable across workers and releases
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def normalize_text(text: str) -> List[str]:
+    """Lowercased words with digits folded, so an updated date or issue number barely moves the signature"""
+    text = re.sub(r"\d", "0", text.lower())
+    return re.findall(r"[a-z0]+", text)
+
+
+def shingles(words: List[str], size: int = SHINGLE_SIZE) -> Set[int]:
+    """64-bit hashes of the word n-grams of a text"""
+    if len(words) < size:
+        size = max(1, len(words))
+    return {
+        int.from_bytes(hashlib.blake2b(" ".join(words[i:i + size]).encode(), digest_size=8).digest(), "big")
+        for i in range(len(words) - size + 1)
+    }
+
+
+def minhash(shingle_hashes: Set[int]) -> List[int]:
+    """MinHash signature; each value stays below 2^61 so it fits a BIGINT column"""
+    return [min((a * h + b) % _PRIME for h in shingle_hashes) for a, b in _PERMUTATIONS]
+
+
+def lsh_bands(signature: List[int]) -> List[str]:
+    """One bucket key per band; documents sharing any key are near-duplicate candidates"""
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(repr(rows).encode(), digest_size=8).hexdigest()
+        keys.append(f"{band}:{digest}")
+    return keys
+
+
+def similarity(a: List[int], b: List[int]) -> float:
+    """Estimated Jaccard similarity of the shingle sets behind two signatures"""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+class NearDuplicate(BaseModel):
+    document_id: str
+    similarity: float
+
+
+class NearDuplicateIndex:
+    """
+    MinHash/LSH index over the text layer of documents, stored in document_signatures.
+    Finds recently processed documents whose estimated Jaccard similarity with an
+    incoming one reaches the threshold.
+
+    A signature is stored when its document is rendered but only becomes a candidate
+    once mark_processed records a successful upload, so a document never matches one
+    that is still in flight, failed or was dead-lettered.
+    """
+    def __init__(
+        self,
+        supabase,
+        table: str = "document_signatures",
+        threshold: float = DEDUP_THRESHOLD,
+        lookback_days: int = DEDUP_LOOKBACK_DAYS
+    ):
+        self.logger = logging.getLogger(__name__)
+        self.db = supabase
+        self.table = table
+        self.threshold = threshold
+        self.lookback_days = lookback_days
+
+    async def check(self, document_id: str, text: str) -> Optional[NearDuplicate]:
+        """Index the document and return its closest recently processed near-duplicate (None if there is none)"""
+        words = normalize_text(text or "")
+        if len(words) < DEDUP_MIN_WORDS:
+            # Scanned documents without a text layer cannot be compared
+            return None
+
+        signature = minhash(shingles(words))
+        bands = lsh_bands(signature)
+        match = None
+        try:
+            since = (datetime.now(timezone.utc) - timedelta(days=self.lookback_days)).isoformat()
+            # Unprocessed signatures have no processed_at and never pass the filter
+            response = await self.db.table(self.table).select("document_id, signature").overlaps(
+                "bands", bands
+            ).neq("document_id", document_id).gte("processed_at", since).execute()
+
+            for row in response.data or []:
+                score = similarity(signature, row["signature"])
+                if score >= self.threshold and (match is None or score > match.similarity):
+                    match = NearDuplicate(document_id=row["document_id"], similarity=round(score, 3))
+
+            await self.db.table(self.table).upsert({
+                "document_id": document_id,
+                "signature": signature,
+                "bands": bands,
+                "near_duplicate_of": match.document_id if match else None
+            }, on_conflict="document_id").execute()
+        except Exception as e:
+            # Deduplication is an optimisation; the document is processed normally if it fails
+            self.logger.warning(f"Near-duplicate check failed for document {document_id}: {e}")
+            return None
+
+        if match:
+            self.logger.info(f"Document {document_id} is a near-duplicate of {match.document_id} ({match.similarity:.2f})")
+        return match
+
+    async def mark_processed(self, document_id: str) -> bool:
+        """Make the document a candidate for later near-duplicates once its alert is uploaded"""
+        try:
+            await self.db.table(self.table).update({
+                "processed_at": datetime.now(timezone.utc).isoformat()
+            }).eq("document_id", document_id).execute()
+            return True
+        except Exception as e:
+            self.logger.warning(f"Could not mark signature of document {document_id} as processed: {e}")
+            return False
+
+
+class NearDuplicateSkipped(Exception):
+    """Raised in skip mode so the worker completes the job without an LLM call"""
+    def __init__(self, match: NearDuplicate):
+        super().__init__(f"near-duplicate of {match.document_id} ({match.similarity:.2f})")
+        self.match = match
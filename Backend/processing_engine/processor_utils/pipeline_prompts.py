@@ -1,5 +1,6 @@
 import asyncio
-from typing import List
+import json
+from typing import List, Optional
 import logging
 from processing_engine.processor_utils.doc_utils import url_to_b64_strings
 
@@ -143,7 +144,10 @@ Don't miss any information. Be wary of typos in the document, and correct if pos
   ]
 }"""
 
-async def messages(inputs: List[str]):
+chunk_note = """These are pages {first}-{last} of a {total}-page document that is being extracted in parts.
+Extract only what these pages contain, using the same JSON structure. Use the document-wide dates if these pages show none."""
+
+async def messages(inputs: List[str], part: Optional[str] = None):
     """Prepares prompt for conversion of image to markdown, along with examples (few-shot prompting)"""
     b64_files = await _load_examples()
     return [
@@ -275,7 +279,7 @@ async def messages(inputs: List[str]):
                 },
                 {
                     "role": "user",
-                    "content": [{"type": "text", "text": json_prompt}] + 
+                    "content": [{"type": "text", "text": json_prompt + (f"\n\n{part}" if part else "")}] + 
                     [
                       {
                         "type": "image_url",
@@ -286,4 +290,45 @@ async def messages(inputs: List[str]):
                       } for input in inputs
                     ]
                 }
-            ]
\ No newline at end of file
+            ]
+
+fix_prompt = """The JSON below was extracted from a Pakistani disaster alert but some fields failed validation.
+Return a JSON object that maps each listed field path to its corrected value, and nothing else.
+Do not repeat fields that are not listed. Use ISO 8601 datetimes with timezone (Pakistan is +05:00).
+Valid values: category one of "Geo", "Met", "Safety", "Security", "Rescue", "Fire", "Health", "Env", "Transport", "Infra", "CBRNE", "Other";
+urgency one of "Immediate", "Expected", "Future", "Past", "Unknown"; severity one of "Extreme", "Severe", "Moderate", "Minor", "Unknown".
+
+# Invalid fields:
+{errors}
+
+# Extracted JSON:
+{data}
+
+# Response Format:
+{{"<field path>": <corrected value>}}"""
+
+def fix_messages(data: dict, errors: List[tuple]):
+  """Text-only follow-up prompt asking for corrections to the invalid fields only"""
+  error_lines = "\n".join(f"- {path}: {message}" for path, message in errors)
+  return [
+    {"role": "system", "content": system_prompt},
+    {"role": "user", "content": fix_prompt.format(errors=error_lines, data=json.dumps(data, ensure_ascii=False, indent=2))}
+  ]
+
+diff_prompt = """A new version of a Pakistani disaster alert was published. It is nearly identical to an earlier document
+whose extracted JSON is given below. Compare the new document text with that JSON and return a JSON object containing
+only the top-level fields whose values change (for "areas", return the complete new array). Return {{}} if nothing changed.
+Use ISO 8601 datetimes with timezone (Pakistan is +05:00) and the same enum values as the earlier JSON.
+
+# Earlier JSON:
+{previous}
+
+# New document text:
+{text}"""
+
+def diff_messages(previous: dict, text: str):
+  """Text-only prompt asking for the fields that changed since a near-identical earlier document"""
+  return [
+    {"role": "system", "content": system_prompt},
+    {"role": "user", "content": diff_prompt.format(previous=json.dumps(previous, ensure_ascii=False, indent=2), text=text)}
+  ]
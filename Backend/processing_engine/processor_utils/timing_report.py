@@ -0,0 +1,43 @@
+import argparse
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+from typing import List, Optional
+from processing_engine.processor_utils.timings import TIMED_STAGES
+
+# Stage ordering for the report: pipeline order, then TTFT and anything unknown
+_STAGE_ORDER = {stage: i for i, stage in enumerate(TIMED_STAGES + ("ttft",))}
+
+
+async def stage_percentiles(supabase, from_date: date, to_date: date) -> List[dict]:
+    """p50/p95 per stage and model for documents processed in [from_date, to_date]"""
+    response = await supabase.rpc("stage_timing_percentiles", {
+        "from_ts": datetime.combine(from_date, datetime.min.time(), timezone.utc).isoformat(),
+        "to_ts": datetime.combine(to_date + timedelta(days=1), datetime.min.time(), timezone.utc).isoformat()
+    }).execute()
+    rows = response.data or []
+    return sorted(rows, key=lambda r: (r["model"] or "", _STAGE_ORDER.get(r["stage"], len(_STAGE_ORDER)), r["stage"]))
+
+
+async def main(argv: Optional[List[str]] = None):
+    from utils import async_supabase_client
+
+    parser = argparse.ArgumentParser(description="Report p50/p95 processing time per stage and model")
+    parser.add_argument("--from", dest="from_date", type=date.fromisoformat,
+                        default=date.today() - timedelta(days=7), help="First day (YYYY-MM-DD), default 7 days ago")
+    parser.add_argument("--to", dest="to_date", type=date.fromisoformat,
+                        default=date.today(), help="Last day (YYYY-MM-DD), default today")
+    args = parser.parse_args(argv)
+
+    rows = await stage_percentiles(await async_supabase_client(), args.from_date, args.to_date)
+    if not rows:
+        print(f"No timings between {args.from_date} and {args.to_date}")
+        return
+
+    print(f"{'model':<30} {'stage':<14} {'n':>6} {'p50 (s)':>10} {'p95 (s)':>10}")
+    for row in rows:
+        print(f"{(row['model'] or '-'):<30} {row['stage']:<14} {row['samples']:>6} "
+              f"{row['p50']:>10.2f} {row['p95']:>10.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,62 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Stages reported for every processed document, in pipeline order
+TIMED_STAGES = ("fetch", "rasterize", "encode", "prompt_build", "llm", "parse", "geocode", "upload")
+
+
+class StageTimings:
+    """
+    Wall-clock seconds per pipeline stage for one job, plus the LLM call's
+    time-to-first-token and token usage.
+    """
+    def __init__(self):
+        self.stages: Dict[str, float] = {}
+        self.model: Optional[str] = None
+        self.time_to_first_token: Optional[float] = None
+        self.usage: Dict[str, int] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a block; repeated stages (e.g. one geocode call per area list) accumulate"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, name: str, seconds: float):
+        self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def record_llm(self, result):
+        """Keep model, TTFT and token usage from an LLMResult"""
+        self.model = result.model
+        self.time_to_first_token = result.time_to_first_token
+        for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+            if result.usage and result.usage.get(key) is not None:
+                self.usage[key] = self.usage.get(key, 0) + result.usage[key]
+
+    def merge_parallel(self, others: List["StageTimings"]):
+        """Fold in timings of branches that ran concurrently: the slowest branch per stage, summed usage"""
+        for name in {name for other in others for name in other.stages}:
+            self.record(name, max(other.stages.get(name, 0.0) for other in others))
+        for other in others:
+            self.model = other.model or self.model
+            self.time_to_first_token = min(
+                (t for t in (self.time_to_first_token, other.time_to_first_token) if t is not None), default=None
+            )
+            for key, value in other.usage.items():
+                self.usage[key] = self.usage.get(key, 0) + value
+
+    def as_row(self) -> dict:
+        """Columns of a document_timings row"""
+        return {
+            "model": self.model,
+            "stages": {name: round(seconds, 4) for name, seconds in self.stages.items()},
+            "time_to_first_token": self.time_to_first_token,
+            "prompt_tokens": self.usage.get("prompt_tokens"),
+            "completion_tokens": self.usage.get("completion_tokens"),
+            "total_tokens": self.usage.get("total_tokens"),
+            "total_time": round(sum(self.stages.values()), 4)
+        }
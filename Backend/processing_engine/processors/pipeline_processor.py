@@ -1,78 +1,284 @@
+import asyncio
 import json
-from uuid import uuid4
+import logging
+from datetime import datetime
 from pydantic import ValidationError
 import os
-from typing import List
+from typing import List, Optional, Union
 from httpx import AsyncClient
 from processing_engine.processor_utils.llm_client import LLMClient
-from processing_engine.processor_utils.pipeline_prompts import messages
-from processing_engine.processor_utils.doc_utils import url_to_b64_strings
+from processing_engine.processor_utils.llm_router import LLMRouter
+from processing_engine.processor_utils.llm_resilience import ResilientLLM
+from processing_engine.processor_utils.pipeline_prompts import messages, fix_messages, chunk_note, diff_messages
+from processing_engine.processor_utils.chunk_merge import page_chunks, merge_alerts
+from processing_engine.processor_utils.json_repair import repair_json, normalize_alert, invalid_fields, apply_fixes
+from processing_engine.processor_utils.doc_utils import url_to_b64_strings, render_document, map_density
+from processing_engine.processor_utils.timings import StageTimings
+from processing_engine.processor_utils.area_stream import GeocodePrefetch
 from processing_engine.models.schemas import QueueJob, Alert, AlertArea, StructuredAlert
+from processing_engine.config import (
+    CASCADE_MAX_PAGES, CASCADE_MAX_MAP_DENSITY, CHUNK_PAGES, CHUNK_MIN_PAGES, GEOCODER_MODE
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _parse_date(value: str) -> datetime:
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def sanity_errors(structured_alert: StructuredAlert) -> List[str]:
+    """Checks a schema-valid extraction can still fail: empty areas and out-of-order dates"""
+    errors = []
+    if not structured_alert.areas:
+        errors.append("no areas")
+    if any(not [name for name in area.place_names if name.strip()] for area in structured_alert.areas):
+        errors.append("area without place names")
+
+    windows = [("alert", structured_alert.effective_from, structured_alert.effective_until)]
+    windows += [
+        (f"areas[{i}]", area.specific_effective_from, area.specific_effective_until)
+        for i, area in enumerate(structured_alert.areas)
+    ]
+    for label, start, end in windows:
+        try:
+            if start and end and _parse_date(start) > _parse_date(end):
+                errors.append(f"{label} ends before it starts")
+        except ValueError:
+            errors.append(f"{label} has an unparseable date")
+    return errors
 
 
 class PipelineProcessor():
-    def __init__(self, llm: str):
-        self.llm = LLMClient(llm)
+    def __init__(self, llm: Union[str, LLMClient, LLMRouter, ResilientLLM], fast_llm=None):
+        # A model key builds a single client; any client exposing call/complete is used as given
+        self.llm = LLMClient(llm) if isinstance(llm, str) else llm
+        # Optional cheaper model tried first (cascade mode); self.llm is the escalation target
+        self.fast_llm = LLMClient(fast_llm) if isinstance(fast_llm, str) else fast_llm
     
-    async def transform(self, job: QueueJob, document_id: str, alert_id: str):
-        file = await url_to_b64_strings(job.message.url)
-        llm_message = await messages(file)
-        response = await self.llm.call(llm_message)
-        json_response, alert, alert_areas = await self._parse(response, document_id, alert_id)
+    async def transform(self, job: QueueJob, document_id: str, alert_id: str, timings: Optional[StageTimings] = None):
+        pages = await self.render(job, timings)
+        prefetch = GeocodePrefetch(self._geocode)
+        response = await self.extract(pages, timings, prefetch)
+        json_response, alert = await self.parse(response, document_id, alert_id, timings)
+        alert_areas = await self.geocode_areas(json_response, alert_id, timings, prefetch)
         return json_response, alert, alert_areas
-    
-    async def _parse(self, response: str, document_id: str, alert_id: str) -> tuple[dict, Alert, list[AlertArea]]:
-        """Parse LLM JSON response"""
-        response = response[response.find("{") : response.rfind("}") + 1]
-        
+
+    async def render(self, job: QueueJob, timings: Optional[StageTimings] = None) -> List[str]:
+        """Fetch the document and encode it as base64 image data URLs"""
+        return await url_to_b64_strings(job.message.url, timings)
+
+    async def render_document(self, job: QueueJob, timings: Optional[StageTimings] = None) -> tuple[List[str], str]:
+        """Rendered pages plus the document text layer (falling back to the scraped raw_text)"""
+        pages, text = await render_document(job.message.url, timings)
+        return pages, text or job.message.raw_text or ""
+
+    async def extract_diff(self, previous: dict, text: str, timings: Optional[StageTimings] = None) -> str:
+        """
+        Cheap text-only extraction for a near-duplicate: ask only for the fields that changed
+        since the earlier document's alert and apply them to it.
+        """
+        timings = timings or StageTimings()
+        previous = {key: value for key, value in previous.items() if key in StructuredAlert.model_fields}
+        with timings.stage("llm"):
+            response = await (self.fast_llm or self.llm).call(diff_messages(previous, text), json_mode=True)
+        changes = {key: value for key, value in repair_json(response).items() if key in StructuredAlert.model_fields}
+        logger.info(f"Near-duplicate changed fields: {sorted(changes)}")
+        return json.dumps({**previous, **changes}, ensure_ascii=False)
+
+    async def extract(
+        self,
+        pages: List[str],
+        timings: Optional[StageTimings] = None,
+        prefetch: Optional[GeocodePrefetch] = None
+    ) -> str:
+        """
+        Run the extraction prompt over the rendered pages and return the raw completion.
+        With a prefetch, area lists start geocoding while the completion is still streaming.
+        """
+        timings = timings or StageTimings()
+        # Decided on the whole document: a long document split into short chunks still escalates
+        escalate = self.escalation_reason(pages) if self.fast_llm is not None else None
+        if CHUNK_PAGES and len(pages) > CHUNK_MIN_PAGES:
+            return await self._extract_chunked(pages, timings, prefetch, escalate)
+        return await self._extract_pages(pages, timings, prefetch, escalate=escalate)
+
+    async def _extract_chunked(
+        self,
+        pages: List[str],
+        timings: StageTimings,
+        prefetch: Optional[GeocodePrefetch] = None,
+        escalate: Optional[str] = None
+    ) -> str:
+        """Extract page groups concurrently and merge them into a single completion"""
+        chunks = page_chunks(pages, CHUNK_PAGES)
+        chunk_timings = [StageTimings() for _ in chunks]
+        logger.info(f"Extracting {len(pages)} pages in {len(chunks)} chunks of up to {CHUNK_PAGES}")
+
+        tasks = []
+        first = 1
+        for chunk, chunk_timing in zip(chunks, chunk_timings):
+            part = chunk_note.format(first=first, last=first + len(chunk) - 1, total=len(pages))
+            tasks.append(self._extract_pages(chunk, chunk_timing, prefetch.consumer() if prefetch else None, part, escalate))
+            first += len(chunk)
+        responses = await asyncio.gather(*tasks)
+        timings.merge_parallel(chunk_timings)
+
+        merged = merge_alerts([normalize_alert(repair_json(response)) for response in responses])
+        return json.dumps(merged, ensure_ascii=False)
+
+    async def _extract_pages(
+        self,
+        pages: List[str],
+        timings: StageTimings,
+        stream_to=None,
+        part: Optional[str] = None,
+        escalate: Optional[str] = None
+    ) -> str:
+        """Extract one set of pages; escalate is why the whole document skips the fast model"""
+        with timings.stage("prompt_build"):
+            llm_message = await messages(pages, part)
+
+        if self.fast_llm is not None:
+            reason = escalate
+            if reason is None:
+                try:
+                    with timings.stage("llm"):
+                        result = await self.fast_llm.complete(llm_message, json_mode=True, stream_to=stream_to)
+                    timings.record_llm(result)
+                    reason = self.validation_error(result.content)
+                except Exception as e:
+                    reason = f"fast model failed: {e}"
+                if reason is None:
+                    return result.content
+            logger.info(f"Escalating extraction to {self.llm.model}: {reason}")
+
+        with timings.stage("llm"):
+            result = await self.llm.complete(llm_message, json_mode=True, stream_to=stream_to)
+        timings.record_llm(result)
+        return result.content
+
+    def escalation_reason(self, pages: List[str]) -> Optional[str]:
+        """Why a document should skip the fast model (None when it is simple enough)"""
+        if len(pages) > CASCADE_MAX_PAGES:
+            return f"{len(pages)} pages"
         try:
-            # Parse and validate JSON structure
-            structured_alert = StructuredAlert.model_validate_json(response)
-            json_response = structured_alert.model_dump()
-            
-            # Create Alert object
-            alert_model = Alert(
-                id=alert_id,
-                document_id=document_id,
-                category=structured_alert.category,
-                event=structured_alert.event,
-                urgency=structured_alert.urgency,
-                severity=structured_alert.severity,
-                description=structured_alert.description,
-                instruction=structured_alert.instruction,
-                effective_from=structured_alert.effective_from,
-                effective_until=structured_alert.effective_until
-            )
+            density = map_density(pages)
+        except Exception as e:
+            return f"could not measure map density: {e}"
+        if density > CASCADE_MAX_MAP_DENSITY:
+            return f"map density {density:.2f}"
+        return None
+
+    def validation_error(self, response: str) -> Optional[str]:
+        """Schema and sanity check of a raw completion after local repair (None when it is usable)"""
+        try:
+            structured_alert = StructuredAlert.model_validate(normalize_alert(repair_json(response)))
+        except ValidationError as e:
+            return f"invalid output: {e.error_count()} schema errors"
+        except ValueError as e:
+            return str(e)
+        errors = sanity_errors(structured_alert)
+        return "; ".join(errors) if errors else None
+
+    async def parse(self, response: str, document_id: str, alert_id: str, timings: Optional[StageTimings] = None) -> tuple[dict, dict]:
+        """Validate the raw completion into the structured JSON and the alert row"""
+        timings = timings or StageTimings()
+        with timings.stage("parse"):
+            return await self._parse(response, document_id, alert_id)
+
+    async def _parse(self, response: str, document_id: str, alert_id: str) -> tuple[dict, dict]:
+        """
+        Parse LLM JSON response. Malformed JSON, enum case and date formats are repaired
+        locally; fields that still fail validation get one targeted follow-up prompt
+        instead of a full re-run of the extraction.
+        """
+        data = normalize_alert(repair_json(response))
+        try:
+            return self._validate(data, document_id, alert_id)
+        except ValidationError as e:
+            errors = invalid_fields(e)
 
-            alert = alert_model.model_dump(mode='json')
-            
-            # Create AlertArea objects from the areas list
-            alert_areas = []
-            for area_list in structured_alert.areas:
-                place_ids = await self._geocode(area_list.place_names)
-                for place_id in place_ids:
-                    # Skip empty place_ids (unmatched locations)
-                    if not place_id:
-                        continue
-                    alert_area_model = AlertArea(
-                        alert_id=alert_id,
-                        place_id=place_id,
-                        specific_effective_from=area_list.specific_effective_from,
-                        specific_effective_until=area_list.specific_effective_until,
-                        specific_urgency=area_list.specific_urgency,
-                        specific_severity=area_list.specific_severity,
-                        specific_instruction=area_list.specific_instruction
-                    )
-                    alert_areas.append(alert_area_model.model_dump(mode='json'))
-            
-            return json_response, alert, alert_areas
-            
-        except json.JSONDecodeError as e:
-            raise ValueError(f"LLM returned invalid JSON: {e}")
+        logger.info(f"Asking for corrections to {len(errors)} invalid fields: {[path for path, _ in errors]}")
+        try:
+            fixes = repair_json(await (self.fast_llm or self.llm).call(fix_messages(data, errors), json_mode=True))
+            data = normalize_alert(apply_fixes(data, fixes))
+            return self._validate(data, document_id, alert_id)
         except ValidationError as e:
             raise ValueError(f"JSON doesn't match expected schema: {e}")
+        except ValueError as e:
+            raise ValueError(f"Could not correct invalid fields: {e}")
+
+    def _validate(self, data: dict, document_id: str, alert_id: str) -> tuple[dict, dict]:
+        """Validate structured JSON and build the alert row; raises ValidationError"""
+        structured_alert = StructuredAlert.model_validate(data)
+        json_response = structured_alert.model_dump(mode='json')
+
+        # Create Alert object
+        alert_model = Alert(
+            id=alert_id,
+            document_id=document_id,
+            category=structured_alert.category,
+            event=structured_alert.event,
+            urgency=structured_alert.urgency,
+            severity=structured_alert.severity,
+            description=structured_alert.description,
+            instruction=structured_alert.instruction,
+            effective_from=structured_alert.effective_from,
+            effective_until=structured_alert.effective_until
+        )
+
+        alert = alert_model.model_dump(mode='json')
+        return json_response, alert
+
+    async def geocode_areas(
+        self,
+        json_response: dict,
+        alert_id: str,
+        timings: Optional[StageTimings] = None,
+        prefetch: Optional[GeocodePrefetch] = None
+    ) -> List[dict]:
+        """Geocode every area list of a structured alert into alert_areas rows"""
+        timings = timings or StageTimings()
+        structured_alert = StructuredAlert.model_validate(json_response)
         
-    async def _geocode(self, places: List[str]) -> List[str]:        
+        # Create AlertArea objects from the areas list
+        alert_areas = []
+        for area_list in structured_alert.areas:
+            # Only the wait for a prefetched geocode is on the critical path
+            task = prefetch.pop(area_list.place_names) if prefetch else None
+            with timings.stage("geocode"):
+                place_ids = await (task or self._geocode(area_list.place_names))
+            for place_id in place_ids:
+                # Skip empty place_ids (unmatched locations)
+                if not place_id:
+                    continue
+                alert_area_model = AlertArea(
+                    alert_id=alert_id,
+                    place_id=place_id,
+                    specific_effective_from=area_list.specific_effective_from,
+                    specific_effective_until=area_list.specific_effective_until,
+                    specific_urgency=area_list.specific_urgency,
+                    specific_severity=area_list.specific_severity,
+                    specific_instruction=area_list.specific_instruction
+                )
+                alert_areas.append(alert_area_model.model_dump(mode='json'))
+        
+        if prefetch:
+            prefetch.cancel_unused()
+        return alert_areas
+        
+    async def _geocode(self, places: List[str]) -> List[str]:
+        if GEOCODER_MODE == "embedded":
+            return await self._geocode_embedded(places)
+        return await self._geocode_http(places)
+
+    async def _geocode_embedded(self, places: List[str]) -> List[str]:
+        """Geocode in this process with the shared, warm GeocodingService (no network hops)"""
+        from geocoding import get_shared_geocoding_service
+        return await get_shared_geocoding_service().geocode_batch_simple(places)
+
+    async def _geocode_http(self, places: List[str]) -> List[str]:
         url = os.getenv("MODAL_GEOCODER")
         auth_token = os.getenv("SECRET_KEY")
         
@@ -0,0 +1,119 @@
+"""
+In-memory stand-in for the async Supabase client, covering the query builder
+calls the processing engine makes (tables and pgmq_public RPCs).
+"""
+
+from types import SimpleNamespace
+
+
+class StubQuery:
+    def __init__(self, db, table):
+        self.db = db
+        self.table = table
+        self.action = ("select",)
+        self.filters = []
+        self.limit_to = None
+
+    def select(self, columns="*"):
+        self.action = ("select",)
+        return self
+
+    def insert(self, row):
+        self.action = ("insert", row)
+        return self
+
+    def upsert(self, row, on_conflict):
+        self.action = ("upsert", row, on_conflict)
+        return self
+
+    def update(self, values):
+        self.action = ("update", values)
+        return self
+
+    def delete(self):
+        self.action = ("delete",)
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def neq(self, column, value):
+        self.filters.append(lambda row: row.get(column) != value)
+        return self
+
+    def gte(self, column, value):
+        # NULL >= x is not true in SQL either
+        self.filters.append(lambda row: row.get(column) is not None and row[column] >= value)
+        return self
+
+    def overlaps(self, column, values):
+        self.filters.append(lambda row: bool(set(row.get(column) or ()) & set(values)))
+        return self
+
+    def in_(self, column, values):
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def limit(self, n):
+        self.limit_to = n
+        return self
+
+    async def execute(self):
+        rows = self.db.tables.setdefault(self.table, [])
+        matching = [row for row in rows if all(f(row) for f in self.filters)]
+        kind = self.action[0]
+        if kind == "select":
+            data = [dict(row) for row in matching[:self.limit_to]]
+        elif kind == "insert":
+            rows.append(dict(self.action[1]))
+            data = [dict(self.action[1])]
+        elif kind == "upsert":
+            # A single row or a list of rows; on_conflict may name several columns
+            upserted = self.action[1] if isinstance(self.action[1], list) else [self.action[1]]
+            keys = self.action[2].split(",")
+            for row in upserted:
+                existing = next((r for r in rows if all(r.get(k) == row[k] for k in keys)), None)
+                if existing is None:
+                    rows.append(dict(row))
+                else:
+                    existing.update(row)
+            data = [dict(row) for row in upserted]
+        elif kind == "update":
+            for row in matching:
+                row.update(self.action[1])
+            data = [dict(row) for row in matching]
+        else:
+            self.db.tables[self.table] = [row for row in rows if row not in matching]
+            data = [dict(row) for row in matching]
+        return SimpleNamespace(data=data, error=None)
+
+
+class StubRpc:
+    def __init__(self, db, name, params):
+        self.db = db
+        self.name = name
+        self.params = params
+
+    async def execute(self):
+        self.db.rpc_calls.append((self.name, self.params))
+        handler = self.db.rpc_handlers.get(self.name)
+        return SimpleNamespace(data=handler(self.params) if handler else True, error=None)
+
+
+class StubSupabase:
+    """Rows per table in memory; RPCs are recorded and answered by optional handlers"""
+
+    def __init__(self, **tables):
+        self.tables = {name: [dict(row) for row in rows] for name, rows in tables.items()}
+        self.rpc_calls = []
+        self.rpc_handlers = {}
+
+    def table(self, name):
+        return StubQuery(self, name)
+
+    def schema(self, name):
+        return self
+
+    def rpc(self, name, params):
+        return StubRpc(self, name, params)
@@ -0,0 +1,42 @@
+"""
+alert_areas delta tests for reprocessed alerts (no database needed).
+
+Usage:
+    python -m pytest processing_engine/tests/test_alert_area_delta.py
+"""
+
+from processing_engine.worker import diff_alert_areas
+
+
+def area(place_id, **overrides):
+    return {"alert_id": "alert-1", "place_id": place_id, **overrides}
+
+
+def test_unchanged_areas_are_not_rewritten():
+    existing = [area("lahore", specific_severity="Severe"), area("kasur")]
+    changed, stale = diff_alert_areas(existing, [area("lahore", specific_severity="Severe"), area("kasur")])
+    assert changed == [] and stale == []
+
+
+def test_new_changed_and_removed_areas():
+    existing = [area("lahore", specific_severity="Moderate"), area("kasur"), area("okara")]
+    incoming = [area("lahore", specific_severity="Severe"), area("kasur"), area("sheikhupura")]
+    changed, stale = diff_alert_areas(existing, incoming)
+    assert [a["place_id"] for a in changed] == ["lahore", "sheikhupura"]
+    assert stale == ["okara"]
+
+
+def test_timestamps_compare_by_instant():
+    existing = [area("lahore", specific_effective_from="2025-07-01T09:00:00+00:00")]
+    incoming = [area("lahore", specific_effective_from="2025-07-01T14:00:00+05:00")]
+    assert diff_alert_areas(existing, incoming) == ([], [])
+
+
+def test_duplicate_and_unmatched_places_in_incoming():
+    incoming = [
+        area("lahore", specific_urgency="Immediate"),
+        area("lahore", specific_urgency="Future"),
+        area(None),
+    ]
+    changed, stale = diff_alert_areas([], incoming)
+    assert changed == [incoming[0]] and stale == []
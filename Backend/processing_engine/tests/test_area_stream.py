@@ -0,0 +1,91 @@
+"""
+Streaming area-list parser and geocode prefetch tests (no LLM or geocoder needed).
+
+Usage:
+    python -m pytest processing_engine/tests/test_area_stream.py
+"""
+
+import asyncio
+
+from processing_engine.processor_utils.area_stream import AreaStreamParser, GeocodePrefetch
+
+COMPLETION = (
+    '{"event": "Flood {update}", "description": "Areas: [\\"not an area\\"]",'
+    ' "details": {"areas": [{"place_names": ["Ignored"]}]},'
+    ' "areas": [{"place_names": ["Lahore", "Kasur"], "specific_severity": "Severe"},'
+    ' {"place_names": "Okara", "specific_instruction": "Move to {higher} ground"},'
+    ' {"place_names": []}, {"place_names": ["Multan"],'
+    ' "specific_urgency": "Immediate"}], "instruction": "Stay alert"}'
+)
+
+
+def stream(parser, text, size):
+    for i in range(0, len(text), size):
+        parser.feed(text[i:i + size])
+
+
+def test_areas_are_emitted_as_they_close_regardless_of_chunking():
+    for size in (1, 7, len(COMPLETION)):
+        areas = []
+        stream(AreaStreamParser(areas.append), COMPLETION, size)
+        assert [a["place_names"] for a in areas] == [["Lahore", "Kasur"], ["Okara"], ["Multan"]]
+        assert areas[1]["specific_instruction"] == "Move to {higher} ground"
+
+
+def test_area_is_emitted_before_the_completion_ends():
+    areas = []
+    parser = AreaStreamParser(areas.append)
+    parser.feed('{"areas": [{"place_names": ["Lahore"]}, {"place_na')
+    assert [a["place_names"] for a in areas] == [["Lahore"]]
+
+
+def test_start_resets_for_a_new_completion():
+    areas = []
+    parser = AreaStreamParser(areas.append)
+    parser.feed('{"areas": [{"place_names": ["Lah')
+    parser.start()
+    parser.feed('{"areas": [{"place_names": ["Kasur"]}]}')
+    assert [a["place_names"] for a in areas] == [["Kasur"]]
+
+
+def test_prefetch_geocodes_each_area_list_once():
+    calls = []
+
+    async def geocode(place_names):
+        calls.append(place_names)
+        await asyncio.sleep(0)
+        return [f"id-{name}" for name in place_names]
+
+    async def run():
+        prefetch = GeocodePrefetch(geocode)
+        prefetch.start()
+        stream(prefetch, COMPLETION, 5)
+        # A concurrent chunk repeating an area list reuses the same task
+        prefetch.consumer().feed('{"areas": [{"place_names": [" Lahore", "Kasur "]}]}')
+
+        hit = await prefetch.pop(["Lahore", "Kasur"])
+        miss = prefetch.pop(["Sialkot"])
+        leftover = list(prefetch.tasks.values())
+        prefetch.cancel_unused()
+        await asyncio.sleep(0)
+        return hit, miss, leftover, prefetch.tasks
+
+    hit, miss, leftover, remaining = asyncio.run(run())
+    assert hit == ["id-Lahore", "id-Kasur"] and miss is None
+    assert sorted(calls) == [["Lahore", "Kasur"], ["Multan"], ["Okara"]]
+    assert len(leftover) == 2 and remaining == {}
+
+
+def test_failed_prefetch_surfaces_when_awaited():
+    async def geocode(place_names):
+        raise ConnectionError("geocoder down")
+
+    async def run():
+        prefetch = GeocodePrefetch(geocode)
+        prefetch.feed('{"areas": [{"place_names": ["Lahore"]}]}')
+        try:
+            await prefetch.pop(["Lahore"])
+        except ConnectionError as e:
+            return str(e)
+
+    assert asyncio.run(run()) == "geocoder down"
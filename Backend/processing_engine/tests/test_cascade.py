@@ -0,0 +1,107 @@
+"""
+Model cascade tests: escalation decisions, output validation and sanity checks,
+with scripted stand-in clients (no API calls, no rendering).
+
+Usage:
+    python -m pytest processing_engine/tests/test_cascade.py
+"""
+
+import asyncio
+import json
+
+import pytest
+
+import processing_engine.processors.pipeline_processor as pipeline_module
+from processing_engine.models.schemas import StructuredAlert
+from processing_engine.processor_utils.llm_client import LLMResult
+from processing_engine.processors.pipeline_processor import PipelineProcessor, sanity_errors
+
+ALERT = {
+    "category": "Met",
+    "event": "Flood",
+    "urgency": "Immediate",
+    "severity": "Severe",
+    "description": "Heavy rain",
+    "instruction": "Move to higher ground",
+    "effective_from": "2025-07-01T00:00:00Z",
+    "effective_until": "2025-07-03T00:00:00Z",
+    "areas": [{"place_names": ["Lahore"]}],
+}
+
+
+class ScriptedLLM:
+    def __init__(self, model, content=json.dumps(ALERT)):
+        self.model = model
+        self.content = content
+        self.calls = []
+
+    async def complete(self, messages, **kwargs):
+        self.calls.append(messages)
+        return LLMResult(content=self.content, model=self.model, latency=0)
+
+
+@pytest.fixture(autouse=True)
+def no_prompt_or_images(monkeypatch):
+    async def fake_messages(pages, part=None):
+        return pages
+    monkeypatch.setattr(pipeline_module, "messages", fake_messages)
+    monkeypatch.setattr(pipeline_module, "map_density", lambda pages: 0.0)
+    monkeypatch.setattr(pipeline_module, "CASCADE_MAX_PAGES", 2)
+    monkeypatch.setattr(pipeline_module, "CASCADE_MAX_MAP_DENSITY", 0.12)
+    monkeypatch.setattr(pipeline_module, "CHUNK_PAGES", 0)
+
+
+def cascade(fast_content=json.dumps(ALERT)):
+    return PipelineProcessor(ScriptedLLM("thinking"), fast_llm=ScriptedLLM("fast", fast_content))
+
+
+def alert(**overrides):
+    return StructuredAlert.model_validate({**ALERT, **overrides})
+
+
+def test_sanity_errors():
+    assert sanity_errors(alert()) == []
+    assert sanity_errors(alert(areas=[])) == ["no areas"]
+    assert sanity_errors(alert(areas=[{"place_names": [" "]}])) == ["area without place names"]
+    assert sanity_errors(alert(effective_until="2025-06-30T00:00:00Z")) == ["alert ends before it starts"]
+    assert sanity_errors(alert(areas=[{"place_names": ["Lahore"], "specific_effective_from": "soon",
+                                       "specific_effective_until": "2025-07-02T00:00:00Z"}])) == [
+        "areas[0] has an unparseable date"
+    ]
+
+
+def test_validation_error():
+    processor = cascade()
+    assert processor.validation_error(json.dumps(ALERT)) is None
+    assert processor.validation_error(json.dumps({**ALERT, "areas": []})) == "no areas"
+    assert processor.validation_error(json.dumps({**ALERT, "category": "Weather"})).startswith("invalid output: 1 schema")
+    assert processor.validation_error("no json here") == "LLM returned invalid JSON that could not be repaired"
+
+
+def test_escalation_reason(monkeypatch):
+    processor = cascade()
+    assert processor.escalation_reason(["p1", "p2"]) is None
+    assert processor.escalation_reason(["p1", "p2", "p3"]) == "3 pages"
+    monkeypatch.setattr(pipeline_module, "map_density", lambda pages: 0.3)
+    assert processor.escalation_reason(["p1"]) == "map density 0.30"
+
+
+def test_simple_document_stays_on_the_fast_model():
+    processor = cascade()
+    asyncio.run(processor.extract(["p1", "p2"]))
+    assert len(processor.fast_llm.calls) == 1 and processor.llm.calls == []
+
+
+def test_invalid_fast_output_escalates():
+    processor = cascade(fast_content=json.dumps({**ALERT, "areas": []}))
+    assert json.loads(asyncio.run(processor.extract(["p1"]))) == ALERT
+    assert len(processor.fast_llm.calls) == 1 and len(processor.llm.calls) == 1
+
+
+def test_long_document_escalates_every_chunk(monkeypatch):
+    monkeypatch.setattr(pipeline_module, "CHUNK_PAGES", 2)
+    monkeypatch.setattr(pipeline_module, "CHUNK_MIN_PAGES", 2)
+    processor = cascade()
+    asyncio.run(processor.extract([f"p{i}" for i in range(6)]))
+    # Each 2-page chunk would pass on its own; the 6-page document does not
+    assert processor.fast_llm.calls == [] and len(processor.llm.calls) == 3
@@ -0,0 +1,117 @@
+"""
+Stage checkpoint and resume tests on an in-memory Supabase stand-in.
+
+Usage:
+    python -m pytest processing_engine/tests/test_checkpoints.py
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+import pytest
+
+import processing_engine.worker as worker_module
+from processing_engine.models.schemas import QueueJob
+from processing_engine.processor_utils.checkpoints import CheckpointStore
+from processing_engine.tests.stubs import StubSupabase
+from processing_engine.worker import QueueWorker
+
+PAGES = ["data:image/png;base64,AAAA", "data:image/png;base64,BBBB"]
+
+
+def make_job(read_ct=1):
+    now = datetime.now(timezone.utc)
+    return QueueJob(msg_id=11, read_ct=read_ct, enqueued_at=now, vt=now, message={
+        "url": "https://example.org/advisory.pdf", "title": "Flood advisory", "source": "NDMA",
+        "filename": None, "filetype": "pdf", "document_id": "doc-1", "posted_date": "2025-07-01",
+    })
+
+
+class StubProcessor:
+    def __init__(self):
+        self.calls = []
+
+    async def render_document(self, job, timings=None):
+        self.calls.append("render")
+        return PAGES, ""
+
+    async def extract(self, pages, timings=None, prefetch=None):
+        self.calls.append(("extract", len(pages)))
+        return '{"title": "Flood"}'
+
+    async def parse(self, response, document_id, alert_id, timings=None):
+        self.calls.append("parse")
+        return {"title": "Flood"}, {"id": alert_id, "document_id": document_id}
+
+    async def _geocode(self, place_names):
+        return []
+
+    async def geocode_areas(self, json_response, alert_id, timings=None, prefetch=None):
+        self.calls.append("geocode")
+        return [{"alert_id": alert_id, "place_id": "sukkur"}]
+
+
+def make_worker(db):
+    worker = QueueWorker.__new__(QueueWorker)
+    worker.logger = logging.getLogger(__name__)
+    worker.db = db
+    worker.processor = StubProcessor()
+    worker.checkpoints = CheckpointStore(db)
+    worker.near_duplicates = None
+    return worker
+
+
+@pytest.fixture(autouse=True)
+def no_streaming(monkeypatch):
+    monkeypatch.setattr(worker_module, "STREAM_GEOCODE", False)
+
+
+def test_resume_index():
+    assert CheckpointStore.resume_index({}) == 0
+    assert CheckpointStore.resume_stage({"pages": {"page_count": 2}}) == "llm_output"
+    assert CheckpointStore.resume_stage({"pages": {}, "llm_output": "{}", "parsed_alert": {}}) == "alert_areas"
+    assert CheckpointStore.resume_stage({"alert_areas": []}) is None
+
+
+def test_pages_checkpoint_stores_metadata_only():
+    db = StubSupabase()
+    worker = make_worker(db)
+    asyncio.run(worker._run_stages(make_job()))
+
+    row = db.tables["processing_checkpoints"][0]
+    assert row["pages"] == {"url": "https://example.org/advisory.pdf", "page_count": 2}
+    assert worker.processor.calls == ["render", ("extract", 2), "parse", "geocode"]
+
+
+def test_resume_before_llm_renders_again():
+    db = StubSupabase(processing_checkpoints=[
+        {"document_id": "doc-1", "pages": {"url": "https://example.org/advisory.pdf", "page_count": 2}}
+    ])
+    worker = make_worker(db)
+    asyncio.run(worker._run_stages(make_job(read_ct=2)))
+    assert worker.processor.calls == ["render", ("extract", 2), "parse", "geocode"]
+
+
+def test_resume_after_llm_skips_render_and_extract():
+    db = StubSupabase(processing_checkpoints=[
+        {"document_id": "doc-1", "pages": {"page_count": 2}, "llm_output": '{"title": "Flood"}'}
+    ])
+    worker = make_worker(db)
+    json_response, alert, areas = asyncio.run(worker._run_stages(make_job(read_ct=2)))
+    assert worker.processor.calls == ["parse", "geocode"]
+    assert areas[0]["place_id"] == "sukkur"
+
+
+def test_clear_and_record_error():
+    async def run():
+        db = StubSupabase()
+        store = CheckpointStore(db)
+        await store.record_error(make_job(), "TimeoutError: LLM call timed out")
+        state = await store.load("doc-1")
+        await store.clear("doc-1")
+        return state, await store.load("doc-1")
+
+    state, cleared = asyncio.run(run())
+    assert state["last_error"] == "TimeoutError: LLM call timed out"
+    assert cleared == {}
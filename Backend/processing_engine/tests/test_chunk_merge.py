@@ -0,0 +1,57 @@
+"""
+Page-chunk alert merge tests (no LLM needed).
+
+Usage:
+    python -m pytest processing_engine/tests/test_chunk_merge.py
+"""
+
+from processing_engine.processor_utils.chunk_merge import merge_alerts, page_chunks
+
+
+def test_page_chunks():
+    assert page_chunks(list("abcdefg"), 3) == [["a", "b", "c"], ["d", "e", "f"], ["g"]]
+    assert page_chunks([], 3) == []
+
+
+def test_single_part_is_returned_unchanged():
+    part = {"event": "Heatwave", "areas": [{"place_names": ["Lahore"]}]}
+    assert merge_alerts([part]) is part
+
+
+def test_merge_alerts():
+    lahore = {"place_names": ["Lahore"], "specific_severity": "Severe"}
+    parts = [
+        {
+            "category": "Met", "event": None, "urgency": "Expected", "severity": "Moderate",
+            "description": "Heavy rain expected.", "instruction": "Avoid travel.",
+            "effective_from": "2025-07-14T09:00:00+05:00", "effective_until": "2025-07-16T18:00:00+05:00",
+            "areas": [lahore, "not an area"],
+        },
+        {
+            "category": "Geo", "event": "Monsoon rains", "urgency": "Immediate", "severity": "Unknown",
+            "description": " Heavy rain expected. ", "instruction": "Clear drains.",
+            "effective_from": "2025-07-14T00:00:00+00:00", "effective_until": "July 20",
+            "areas": [
+                {"place_names": [" lahore "], "specific_severity": "Severe"},
+                {"place_names": ["Lahore"], "specific_severity": "Extreme"},
+                {"place_names": ["Kasur"]},
+            ],
+        },
+    ]
+    merged = merge_alerts(parts)
+
+    assert merged["category"] == "Met" and merged["event"] == "Monsoon rains"
+    assert merged["urgency"] == "Immediate" and merged["severity"] == "Moderate"
+    assert merged["description"] == "Heavy rain expected."
+    assert merged["instruction"] == "Avoid travel.\n\nClear drains."
+    # Widest window; unparseable dates are ignored when a parseable one exists
+    assert merged["effective_from"] == "2025-07-14T00:00:00+00:00"  # 05:00 PKT, earlier than 09:00 PKT
+    assert merged["effective_until"] == "2025-07-16T18:00:00+05:00"
+    # Exact duplicates (after name normalization) are dropped; differing overrides are kept
+    assert merged["areas"] == [lahore, parts[1]["areas"][1], {"place_names": ["Kasur"]}]
+
+
+def test_unranked_values_fall_back_to_the_first_present():
+    merged = merge_alerts([{"severity": None, "urgency": "soon"}, {"severity": "bad", "urgency": None}])
+    assert merged["severity"] == "bad" and merged["urgency"] == "soon"
+    assert merged["areas"] == [] and merged["description"] == ""
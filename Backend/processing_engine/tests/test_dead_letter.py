@@ -0,0 +1,90 @@
+"""
+Dead-letter queue tests with pgmq simulated on an in-memory Supabase stand-in.
+
+Usage:
+    python -m pytest processing_engine/tests/test_dead_letter.py
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+from processing_engine.models.schemas import QueueJob
+from processing_engine.processor_utils.dead_letter import DeadLetterQueue
+from processing_engine.tests.stubs import StubSupabase
+
+
+class StubPgmq(StubSupabase):
+    """Queues as lists of {msg_id, read_ct, message}; only read() counts a delivery"""
+
+    def __init__(self):
+        super().__init__()
+        self.queues = {"processing_queue": [], "processing_dlq": []}
+        self.next_id = 1
+        self.rpc_handlers = {"send": self._send, "delete": self._delete, "peek": self._peek}
+
+    def _send(self, params):
+        self.queues[params["queue_name"]].append({"msg_id": self.next_id, "read_ct": 0, "message": params["message"]})
+        self.next_id += 1
+        return [self.next_id - 1]
+
+    def _delete(self, params):
+        queue = self.queues[params["queue_name"]]
+        before = len(queue)
+        queue[:] = [m for m in queue if m["msg_id"] != params["message_id"]]
+        return len(queue) < before
+
+    def _peek(self, params):
+        ids = params["message_ids"]
+        rows = [
+            dict(m) for m in self.queues[params["queue_name"]]
+            if m["msg_id"] > params["after_msg_id"] and (ids is None or m["msg_id"] in ids)
+        ]
+        return rows[:params["max_messages"]]
+
+
+def make_job(msg_id, document_id):
+    now = datetime.now(timezone.utc)
+    return QueueJob(msg_id=msg_id, read_ct=3, enqueued_at=now, vt=now, message={
+        "url": f"https://example.org/{document_id}.pdf", "title": "Advisory", "source": "NDMA",
+        "filename": None, "filetype": "pdf", "document_id": document_id, "posted_date": "2025-07-01",
+    })
+
+
+def dead_letter(db, count):
+    dlq = DeadLetterQueue(db)
+    for i in range(count):
+        db.queues["processing_queue"].append({"msg_id": 100 + i, "read_ct": 3, "message": {}})
+        asyncio.run(dlq.send(make_job(100 + i, f"doc-{i}"), "ValueError: invalid JSON"))
+    return dlq
+
+
+def test_send_moves_the_job_with_its_failure_reason():
+    db = StubPgmq()
+    dead_letter(db, 1)
+    assert db.queues["processing_queue"] == []
+    [record] = db.queues["processing_dlq"]
+    assert record["message"]["failure_reason"] == "ValueError: invalid JSON"
+    assert record["message"]["source_msg_id"] == 100 and record["message"]["payload"]["document_id"] == "doc-0"
+
+
+def test_list_does_not_count_a_delivery():
+    db = StubPgmq()
+    dlq = dead_letter(db, 3)
+    assert [r["msg_id"] for r in asyncio.run(dlq.list(limit=2))] == [1, 2]
+    assert all(m["read_ct"] == 0 for m in db.queues["processing_dlq"])
+
+
+def test_requeue_finds_ids_past_the_first_page():
+    db = StubPgmq()
+    dlq = dead_letter(db, 5)
+    assert asyncio.run(dlq.requeue([2, 5, 42], limit=2)) == 2
+    assert [m["msg_id"] for m in db.queues["processing_dlq"]] == [1, 3, 4]
+    assert [m["message"]["document_id"] for m in db.queues["processing_queue"]] == ["doc-1", "doc-4"]
+
+
+def test_requeue_all_pages_through_the_queue():
+    db = StubPgmq()
+    dlq = dead_letter(db, 5)
+    assert asyncio.run(dlq.requeue(limit=2)) == 5
+    assert db.queues["processing_dlq"] == []
+    assert len(db.queues["processing_queue"]) == 5
@@ -0,0 +1,71 @@
+"""
+Embedded geocoding tests: the worker geocodes in-process with the shared service
+instead of calling the MODAL_GEOCODER endpoint (stubbed service, no network).
+
+Usage:
+    python -m pytest processing_engine/tests/test_embedded_geocoder.py
+"""
+
+import asyncio
+import logging
+
+import pytest
+
+import geocoding
+import processing_engine.processors.pipeline_processor as pipeline_module
+import processing_engine.worker as worker_module
+from processing_engine.processors.pipeline_processor import PipelineProcessor
+from processing_engine.worker import QueueWorker
+
+
+class StubService:
+    def __init__(self):
+        self.calls = []
+
+    async def geocode_batch_simple(self, place_names):
+        self.calls.append(place_names)
+        return [f"id-{name}" for name in place_names]
+
+
+class NoHttp:
+    def __init__(self, *args, **kwargs):
+        raise AssertionError("embedded mode must not call the geocoder endpoint")
+
+
+@pytest.fixture
+def embedded(monkeypatch):
+    service = StubService()
+    monkeypatch.setattr(geocoding, "get_shared_geocoding_service", lambda: service)
+    monkeypatch.setattr(pipeline_module, "GEOCODER_MODE", "embedded")
+    monkeypatch.setattr(pipeline_module, "AsyncClient", NoHttp)
+    return service
+
+
+def test_embedded_mode_uses_the_shared_service(embedded):
+    processor = PipelineProcessor(llm=object())
+    assert asyncio.run(processor._geocode(["Lahore", "Kasur"])) == ["id-Lahore", "id-Kasur"]
+    assert embedded.calls == [["Lahore", "Kasur"]]
+
+
+def test_http_mode_posts_to_the_endpoint(embedded, monkeypatch):
+    monkeypatch.setattr(pipeline_module, "GEOCODER_MODE", "http")
+    with pytest.raises(AssertionError, match="endpoint"):
+        asyncio.run(PipelineProcessor(llm=object())._geocode(["Lahore"]))
+    assert embedded.calls == []
+
+
+def test_worker_warms_the_embedded_geocoder_once(embedded, monkeypatch):
+    refresher_starts = []
+    monkeypatch.setattr(worker_module, "GEOCODER_MODE", "embedded")
+    monkeypatch.setattr(geocoding, "start_gazetteer_refresher", lambda: refresher_starts.append(1))
+
+    async def no_examples():
+        return None
+    monkeypatch.setattr(worker_module, "_load_examples", no_examples)
+
+    worker = QueueWorker.__new__(QueueWorker)
+    worker.logger = logging.getLogger("test")
+    worker._cache_initialized = False
+    asyncio.run(worker.initialize())
+    asyncio.run(worker.initialize())
+    assert worker._cache_initialized and refresher_starts == [1]
@@ -0,0 +1,81 @@
+"""
+Visibility heartbeat tests with short intervals on an in-memory Supabase stand-in.
+
+Usage:
+    python -m pytest processing_engine/tests/test_heartbeat.py
+"""
+
+import asyncio
+
+import pytest
+
+from processing_engine.processor_utils.heartbeat import Heartbeat, JobStalledError
+from processing_engine.tests.stubs import StubSupabase
+
+
+def set_vt_calls(db):
+    return [params for name, params in db.rpc_calls if name == "set_vt"]
+
+
+def test_extends_visibility_while_the_job_progresses():
+    async def run():
+        db = StubSupabase()
+        async with Heartbeat(db, 42, queue_name="processing_queue_urgent", visibility_timeout=5,
+                             interval=0.02, stall_timeout=1) as heartbeat:
+            for _ in range(5):
+                await asyncio.sleep(0.02)
+                heartbeat.touch()
+        calls = len(set_vt_calls(db))
+        await asyncio.sleep(0.06)  # stopped on exit
+        return db, calls
+
+    db, calls = asyncio.run(run())
+    assert calls >= 2 and len(set_vt_calls(db)) == calls
+    assert set_vt_calls(db)[0] == {"queue_name": "processing_queue_urgent", "message_id": 42, "sleep_seconds": 5}
+
+
+def test_stalled_job_is_cancelled_before_its_message_becomes_visible():
+    async def run():
+        db = StubSupabase()
+        progress = []
+        with pytest.raises(JobStalledError):
+            async with Heartbeat(db, 42, interval=0.02, stall_timeout=0.05):
+                await asyncio.sleep(5)
+                progress.append("wrote results")
+        return db, progress
+
+    db, progress = asyncio.run(run())
+    assert progress == []
+    assert 1 <= len(set_vt_calls(db)) <= 3
+
+
+def test_outside_cancellation_is_not_reported_as_a_stall():
+    async def job():
+        async with Heartbeat(StubSupabase(), 42, interval=0.02, stall_timeout=1):
+            await asyncio.sleep(5)
+
+    async def run():
+        task = asyncio.create_task(job())
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+
+
+def test_failed_beat_does_not_stop_the_heartbeat():
+    class FlakyRpc(StubSupabase):
+        def rpc(self, name, params):
+            self.rpc_calls.append((name, params))
+            if len(self.rpc_calls) == 1:
+                raise ConnectionError("network blip")
+            return super().rpc(name, params)
+
+    async def run():
+        db = FlakyRpc()
+        async with Heartbeat(db, 42, interval=0.02, stall_timeout=1):
+            await asyncio.sleep(0.11)
+        return db
+
+    assert len(asyncio.run(run()).rpc_calls) >= 3
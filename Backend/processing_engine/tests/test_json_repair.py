@@ -0,0 +1,65 @@
+"""
+LLM completion repair tests (no LLM needed).
+
+Usage:
+    python -m pytest processing_engine/tests/test_json_repair.py
+"""
+
+import pytest
+
+from processing_engine.processor_utils.json_repair import (
+    apply_fixes, extract_json_text, normalize_alert, repair_json
+)
+
+
+def test_fences_and_surrounding_prose():
+    response = 'Here is the alert:\n```json\n{"title": "Flood {watch}", "areas": []}\n```\nHope this helps.'
+    assert extract_json_text(response) == '{"title": "Flood {watch}", "areas": []}'
+    assert repair_json(response) == {"title": "Flood {watch}", "areas": []}
+
+
+def test_trailing_commas():
+    assert repair_json('{"areas": [{"place_names": ["Lahore", "Kasur",],},],}') == {
+        "areas": [{"place_names": ["Lahore", "Kasur"]}]
+    }
+
+
+def test_truncated_output_is_closed():
+    assert repair_json('{"title": "Heatwave", "areas": [{"place_names": ["Lahore"') == {
+        "title": "Heatwave", "areas": [{"place_names": ["Lahore"]}]
+    }
+    # Cut off inside a string value, and after a dangling key
+    assert repair_json('{"title": "Heatwave", "description": "Temperatures above 4') == {
+        "title": "Heatwave", "description": "Temperatures above 4"
+    }
+    assert repair_json('{"title": "Heatwave", "sever') == {"title": "Heatwave"}
+
+
+def test_brace_inside_a_truncated_string_is_kept():
+    text = '{"a": "contains } brace", "b": ['
+    assert extract_json_text(text) == text
+    assert repair_json(text) == {"a": "contains } brace", "b": []}
+
+
+def test_unrepairable_output_raises():
+    with pytest.raises(ValueError):
+        repair_json("The document does not describe an alert.")
+    with pytest.raises(ValueError):
+        repair_json('["not", "an", "object"]')
+
+
+def test_normalize_alert():
+    alert = normalize_alert({
+        "severity": "SEVERE",
+        "effective_from": "15/07/2025 14:00",
+        "areas": {"place_names": "Lahore", "specific_urgency": "immediate"},
+    })
+    assert alert["severity"] == "Severe"
+    assert alert["effective_from"] == "2025-07-15T14:00:00+05:00"
+    assert alert["areas"] == [{"place_names": ["Lahore"], "specific_urgency": "Immediate"}]
+
+
+def test_apply_fixes():
+    data = {"areas": [{"specific_severity": "bad"}]}
+    apply_fixes(data, {"areas.0.specific_severity": "Minor", "areas.5.x": 1, "category": "Met"})
+    assert data == {"areas": [{"specific_severity": "Minor"}], "category": "Met"}
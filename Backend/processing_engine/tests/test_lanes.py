@@ -0,0 +1,49 @@
+"""
+Processing lane scheduling and document priority tests (no queue needed).
+
+Usage:
+    python -m pytest processing_engine/tests/test_lanes.py
+"""
+
+import time
+from datetime import date
+
+from processing_engine.processor_utils.lanes import LaneScheduler
+from scrapers.priority import priority_score
+
+TODAY = date(2025, 7, 15)
+
+
+def test_weighted_round_robin_order():
+    scheduler = LaneScheduler([("urgent", 3), ("normal", 1)])
+    order = [scheduler.next_lane() for _ in range(8)]
+    assert order == ["urgent", "urgent", "normal", "urgent"] * 2
+
+
+def test_empty_lane_is_skipped_until_probed_again():
+    scheduler = LaneScheduler([("urgent", 3), ("normal", 1)], probe_interval=0.05)
+    scheduler.mark_empty("urgent")
+    assert [scheduler.next_lane() for _ in range(3)] == ["normal"] * 3
+
+    scheduler.mark_empty("normal")
+    assert scheduler.next_lane() is None
+
+    time.sleep(0.06)
+    assert scheduler.next_lane() in ("urgent", "normal")
+    scheduler.mark_active("urgent")
+    scheduler.mark_active("normal")
+    assert "normal" in [scheduler.next_lane() for _ in range(4)]
+
+
+def test_priority_score():
+    fresh_flood = {"source": "NDMA", "posted_date": "2025-07-14", "title": "Flash Flood Alert for Swat"}
+    assert priority_score(fresh_flood, TODAY) == 100
+
+    weekly = {"source": "PMD", "posted_date": "2025-07-10", "title": "Weekly weather outlook"}
+    assert priority_score(weekly, TODAY) == 40
+
+    backfill = {"source": "NEOC", "posted_date": "2024-01-01", "title": "Projection impact report"}
+    assert priority_score(backfill, TODAY) == 0
+
+    # Unknown source and unparseable date fall back to the base score
+    assert priority_score({"source": "Other", "posted_date": "15/07/2025", "title": ""}, TODAY) == 20
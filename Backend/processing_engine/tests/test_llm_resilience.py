@@ -0,0 +1,136 @@
+"""
+LLM deadline, retry and hedging tests with scripted stand-in clients (no API calls).
+
+Usage:
+    python -m pytest processing_engine/tests/test_llm_resilience.py
+"""
+
+import asyncio
+
+import pytest
+
+from processing_engine.processor_utils.llm_client import LLMResult
+from processing_engine.processor_utils.llm_resilience import ResilientLLM
+from processing_engine.processor_utils.llm_router import AllRoutesFailedError
+
+
+class ScriptedLLM:
+    """Each call takes the next (delay, outcome) step; exceptions are raised after the delay"""
+
+    model = "scripted"
+    config = {}
+
+    def __init__(self, *steps):
+        self.steps = list(steps)
+        self.calls = 0
+        self.cancelled = 0
+
+    async def complete(self, messages, stream_to=None, **kwargs):
+        delay, outcome = self.steps[min(self.calls, len(self.steps) - 1)]
+        self.calls += 1
+        if stream_to is not None:
+            stream_to.start()
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if isinstance(outcome, Exception):
+            raise outcome
+        if stream_to is not None:
+            stream_to.feed(outcome)
+        return LLMResult(content=outcome, model=self.model, latency=delay)
+
+
+def resilient(llm, **kwargs):
+    options = dict(deadline=5, attempt_timeout=1, max_retries=2, hedge=False, base_backoff=0.01)
+    options.update(kwargs)
+    return ResilientLLM(llm, **options)
+
+
+def test_router_exhaustion_and_invalid_output_are_retried():
+    llm = ScriptedLLM(
+        (0, AllRoutesFailedError("All LLM routes failed")),
+        (0, "not json"),
+        (0, '{"title": "Flood"}'),
+    )
+    result = asyncio.run(resilient(llm, validator=lambda content: "{" in content).complete([]))
+    assert result.content == '{"title": "Flood"}' and llm.calls == 3
+
+
+def test_programming_errors_are_not_retried():
+    llm = ScriptedLLM((0, RuntimeError("bug")), (0, "{}"))
+    with pytest.raises(RuntimeError, match="bug"):
+        asyncio.run(resilient(llm).complete([]))
+    assert llm.calls == 1
+
+
+def test_attempt_timeout_and_deadline():
+    llm = ScriptedLLM((1.0, "{}"))
+    with pytest.raises(TimeoutError, match="2 attempts"):
+        asyncio.run(resilient(llm, attempt_timeout=0.1, max_retries=1).complete([]))
+    assert llm.calls == 2 and llm.cancelled == 2
+
+    # The deadline caps the first attempt and leaves no time for a retry
+    llm = ScriptedLLM((1.0, "{}"))
+    with pytest.raises(TimeoutError, match="1 attempts"):
+        asyncio.run(resilient(llm, deadline=0.15, max_retries=5).complete([]))
+    assert llm.calls == 1
+
+
+def test_hedged_request_wins_when_the_first_is_slow():
+    primary = ScriptedLLM((1.0, '{"from": "primary"}'))
+    alternate = ScriptedLLM((0.02, '{"from": "alternate"}'))
+    llm = resilient(primary, alternate=alternate, hedge=True, hedge_initial_delay=0.05)
+
+    result = asyncio.run(llm.complete([]))
+    assert result.content == '{"from": "alternate"}'
+    assert primary.cancelled == 1 and alternate.calls == 1
+
+
+def test_fast_response_is_not_hedged():
+    primary = ScriptedLLM((0.01, "{}"))
+    alternate = ScriptedLLM((0, "{}"))
+    asyncio.run(resilient(primary, alternate=alternate, hedge=True, hedge_initial_delay=0.2).complete([]))
+    assert alternate.calls == 0
+
+
+class Consumer:
+    def __init__(self):
+        self.events = []
+
+    def start(self):
+        self.events.append("start")
+
+    def feed(self, delta):
+        self.events.append(delta)
+
+
+def test_winning_streamed_hedge_is_replayed_to_the_consumer():
+    primary = ScriptedLLM((0.2, '{"from": "primary"}'))
+    alternate = ScriptedLLM((0, '{"from": "hedge"}'))
+    consumer = Consumer()
+    llm = resilient(primary, alternate=alternate, hedge=True, hedge_initial_delay=0.02)
+    result = asyncio.run(llm.complete([], stream_to=consumer))
+    assert result.content == '{"from": "hedge"}'
+    assert consumer.events == ["start", "start", '{"from": "hedge"}']
+    assert primary.cancelled == 1
+
+
+def test_losing_streamed_hedge_never_reaches_the_consumer():
+    primary = ScriptedLLM((0.05, '{"from": "primary"}'))
+    alternate = ScriptedLLM((0.5, '{"from": "hedge"}'))
+    consumer = Consumer()
+    llm = resilient(primary, alternate=alternate, hedge=True, hedge_initial_delay=0.02)
+    result = asyncio.run(llm.complete([], stream_to=consumer))
+    assert result.content == '{"from": "primary"}'
+    assert consumer.events == ["start", '{"from": "primary"}']
+    assert alternate.calls == 1 and alternate.cancelled == 1
+
+
+def test_hedge_delay_follows_observed_p95():
+    llm = resilient(ScriptedLLM((0, "{}")), hedge_initial_delay=240)
+    assert llm.hedge_delay() == 240
+    for seconds in range(1, 21):
+        llm.latencies.record(seconds)
+    assert llm.hedge_delay() == 20
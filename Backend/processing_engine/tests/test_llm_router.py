@@ -0,0 +1,118 @@
+"""
+LLM router tests: token buckets, failover and cooldown with canned provider errors (no API calls).
+
+Usage:
+    python -m pytest processing_engine/tests/test_llm_router.py
+"""
+
+import asyncio
+import time
+
+import httpx
+import pytest
+from openai import BadRequestError, InternalServerError, RateLimitError
+
+from processing_engine.processor_utils.llm_client import LLMResult
+from processing_engine.processor_utils.llm_router import AllRoutesFailedError, LLMRouter, Route, estimate_tokens
+
+MODEL = "ernie-4.5-vl:baidu"
+MESSAGES = [{"role": "user", "content": [
+    {"type": "text", "text": "x" * 400},
+    {"type": "image_url", "image_url": {"url": "data:image/png;base64,AAAA"}},
+]}]
+
+
+def api_error(cls, status, headers=None):
+    request = httpx.Request("POST", "https://llm.test/chat/completions")
+    return cls(f"status {status}", response=httpx.Response(status, headers=headers, request=request), body=None)
+
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setenv("BAIDU_KEY", "key-1")
+    monkeypatch.setenv("BAIDU_KEY_2", "key-2")
+    monkeypatch.delenv("BAIDU_KEY_3", raising=False)
+    return LLMRouter([MODEL])
+
+
+def script(route, *outcomes):
+    """Replace the route's client call with outcomes returned (or raised) in order"""
+    calls = []
+
+    async def complete(messages, **kwargs):
+        calls.append(messages)
+        outcome = outcomes[len(calls) - 1]
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    route.client.complete = complete
+    return calls
+
+
+def result(total_tokens):
+    return LLMResult(content="{}", model=MODEL, latency=1.0, usage={"total_tokens": total_tokens})
+
+
+def test_estimate_tokens():
+    assert estimate_tokens(MESSAGES, 8000) == 8000 + 100 + 1200
+    assert estimate_tokens([{"role": "system", "content": "y" * 40}]) == 10
+
+
+def test_clients_leave_retries_to_the_router(router):
+    assert [route.client._client.max_retries for route in router.routes] == [0, 0]
+
+
+def test_token_bucket_is_settled_with_reported_usage(monkeypatch):
+    monkeypatch.setenv("BAIDU_KEY", "key-1")
+    route = Route(MODEL)
+    route.tokens_per_minute = route._tokens = 6000
+
+    asyncio.run(route.reserve_tokens(5000))
+    assert route._tokens == pytest.approx(1000, abs=1)
+    route.settle_tokens(5000, 2000)
+    assert route._tokens == pytest.approx(4000, abs=1)
+
+    # A request larger than the bucket waits for a refill instead of spinning forever
+    route._tokens = 5950
+    start = time.monotonic()
+    asyncio.run(route.reserve_tokens(10 ** 6))
+    assert 0.3 < time.monotonic() - start < 2
+
+
+def test_rate_limited_route_fails_over_and_cools_down(router):
+    first, second = router.routes
+    script(first, api_error(RateLimitError, 429, {"retry-after": "30"}))
+    script(second, result(1500))
+
+    assert asyncio.run(router.complete(MESSAGES)).usage == {"total_tokens": 1500}
+    assert first.cooling_down(time.monotonic()) and first.cooldown_until - time.monotonic() > 25
+    assert first.health == 0.5 and second.health == 1.0
+    # The failed call's reservation is returned; the successful one is settled with its usage
+    assert first._tokens == pytest.approx(first.tokens_per_minute, rel=1e-3)
+    assert second._tokens == pytest.approx(second.tokens_per_minute - 1500, rel=1e-3)
+    assert router._ordered_routes() == [second, first]
+
+
+def test_server_errors_fail_over_but_client_errors_do_not(router):
+    first, second = router.routes
+    script(first, api_error(InternalServerError, 503))
+    second_calls = script(second, result(100))
+    asyncio.run(router.complete(MESSAGES))
+    assert len(second_calls) == 1
+
+    first.cooldown_until, first.health = 0, 1.0
+    script(first, api_error(BadRequestError, 400))
+    second_calls = script(second, result(100))
+    with pytest.raises(BadRequestError):
+        asyncio.run(router.complete(MESSAGES))
+    assert second_calls == []
+    assert first._tokens == pytest.approx(first.tokens_per_minute, rel=1e-3)
+
+
+def test_all_routes_failed(router):
+    first, second = router.routes
+    script(first, api_error(InternalServerError, 500))
+    script(second, api_error(RateLimitError, 429, {"retry-after": "0"}))
+    with pytest.raises(AllRoutesFailedError):
+        asyncio.run(router.complete(MESSAGES))
@@ -0,0 +1,172 @@
+"""
+MinHash/LSH near-duplicate detection tests on an in-memory Supabase stand-in.
+
+Usage:
+    python -m pytest processing_engine/tests/test_near_duplicates.py
+"""
+
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+
+import processing_engine.worker as worker_module
+from processing_engine.models.schemas import QueueJob
+from processing_engine.processor_utils.near_duplicates import (
+    BANDS, NUM_PERM, NearDuplicateIndex, NearDuplicateSkipped,
+    lsh_bands, minhash, normalize_text, shingles, similarity
+)
+from processing_engine.tests.stubs import StubSupabase
+from processing_engine.worker import QueueWorker
+
+ADVISORY = (
+    "The Pakistan Meteorological Department has issued a heatwave advisory for the plains of "
+    "Punjab and Sindh from 12 June 2025 to 16 June 2025. Day temperatures are likely to remain "
+    "between 45 and 48 degrees in Lahore, Multan, Bahawalpur and Jacobabad. The public is advised "
+    "to avoid direct sunlight, drink plenty of water and keep children and the elderly indoors "
+    "during the afternoon. Farmers should irrigate crops in the evening and livestock must be kept "
+    "in shaded areas. Hospitals have been asked to set up heatstroke wards."
+)
+# Reissued with new dates and one extra sentence
+REISSUED = ADVISORY.replace("12 June", "14 June").replace("16 June", "19 June") + " Updates will follow."
+UNRELATED = (
+    "The National Disaster Management Authority reports that the water level in the Indus at Tarbela "
+    "and Kalabagh is rising after heavy rainfall in the upper catchments. District administrations in "
+    "Mianwali, Dera Ismail Khan and Layyah should alert riverine communities, shift vulnerable families "
+    "to relief camps and keep rescue boats ready. Embankments are being monitored around the clock by "
+    "irrigation department teams and residents must follow evacuation instructions without delay."
+)
+
+
+def signature(text):
+    return minhash(shingles(normalize_text(text)))
+
+
+def test_minhash_estimates_jaccard_similarity():
+    assert len(signature(ADVISORY)) == NUM_PERM
+    assert all(0 <= value < 2 ** 61 for value in signature(ADVISORY))
+    # Digits are folded: a changed date alone does not move the signature
+    assert similarity(signature(ADVISORY), signature(ADVISORY.replace("2025", "2026"))) == 1.0
+    assert similarity(signature(ADVISORY), signature(REISSUED)) >= 0.85
+    assert similarity(signature(ADVISORY), signature(UNRELATED)) < 0.1
+
+
+def test_lsh_bands_bucket_near_duplicates_together():
+    bands = lsh_bands(signature(ADVISORY))
+    assert len(bands) == BANDS and bands[0].startswith("0:")
+    assert set(bands) & set(lsh_bands(signature(REISSUED)))
+    assert not set(bands) & set(lsh_bands(signature(UNRELATED)))
+
+
+def test_only_processed_documents_are_candidates():
+    async def run():
+        db = StubSupabase()
+        index = NearDuplicateIndex(db, threshold=0.85)
+
+        assert await index.check("doc-1", ADVISORY) is None
+        # doc-1 has no alert yet (in flight, failed or dead-lettered): not a candidate
+        assert await index.check("doc-2", REISSUED) is None
+
+        await index.mark_processed("doc-1")
+        match = await index.check("doc-3", REISSUED)
+        assert match.document_id == "doc-1" and match.similarity >= 0.85
+        assert await index.check("doc-4", UNRELATED) is None
+
+        stored = {row["document_id"]: row for row in db.tables["document_signatures"]}
+        assert stored["doc-3"]["near_duplicate_of"] == "doc-1"
+        assert stored["doc-3"].get("processed_at") is None
+
+        # Scanned documents without a text layer are neither compared nor stored
+        assert await index.check("doc-5", "Page 1") is None
+        assert "doc-5" not in {row["document_id"] for row in db.tables["document_signatures"]}
+
+    asyncio.run(run())
+
+
+class StubProcessor:
+    def __init__(self, text):
+        self.text = text
+        self.extracted = 0
+
+    async def render_document(self, job, timings=None):
+        return ["data:image/png;base64,AAAA"], self.text
+
+    async def extract(self, pages, timings=None, prefetch=None):
+        self.extracted += 1
+        return '{"title": "Heatwave"}'
+
+    async def parse(self, response, document_id, alert_id, timings=None):
+        return {"title": "Heatwave"}, {"id": alert_id, "document_id": document_id}
+
+    async def _geocode(self, place_names):
+        return []
+
+    async def geocode_areas(self, json_response, alert_id, timings=None, prefetch=None):
+        return [{"alert_id": alert_id, "place_id": "lahore"}]
+
+
+def make_worker(db, processor):
+    worker = QueueWorker.__new__(QueueWorker)
+    worker.logger = worker_module.logging.getLogger(__name__)
+    worker.db = db
+    worker.processor = processor
+    worker.checkpoints = None
+    worker.near_duplicates = NearDuplicateIndex(db, threshold=0.85)
+    return worker
+
+
+def make_job(document_id, msg_id=7):
+    now = datetime.now(timezone.utc)
+    return QueueJob(msg_id=msg_id, read_ct=1, enqueued_at=now, vt=now, message={
+        "url": f"https://example.org/{document_id}.pdf", "title": "Heatwave advisory", "source": "PMD",
+        "filename": None, "filetype": "pdf", "document_id": document_id, "posted_date": "2025-06-12",
+    })
+
+
+async def index_processed(worker, document_id, text):
+    await worker.near_duplicates.check(document_id, text)
+    await worker.near_duplicates.mark_processed(document_id)
+
+
+@pytest.fixture
+def dedup_mode(monkeypatch):
+    return lambda mode: monkeypatch.setattr(worker_module, "DEDUP_MODE", mode)
+
+
+def test_skip_mode_completes_the_job_without_an_llm_call(dedup_mode):
+    dedup_mode("skip")
+
+    async def run():
+        db = StubSupabase(documents=[{"id": "doc-2"}])
+        processor = StubProcessor(REISSUED)
+        worker = make_worker(db, processor)
+        await index_processed(worker, "doc-1", ADVISORY)
+
+        job = make_job("doc-2")
+        with pytest.raises(NearDuplicateSkipped) as skipped:
+            await worker._run_stages(job)
+        assert processor.extracted == 0
+        assert await worker._skip_duplicate(job, skipped.value.match)
+        return db
+
+    db = asyncio.run(run())
+    document = db.tables["documents"][0]
+    assert document["processed_at"] and document["structured_text"]["skipped"] is True
+    assert document["structured_text"]["near_duplicate_of"]["document_id"] == "doc-1"
+    assert db.rpc_calls == [("delete", {"queue_name": "processing_queue", "message_id": 7})]
+
+
+def test_flag_mode_processes_and_annotates(dedup_mode):
+    dedup_mode("flag")
+
+    async def run():
+        processor = StubProcessor(REISSUED)
+        worker = make_worker(StubSupabase(), processor)
+        await index_processed(worker, "doc-1", ADVISORY)
+        json_response, alert, areas = await worker._run_stages(make_job("doc-2"))
+        return processor, json_response, areas
+
+    processor, json_response, areas = asyncio.run(run())
+    assert processor.extracted == 1
+    assert json_response["near_duplicate_of"]["document_id"] == "doc-1"
+    assert areas == [{"alert_id": areas[0]["alert_id"], "place_id": "lahore"}]
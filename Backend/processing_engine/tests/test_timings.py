@@ -0,0 +1,86 @@
+"""
+Per-stage timing and token usage tests (no database needed).
+
+Usage:
+    python -m pytest processing_engine/tests/test_timings.py
+"""
+
+import asyncio
+import time
+from datetime import date
+
+import pytest
+
+from processing_engine.processor_utils.llm_client import LLMResult
+from processing_engine.processor_utils.timing_report import stage_percentiles
+from processing_engine.processor_utils.timings import StageTimings
+from processing_engine.tests.stubs import StubSupabase
+
+
+def result(ttft, prompt_tokens, completion_tokens):
+    return LLMResult(content="{}", model="ernie-4.5-vl:baidu", latency=1.0, time_to_first_token=ttft, usage={
+        "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    })
+
+
+def test_repeated_stages_accumulate():
+    timings = StageTimings()
+    for _ in range(3):
+        with timings.stage("geocode"):
+            time.sleep(0.01)
+    timings.record("upload", 0.5)
+    assert 0.03 <= timings.stages["geocode"] < 0.2
+    assert timings.stages["upload"] == 0.5
+
+
+def test_stage_is_recorded_when_it_raises():
+    timings = StageTimings()
+    with pytest.raises(ValueError):
+        with timings.stage("parse"):
+            raise ValueError("invalid JSON")
+    assert "parse" in timings.stages
+
+
+def test_llm_usage_and_row():
+    timings = StageTimings()
+    timings.record("llm", 12.0)
+    timings.record_llm(result(2.5, 3000, 800))
+    timings.record_llm(result(1.5, 1000, 200))  # escalation: usage of both calls is billed
+    assert timings.as_row() == {
+        "model": "ernie-4.5-vl:baidu",
+        "stages": {"llm": 12.0},
+        "time_to_first_token": 1.5,
+        "prompt_tokens": 4000,
+        "completion_tokens": 1000,
+        "total_tokens": 5000,
+        "total_time": 12.0,
+    }
+
+
+def test_parallel_branches_count_the_slowest():
+    branches = []
+    for llm_seconds, ttft in ((8.0, 3.0), (11.0, 2.0)):
+        branch = StageTimings()
+        branch.record("encode", 0.2)
+        branch.record("llm", llm_seconds)
+        branch.record_llm(result(ttft, 1000, 300))
+        branches.append(branch)
+
+    timings = StageTimings()
+    timings.record("encode", 0.1)
+    timings.merge_parallel(branches)
+    assert timings.stages == {"encode": pytest.approx(0.3), "llm": 11.0}
+    assert timings.time_to_first_token == 2.0
+    assert timings.usage == {"prompt_tokens": 2000, "completion_tokens": 600, "total_tokens": 2600}
+
+
+def test_report_orders_stages_by_pipeline():
+    db = StubSupabase()
+    db.rpc_handlers["stage_timing_percentiles"] = lambda params: [
+        {"model": "m", "stage": stage, "samples": 1, "p50": 1.0, "p95": 1.0}
+        for stage in ("upload", "ttft", "llm", "fetch")
+    ]
+    rows = asyncio.run(stage_percentiles(db, date(2025, 7, 1), date(2025, 7, 7)))
+    assert [r["stage"] for r in rows] == ["fetch", "llm", "upload", "ttft"]
+    assert db.rpc_calls[0][1] == {"from_ts": "2025-07-01T00:00:00+00:00", "to_ts": "2025-07-08T00:00:00+00:00"}
@@ -0,0 +1,104 @@
+"""
+Upload tests for processed alerts: the save_processed_alert RPC payload and the
+sequential PostgREST fallback (in-memory Supabase stand-in, no database needed).
+
+Usage:
+    python -m pytest processing_engine/tests/test_upload.py
+"""
+
+import asyncio
+import logging
+
+from processing_engine.tests.stubs import StubQuery, StubSupabase
+from processing_engine.worker import QueueWorker
+
+
+class RecordingQuery(StubQuery):
+    async def execute(self):
+        if self.action[0] != "select":
+            self.db.writes.append((self.table, *self.action))
+        return await super().execute()
+
+
+class RecordingSupabase(StubSupabase):
+    """Also keeps every write as (table, action, payload...) in call order"""
+
+    def __init__(self, **tables):
+        super().__init__(**tables)
+        self.writes = []
+
+    def table(self, name):
+        return RecordingQuery(self, name)
+
+
+def make_worker(db, atomic_upload=True):
+    worker = QueueWorker.__new__(QueueWorker)
+    worker.logger = logging.getLogger("test")
+    worker.db = db
+    worker.atomic_upload = atomic_upload
+    return worker
+
+
+ALERT = {"id": "alert-1", "document_id": "doc-1", "event": "Flood", "severity": "Severe"}
+
+
+def area(place_id, **overrides):
+    return {"alert_id": "alert-1", "place_id": place_id, **overrides}
+
+
+def test_rpc_receives_the_whole_alert_in_one_call():
+    db = RecordingSupabase()
+    db.rpc_handlers["save_processed_alert"] = lambda params: "alert-1"
+    areas = [area("lahore", specific_severity="Severe")]
+
+    alert_id = asyncio.run(make_worker(db)._upload({"title": "Flood"}, ALERT, areas))
+    assert alert_id == "alert-1"
+    assert db.rpc_calls == [("save_processed_alert", {
+        "document_id": "doc-1",
+        "structured_text": {"title": "Flood"},
+        "alert": ALERT,
+        "areas": areas,
+    })]
+    assert db.writes == []
+
+
+def test_rpc_without_an_alert_id_is_a_failed_upload():
+    db = RecordingSupabase()
+    db.rpc_handlers["save_processed_alert"] = lambda params: None
+    assert asyncio.run(make_worker(db)._upload({}, ALERT, [])) is None
+
+
+def test_sequential_fallback_writes_only_the_delta():
+    db = RecordingSupabase(
+        documents=[{"id": "doc-1"}],
+        alerts=[dict(ALERT)],
+        alert_areas=[
+            area("lahore", specific_severity="Moderate"),
+            area("kasur"),
+            area("okara"),
+        ],
+    )
+    incoming = [
+        {"alert_id": "stale-id", "place_id": "lahore", "specific_severity": "Severe"},
+        {"alert_id": "stale-id", "place_id": "kasur"},
+        {"alert_id": "stale-id", "place_id": "sheikhupura"},
+    ]
+
+    alert_id = asyncio.run(make_worker(db, atomic_upload=False)._upload({"title": "Flood"}, ALERT, incoming))
+    assert alert_id == "alert-1"
+
+    area_writes = [write for write in db.writes if write[0] == "alert_areas"]
+    assert [write[1] for write in area_writes] == ["delete", "upsert"]
+    upserted = area_writes[1][2]
+    assert [(a["alert_id"], a["place_id"]) for a in upserted] == [("alert-1", "lahore"), ("alert-1", "sheikhupura")]
+
+    stored = {a["place_id"]: a for a in db.tables["alert_areas"]}
+    assert sorted(stored) == ["kasur", "lahore", "sheikhupura"]
+    assert stored["lahore"]["specific_severity"] == "Severe"
+    assert db.tables["documents"][0]["structured_text"] == {"title": "Flood"}
+
+
+def test_sequential_fallback_with_unchanged_areas_writes_no_areas():
+    db = RecordingSupabase(documents=[{"id": "doc-1"}], alerts=[dict(ALERT)], alert_areas=[area("kasur")])
+    asyncio.run(make_worker(db, atomic_upload=False)._upload({}, ALERT, [area("kasur")]))
+    assert [write[0] for write in db.writes] == ["documents", "alerts"]
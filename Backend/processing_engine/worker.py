@@ -1,6 +1,6 @@
 import logging
 from uuid import uuid4
-from typing import List
+from typing import List, Optional
 import time
 from datetime import datetime, timezone
 #from processing_engine.processors.document_processor import DocumentProcessor
@@ -8,13 +8,86 @@ from datetime import datetime, timezone
 from processing_engine.processors.pipeline_processor import PipelineProcessor
 from processing_engine.models.schemas import QueueJob
 from processing_engine.processor_utils.pipeline_prompts import _load_examples
+from processing_engine.processor_utils.checkpoints import CheckpointStore, STAGES
+from processing_engine.processor_utils.dead_letter import DeadLetterQueue
+from processing_engine.processor_utils.heartbeat import Heartbeat
+from processing_engine.processor_utils.timings import StageTimings
+from processing_engine.config import (
+    QUEUE_NAME, MAX_READ_COUNT, LLM_ROUTES, LLM_HEDGE_MODEL, LLM_CASCADE, CASCADE_FAST_MODEL, STREAM_GEOCODE,
+    DEDUP_MODE, GEOCODER_MODE
+)
+from processing_engine.processor_utils.near_duplicates import NearDuplicate, NearDuplicateIndex, NearDuplicateSkipped
+from processing_engine.processor_utils.area_stream import GeocodePrefetch
+from processing_engine.processor_utils.llm_client import LLMClient
+from processing_engine.processor_utils.llm_router import LLMRouter
+from processing_engine.processor_utils.llm_resilience import ResilientLLM
+
+# alert_areas columns that a reprocessing run may change for an existing (alert_id, place_id)
+AREA_OVERRIDE_FIELDS = (
+    "specific_effective_from",
+    "specific_effective_until",
+    "specific_urgency",
+    "specific_severity",
+    "specific_instruction",
+)
+
+
+def _normalize_area_value(value):
+    """Compare timestamps by instant, not by their string formatting"""
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return value
+    return value
+
+
+def diff_alert_areas(existing: List[dict], incoming: List[dict]) -> tuple[List[dict], List[str]]:
+    """
+    Compute the alert_areas delta for one alert.
+
+    Returns the incoming rows that are new or whose overrides changed (one per place,
+    first occurrence wins) and the place_ids whose stored rows should be deleted.
+    """
+    current = {
+        row["place_id"]: tuple(_normalize_area_value(row.get(f)) for f in AREA_OVERRIDE_FIELDS)
+        for row in existing
+    }
+
+    changed = []
+    seen = set()
+    for area in incoming:
+        place_id = area.get("place_id")
+        if not place_id or place_id in seen:
+            continue
+        seen.add(place_id)
+        values = tuple(_normalize_area_value(area.get(f)) for f in AREA_OVERRIDE_FIELDS)
+        if current.get(place_id) != values:
+            changed.append(area)
+
+    stale_place_ids = [place_id for place_id in current if place_id not in seen]
+    return changed, stale_place_ids
 
 
 class QueueWorker:
-    def __init__(self, supabase):
+    def __init__(self, supabase, checkpointing: bool = True, atomic_upload: bool = True):
         self.logger = logging.getLogger(__name__)
         self.db = supabase
-        self.processor = PipelineProcessor("ernie-4.5-vl-thinking:baidu")
+        self.atomic_upload = atomic_upload
+        llm = LLMRouter(LLM_ROUTES) if len(LLM_ROUTES) > 1 else LLMClient(LLM_ROUTES[0])
+        alternate = LLMClient(LLM_HEDGE_MODEL) if LLM_HEDGE_MODEL else None
+        looks_like_json = lambda content: "{" in content
+        # The fast model gets a single attempt: escalation is its retry
+        fast_llm = ResilientLLM(
+            LLMClient(CASCADE_FAST_MODEL), validator=looks_like_json, max_retries=0, hedge=False
+        ) if LLM_CASCADE else None
+        self.processor = PipelineProcessor(
+            ResilientLLM(llm, alternate=alternate, validator=looks_like_json),
+            fast_llm=fast_llm
+        )
+        self.checkpoints = CheckpointStore(supabase) if checkpointing else None
+        self.dead_letters = DeadLetterQueue(supabase)
+        self.near_duplicates = NearDuplicateIndex(supabase) if DEDUP_MODE != "off" else None
         self._cache_initialized = False
 
     async def initialize(self):
@@ -23,33 +96,62 @@ class QueueWorker:
             self.logger.info("Pre-warming example files cache...")
             try:
                 await _load_examples()
+                if GEOCODER_MODE == "embedded":
+                    from geocoding import get_shared_geocoding_service, start_gazetteer_refresher
+                    get_shared_geocoding_service()
+                    start_gazetteer_refresher()
                 self._cache_initialized = True
             except Exception as e:
                 self.logger.error(f"Failed to pre-warm cache: {e}")
                 raise
 
     async def process_job(self, job: QueueJob):
+        # A message past its budget without a recorded failure crashed the worker (poison message)
+        if job.read_ct > MAX_READ_COUNT:
+            state = await self.checkpoints.load(job.message.document_id) if self.checkpoints else {}
+            reason = state.get("last_error") or f"Worker did not finish the job in {job.read_ct - 1} deliveries"
+            await self.dead_letters.send(job, reason)
+            return False
+
         try:
             if not self._cache_initialized:
                 await self.initialize()
 
             start_time = time.time()
             document_id = job.message.document_id
-            alert_id = str(uuid4())
-            self.logger.info(f"Processing {job.msg_id}")
+            queue_wait = (datetime.now(timezone.utc) - job.enqueued_at).total_seconds()
+            self.logger.info(
+                f"Processing {job.msg_id} from {job.queue_name} after {queue_wait:.0f}s in queue "
+                f"(delivery {job.read_ct}/{MAX_READ_COUNT})"
+            )
+
+            timings = StageTimings()
+            async with Heartbeat(self.db, job.msg_id, queue_name=job.queue_name) as heartbeat:
+                json_response, alert, alert_areas = await self._run_stages(job, heartbeat, timings)
+                end_time = time.time()
+                json_response["processing_time"] = f"{end_time-start_time:.2f}"
+                json_response["queue_name"] = job.queue_name
+                json_response["queue_wait_time"] = f"{queue_wait:.2f}"
+                with timings.stage("upload"):
+                    uploaded_success = await self._upload(json_response, alert, alert_areas)
 
-            json_response, alert, alert_areas = await self.processor.transform(job, document_id, alert_id)
             if json_response and alert and alert_areas:
                 self.logger.info(f"Processed job {job.msg_id} successfully")
-            end_time = time.time()
-            json_response["processing_time"] = f"{end_time-start_time:.2f}"
 
-            uploaded_success = await self._upload(json_response, alert, alert_areas)
-            if uploaded_success:
-                queue_pop_success = await self._mark_complete(job.msg_id)
+            if not uploaded_success:
+                reason = "Upload of the processed alert failed"
+            else:
+                # The alert exists now, so later documents may be matched against this one
+                if self.near_duplicates:
+                    await self.near_duplicates.mark_processed(document_id)
+                queue_pop_success = await self._mark_complete(job.msg_id, job.queue_name)
                 if queue_pop_success:
+                    if self.checkpoints:
+                        await self.checkpoints.clear(document_id)
+                    await self._record_timings(job, timings)
                     self.logger.info(f"Successfully uploaded job {job.msg_id}")
                     return True
+                reason = "Could not remove the job from the queue"
 
             # print(f"\n\n\n Processed Dicts:")
             # print(f"\n\n\n JSON:")
@@ -59,12 +161,172 @@ class QueueWorker:
             # print(f"\n\n\n Alert_Areas:")
             # for alert_area in alert_areas:
             #     print(json.dumps(alert_area, indent=4, sort_keys=False))
+        except NearDuplicateSkipped as e:
+            if await self._skip_duplicate(job, e.match):
+                return True
+            reason = f"Could not complete skipped near-duplicate: {e}"
         except Exception as e:
             self.logger.error(f"Job {job.msg_id} failed: {e}")
+            reason = f"{type(e).__name__}: {e}"
+
+        await self._handle_failure(job, reason)
+        return False
+
+    async def _handle_failure(self, job: QueueJob, reason: str):
+        """Dead-letter the job once its retry budget is spent, otherwise leave it for redelivery"""
+        if job.read_ct >= MAX_READ_COUNT:
+            await self.dead_letters.send(job, reason)
+            return
+        if self.checkpoints:
+            await self.checkpoints.record_error(job, reason)
+        self.logger.warning(
+            f"Job {job.msg_id} will be retried ({MAX_READ_COUNT - job.read_ct} deliveries left): {reason}"
+        )
+
+    async def _run_stages(
+        self,
+        job: QueueJob,
+        heartbeat: Optional[Heartbeat] = None,
+        timings: Optional[StageTimings] = None
+    ) -> tuple[dict, dict, List[dict]]:
+        """
+        Run render -> LLM -> parse -> geocode, skipping every stage that a previous
+        delivery of the same document already checkpointed.
+        """
+        document_id = job.message.document_id
+        state = await self.checkpoints.load(document_id) if self.checkpoints else {}
+        resume_at = CheckpointStore.resume_index(state)
+        if resume_at:
+            self.logger.info(f"Resuming job {job.msg_id} at stage '{CheckpointStore.resume_stage(state)}'")
+
+        # Near-duplicates are detected once, in the first delivery that renders the document
+        duplicate, text, pages = None, "", None
+        if resume_at <= STAGES.index("pages"):
+            pages, text = await self.processor.render_document(job, timings)
+            if self.near_duplicates:
+                duplicate = await self.near_duplicates.check(document_id, text)
+                if duplicate and DEDUP_MODE == "skip":
+                    raise NearDuplicateSkipped(duplicate)
+            # Only page metadata is checkpointed; rendering again is cheaper than storing the images
+            state["pages"] = {"url": job.message.url, "page_count": len(pages)}
+            await self._checkpoint(job, "pages", state["pages"], heartbeat)
+        elif resume_at <= STAGES.index("llm_output"):
+            pages, _ = await self.processor.render_document(job, timings)
+
+        # Area lists start geocoding while the completion streams, when this delivery runs the LLM
+        prefetch = GeocodePrefetch(self.processor._geocode) if STREAM_GEOCODE and resume_at <= STAGES.index("llm_output") else None
+        try:
+            if resume_at <= STAGES.index("llm_output"):
+                previous = await self._previous_alert(duplicate) if duplicate and DEDUP_MODE == "diff" else None
+                if previous and text:
+                    state["llm_output"] = await self.processor.extract_diff(previous, text, timings)
+                else:
+                    state["llm_output"] = await self.processor.extract(pages, timings, prefetch)
+                await self._checkpoint(job, "llm_output", state["llm_output"], heartbeat)
+
+            if resume_at <= STAGES.index("parsed_alert"):
+                try:
+                    json_response, alert = await self.processor.parse(state["llm_output"], document_id, str(uuid4()), timings)
+                except ValueError:
+                    # An invalid completion must not be replayed on the next delivery
+                    if self.checkpoints:
+                        await self.checkpoints.discard(document_id, "llm_output")
+                    raise
+                if duplicate:
+                    json_response["near_duplicate_of"] = duplicate.model_dump()
+                state["parsed_alert"] = {"structured_text": json_response, "alert": alert}
+                await self._checkpoint(job, "parsed_alert", state["parsed_alert"], heartbeat)
+
+            json_response = state["parsed_alert"]["structured_text"]
+            alert = state["parsed_alert"]["alert"]
+
+            if resume_at <= STAGES.index("alert_areas"):
+                state["alert_areas"] = await self.processor.geocode_areas(json_response, alert["id"], timings, prefetch)
+                await self._checkpoint(job, "alert_areas", state["alert_areas"], heartbeat)
+        finally:
+            if prefetch:
+                prefetch.cancel_unused()
+
+        return json_response, alert, state["alert_areas"]
+
+    async def _previous_alert(self, duplicate: NearDuplicate) -> Optional[dict]:
+        """Structured alert of the earlier document, if it has been processed"""
+        try:
+            response = await self.db.table("documents").select("structured_text").eq(
+                "id", duplicate.document_id
+            ).limit(1).execute()
+            if response.data and response.data[0].get("structured_text"):
+                return response.data[0]["structured_text"]
+        except Exception as e:
+            self.logger.warning(f"Could not load alert of document {duplicate.document_id}: {e}")
+        return None
+
+    async def _skip_duplicate(self, job: QueueJob, duplicate: NearDuplicate) -> bool:
+        """Mark a near-duplicate as processed without an alert of its own and remove its job"""
+        document_id = job.message.document_id
+        try:
+            await self.db.table("documents").update({
+                "processed_at": datetime.now(timezone.utc).isoformat(),
+                "structured_text": {"near_duplicate_of": duplicate.model_dump(), "skipped": True}
+            }).eq("id", document_id).execute()
+        except Exception as e:
+            self.logger.error(f"Could not mark document {document_id} as a skipped near-duplicate: {e}")
             return False
 
-    async def _upload(self,json_response: dict, alert: dict, alert_areas: List[dict]):
-        """Upsert new alerts to table"""
+        if not await self._mark_complete(job.msg_id, job.queue_name):
+            return False
+        if self.checkpoints:
+            await self.checkpoints.clear(document_id)
+        self.logger.info(f"Skipped job {job.msg_id}: near-duplicate of document {duplicate.document_id}")
+        return True
+
+    async def _checkpoint(self, job: QueueJob, stage: str, value, heartbeat: Optional[Heartbeat] = None):
+        # Every completed stage counts as progress for the visibility heartbeat
+        if heartbeat:
+            heartbeat.touch()
+        if self.checkpoints:
+            await self.checkpoints.save(job, stage, value)
+
+    async def _record_timings(self, job: QueueJob, timings: StageTimings):
+        """Store the per-stage timings of this delivery (best effort)"""
+        try:
+            await self.db.table("document_timings").insert({
+                "document_id": job.message.document_id,
+                "msg_id": job.msg_id,
+                "queue_name": job.queue_name,
+                **timings.as_row()
+            }).execute()
+        except Exception as e:
+            self.logger.warning(f"Could not store timings for job {job.msg_id}: {e}")
+
+    async def _upload(self, json_response: dict, alert: dict, alert_areas: List[dict]):
+        """Save the processed alert, returning the final alert id (None on failure)"""
+        if not self.atomic_upload:
+            return await self._upload_sequential(json_response, alert, alert_areas)
+
+        document_id = alert["document_id"]
+        try:
+            # Document update, alert upsert and alert_areas delta in one transaction
+            response = await self.db.rpc("save_processed_alert", {
+                "document_id": document_id,
+                "structured_text": json_response,
+                "alert": alert,
+                "areas": alert_areas
+            }).execute()
+            if not response.data:
+                raise Exception("save_processed_alert returned no alert id")
+
+            if not alert_areas:
+                self.logger.warning(f"No valid alert_areas to upload for document {document_id}")
+            self.logger.info(f"Successfully uploaded data for document {document_id}")
+            return response.data
+
+        except Exception as e:
+            self.logger.error(f"Upload failed for document {document_id}: {e}")
+            return None
+
+    async def _upload_sequential(self, json_response: dict, alert: dict, alert_areas: List[dict]):
+        """Upsert new alerts to table (one PostgREST call per table, not atomic)"""
         try:
             document_id = alert["document_id"]
             
@@ -89,39 +351,55 @@ class QueueWorker:
             # Get the actual alert_id from the upserted row (may differ if updating existing)
             actual_alert_id = alert_response.data[0]["id"]
             
-            # Delete any existing alert_areas for this alert (in case of re-processing)
-            await self.db.table("alert_areas").delete().eq("alert_id", actual_alert_id).execute()
-            
-            # Insert the alert_areas rows (only if there are any)
+            # Apply only the changed alert_areas (in case of re-processing)
             if alert_areas:
                 # Update alert_id in case it changed due to upsert
                 for area in alert_areas:
                     area["alert_id"] = actual_alert_id
-                    
-                alert_areas_response = await self.db.table("alert_areas").insert(alert_areas).execute()
-                if alert_areas_response.error or not alert_areas_response.data:
-                    self.logger.error(f"Alert_Areas upload failed for document {document_id}: {alert_areas_response.error}")
-                    raise Exception(alert_areas_response.error)
             else:
                 self.logger.warning(f"No valid alert_areas to upload for document {document_id}")
+
+            existing_response = await self.db.table("alert_areas").select(
+                "place_id, " + ", ".join(AREA_OVERRIDE_FIELDS)
+            ).eq("alert_id", actual_alert_id).execute()
+            changed, stale_place_ids = diff_alert_areas(existing_response.data or [], alert_areas)
+
+            if stale_place_ids:
+                await self.db.table("alert_areas").delete().eq(
+                    "alert_id", actual_alert_id
+                ).in_("place_id", stale_place_ids).execute()
+
+            if changed:
+                alert_areas_response = await self.db.table("alert_areas").upsert(
+                    changed,
+                    on_conflict="alert_id,place_id"
+                ).execute()
+                if not alert_areas_response.data:
+                    self.logger.error(f"Alert_Areas upload failed for document {document_id}")
+                    raise Exception("alert_areas upsert returned no rows")
+
+            self.logger.info(
+                f"alert_areas delta for document {document_id}: "
+                f"{len(changed)} upserted, {len(stale_place_ids)} removed"
+            )
                         
             self.logger.info(f"Successfully uploaded data for document {document_id}")
-            return True
+            return actual_alert_id
             
         except Exception as e:
             self.logger.error(f"Upload failed for document {document_id}: {e}")
-            return False
+            return None
     
-    async def _mark_complete(self, msg_id: int):
+    async def _mark_complete(self, msg_id: int, queue_name: str = QUEUE_NAME):
         response = await self.db.schema("pgmq_public").rpc("delete", {
-            "queue_name": "processing_queue",
+            "queue_name": queue_name,
             "message_id": msg_id
         }).execute()
-        if response.data and not response.error:
+        if response.data:
             self.logger.info(f"Successfully removed job {msg_id} from queue")
             return True
         else:
-            self.logger.error(f"Error removing job {msg_id}: {response.error}")
+            self.logger.error(f"Error removing job {msg_id}")
             return False
 
 
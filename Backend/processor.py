@@ -37,9 +37,16 @@ image = (
         "pandas",
         "openai",
         "PyMuPDF",
-        "pillow"
+        "pillow",
+        # Embedded geocoding (GEOCODER_MODE=embedded)
+        "pydantic-settings",
+        "rapidfuzz",
+        "geopy",
+        "redis",
+        "asyncpg"
     )
     .add_local_dir("processing_engine", remote_path="/root/processing_engine")
+    .add_local_dir("geocoding", remote_path="/root/geocoding")
     .add_local_file("utils.py", remote_path="/root/utils.py")
 )
 
@@ -60,6 +67,10 @@ async def process_jobs(limit: int = 5):
     import logging
     from processing_engine.worker import QueueWorker
     from processing_engine.models.schemas import QueueJob
+    from processing_engine.config import VISIBILITY_TIMEOUT
+    from processing_engine.processor_utils.lanes import LaneScheduler
+    from datetime import datetime, timezone
+    from statistics import median
 
     # Setup logging
     logging.basicConfig(
@@ -77,46 +88,65 @@ async def process_jobs(limit: int = 5):
     await worker.initialize()
     logger.info("Worker ready")
 
-    # Process jobs in batches
+    # Process jobs in batches, reading lanes in weighted order
     total_processed = 0
+    lanes = LaneScheduler()
+    queue_waits = {}
     
     while True:
         try:
-            # Fetch jobs from queue
+            lane = lanes.next_lane()
+            if lane is None:
+                logger.info("No more jobs in any lane")
+                break
+
+            # Fetch jobs from the lane (short visibility timeout, extended by each job's heartbeat)
             response = await supabase.schema("pgmq_public").rpc("read", {
-                "queue_name": "processing_queue",
-                "sleep_seconds": 1200,
+                "queue_name": lane,
+                "sleep_seconds": VISIBILITY_TIMEOUT,
                 "n": limit
             }).execute()
             
             jobs_data = response.data
-            logger.info(f"Fetched {len(jobs_data)} jobs from queue")
+            logger.info(f"Fetched {len(jobs_data)} jobs from {lane}")
             
             if not jobs_data:
-                logger.info("No more jobs in queue")
-                break
+                lanes.mark_empty(lane)
+                continue
+            lanes.mark_active(lane)
             
             # Parse and process jobs concurrently
-            jobs = [QueueJob(**job) for job in jobs_data]
+            jobs = [QueueJob(**job, queue_name=lane) for job in jobs_data]
+            read_at = datetime.now(timezone.utc)
+            queue_waits.setdefault(lane, []).extend(
+                (read_at - job.enqueued_at).total_seconds() for job in jobs
+            )
             tasks = [worker.process_job(job) for job in jobs]
             results = await asyncio.gather(*tasks, return_exceptions=True)
             
             # Log any errors
             for i, result in enumerate(results):
                 if isinstance(result, Exception):
-                    logger.error(f"Job {jobs[i].id} failed: {result}")
+                    logger.error(f"Job {jobs[i].msg_id} failed: {result}")
                 else:
                     total_processed += 1
             
-            # Break if we got fewer jobs than requested (queue is empty)
+            # Fewer jobs than requested means the lane is drained for now
             if int(len(jobs_data)) < int(limit):
-                logger.info("Reached end of queue")
-                break
+                logger.info(f"Reached end of {lane}")
+                lanes.mark_empty(lane)
                 
         except Exception as e:
             logger.error(f"Error processing batch: {e}", exc_info=True)
             break
     
+    # Queue-wait report per lane (time from enqueue to first read by this worker)
+    for lane, waits in queue_waits.items():
+        logger.info(
+            f"Queue wait in {lane}: {len(waits)} jobs, "
+            f"median {median(waits):.0f}s, max {max(waits):.0f}s"
+        )
+
     logger.info(f"Worker completed. Total jobs processed: {total_processed}")
     return total_processed
 
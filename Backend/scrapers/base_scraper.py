@@ -1,3 +1,5 @@
+from scrapers.priority import priority_score
+
 class BaseParser:
     def parse_html(self, html: str) -> list[dict]:
         """Extract entries from HTML."""
@@ -49,5 +51,8 @@ class BaseScraper:
             return []
     
     def upsert(self, entries):
+        # Priority decides which processing lane the document is queued on
+        for entry in entries:
+            entry["priority"] = priority_score(entry)
         response = self.db.table('documents').upsert(entries, on_conflict='filename').execute()
         return len(response.data)
\ No newline at end of file
@@ -0,0 +1,50 @@
+import re
+from datetime import date, datetime
+from typing import Optional
+
+# Base score per source: NDMA advisories are operational, NEOC projection-impact reports are mostly planning material
+SOURCE_SCORES = {
+    "NDMA": 40,
+    "PMD": 30,
+    "NEOC": 10,
+}
+
+# Title keywords that mark an active hazard
+URGENT_KEYWORDS = re.compile(
+    r"\b(glof|flash[\s-]?flood|flood(?:ing|s)?|cyclone|earthquake|landslide|avalanche|cloudburst|"
+    r"heat[\s-]?wave|heavy rain|immediate|urgent|emergency|evacuat\w*|alert|warning)\b",
+    re.IGNORECASE
+)
+
+
+def priority_score(entry: dict, today: Optional[date] = None) -> int:
+    """
+    Score a scraped document from 0 (bulk/backfill) to 100 (fresh hazard advisory).
+
+    Combines the source, how recently it was posted and hazard keywords in the title.
+    The score is stored on the document and decides which processing lane it is queued on
+    (urgent from processing_lane_settings.urgent_min_priority, 70 by default).
+    """
+    today = today or date.today()
+    score = SOURCE_SCORES.get(entry.get("source"), 20)
+
+    posted_date = entry.get("posted_date")
+    if posted_date:
+        try:
+            age_days = (today - datetime.strptime(posted_date, "%Y-%m-%d").date()).days
+        except ValueError:
+            age_days = None
+        if age_days is not None:
+            if age_days <= 1:
+                score += 30
+            elif age_days <= 3:
+                score += 20
+            elif age_days <= 7:
+                score += 10
+            elif age_days > 30:
+                score -= 20
+
+    if URGENT_KEYWORDS.search(entry.get("title") or ""):
+        score += 30
+
+    return max(0, min(100, score))